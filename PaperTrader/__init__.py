@@ -5,4 +5,17 @@ createtime : 2021/4/2 20:43
 author : Demon Finch
 """
 from .paper_account import Papertest, Paperpositon, ORDER_DIRECTION, MARKET, ORDER_STATUS
+from .paper_orderbook import Paperorderbook
+from .paper_settle import Papersettle, SETTLE_LEVEL
+from .paper_xdxr import Paperxdxr
+from .paper_metrics import Papermetrics
+from .paper_store import Paperstore, write_barstore
+from .paper_engine import Paperengine
+from .paper_vector import Papervector
+from .paper_sweep import Papersweep
+from .paper_profile import Paperprofiler
 from .paper_pyfolio import show_worst_drawdown_periods, show_perf_stats
+from .paper_live import Paperlive, queue_source, socket_source, replay_source
+from .paper_multi import Papermulti
+from .paper_adjust import Paperadjust, ADJUST_METHOD
+from .paper_export import Paperexport, read_history
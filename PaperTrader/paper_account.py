@@ -5,12 +5,16 @@ filename : paper_account.py
 createtime : 2021/4/2 20:44
 author : Demon Finch
 """
-import uuid
+import pickle
 import pandas as pd
-from datetime import datetime, timedelta
-
-order_history_temple = pd.DataFrame(columns=["datetime", "order_id", "order_type", "price", "volume",
-                                             "is_frozen", "commission", "tax", "money"])
+from datetime import datetime
+import numpy as np
+from .paper_ledger import Paperledger
+from .paper_orderbook import Paperorderbook
+from .paper_price import Paperprice
+from .paper_settle import Papersettle, SETTLE_LEVEL
+from .paper_xdxr import Paperxdxr
+from .paper_metrics import Papermetrics
 
 
 class ORDER_DIRECTION:
@@ -60,7 +64,20 @@ class MARKET:
     etf_cn = "etf_cn"
 
 
+_checkpoint_version = 1
+
+
 class Paperorder:
+    """
+    委托
+    成交金额、手续费、印花税在 fill 时计算一次后保存，读取时不再重复计算；
+    order_id 由账户分配(Papertest.new_order_id)，手动构建的委托加入委托簿前须指定
+    """
+    __slots__ = ("code", "order_time", "order_price", "order_volume",
+                 "deal_time", "deal_price", "deal_volume", "filled_volume", "filled_money",
+                 "deal_money", "deal_commisson", "deal_tax", "sell_money", "deal_frozen_money",
+                 "order_type", "commisson", "tax_percent", "order_id", "order_status")
+
     def __init__(self,
                  code: str,
                  order_time: datetime,
@@ -69,7 +86,7 @@ class Paperorder:
                  order_type: int,
                  commisson: float = 0.0001,
                  tax_percent: float = 0.001,
-                 order_id=str(uuid.uuid1())):
+                 order_id: int = None):
         self.code = code
         self.order_time = order_time
         self.order_price = order_price
@@ -77,7 +94,15 @@ class Paperorder:
 
         self.deal_time = None
         self.deal_price = None
-        self.deal_volume = None
+        self.deal_volume = None  # 最近一次成交
+        self.filled_volume = 0  # 累计成交
+        self.filled_money = 0.0
+
+        self.deal_money = None  # 最近一次成交的金额，fill 时计算
+        self.deal_commisson = None
+        self.deal_tax = None
+        self.sell_money = None
+        self.deal_frozen_money = None
 
         self.order_type = order_type
         self.commisson = commisson
@@ -105,32 +130,31 @@ class Paperorder:
         return self.order_price * self.order_volume * (1 + self.commisson)
 
     @property
-    def sell_money(self) -> float or None:
-        if self.order_type == ORDER_DIRECTION.SELL:
-            return self.deal_price * self.order_volume * (1 - self.commisson - self.tax_percent)
-        else:
-            return None
-
-    @property
-    def deal_money(self) -> float or None:
-        if self.deal_price:
-            return self.deal_price * self.order_volume * (1 + self.commisson)
-        else:
-            return None
-
-    @property
-    def deal_commisson(self) -> float or None:
-        if self.deal_price:
-            return self.deal_price * self.order_volume * self.commisson
-        else:
-            return None
+    def remaining_volume(self):
+        return self.order_volume - self.filled_volume
 
-    @property
-    def deal_tax(self) -> float:
+    def fill(self, deal_volume, deal_price: float, deal_time: datetime):
+        """
+        记录一次成交并计算成交金额、手续费、印花税
+        :param deal_volume: 成交量
+        :param deal_price: 成交价
+        :param deal_time: 成交时间
+        """
+        self.deal_volume = deal_volume
+        self.deal_price = deal_price
+        self.deal_time = deal_time
+        deal_amount = deal_price * deal_volume
+        self.deal_money = deal_amount * (1 + self.commisson)
+        self.deal_commisson = deal_amount * self.commisson
         if self.order_type == ORDER_DIRECTION.SELL:
-            return self.deal_price * self.order_volume * self.tax_percent
+            self.deal_tax = deal_amount * self.tax_percent
+            self.sell_money = deal_amount * (1 - self.commisson - self.tax_percent)
         else:
-            return 0
+            self.deal_tax = 0
+            self.sell_money = None
+        self.deal_frozen_money = self.order_price * deal_volume * (1 + self.commisson)
+        self.filled_volume += deal_volume
+        self.filled_money += deal_amount
 
     @property
     def order_position(self) -> dict:
@@ -149,6 +173,8 @@ class Paperorder:
 
 
 class Paperpositon:
+    __slots__ = ("code", "code_type", "t", "cost_money", "gpye", "djsl", "dividend_money",
+                 "_current_price", "_price_board", "_price_slot", "_account", "order_ledger", "old_history")
 
     def __init__(self,
                  code: str,
@@ -162,8 +188,11 @@ class Paperpositon:
         self.gpye = 0
         self.djsl = 0
         self.dividend_money = 0
-        self.current_price = None
-        self.order_history = order_history_temple  # tips：卖出时候，volume为负数
+        self._current_price = None
+        self._price_board = None  # 账户价格表，挂接后current_price直接读取价格表槽位
+        self._price_slot = None
+        self._account = None  # 所属账户，设置价格时经账户更新持仓汇总
+        self.order_ledger = Paperledger()  # tips：卖出时候，volume为负数
         self.old_history = list()
 
     def __repr__(self):
@@ -191,26 +220,89 @@ class Paperpositon:
     def kyye(self):
         return self.gpye - self.djsl
 
+    @property
+    def current_price(self) -> float or None:
+        if self._price_board is not None:
+            price = self._price_board.price_at(self._price_slot)
+            return None if np.isnan(price) else price
+        return self._current_price
+
+    @current_price.setter
+    def current_price(self, price: float):
+        account = getattr(self, "_account", None)  # 旧快照中的持仓没有该槽位
+        if account is not None:
+            account.on_price_change(self.code, price)
+        elif self._price_board is not None:
+            self._price_board[self.code] = price
+        else:
+            self._current_price = price
+
+    def attach_price(self, price_board: Paperprice, account=None):
+        """
+        挂接账户价格表，之后价格批量更新无需逐个刷新持仓
+        :param price_board: 价格表
+        :param account: 所属账户，设置后 current_price 赋值经 account.on_price_change 同步持仓市值
+        """
+        if self._current_price is not None and self.code not in price_board:
+            price_board[self.code] = self._current_price
+        self._price_board = price_board
+        self._price_slot = price_board.get_slot(self.code)
+        self._account = account
+
+    @property
+    def order_history(self) -> pd.DataFrame:
+        """当前持仓周期的订单流水DataFrame，按需由账本生成"""
+        return self.order_ledger.to_frame()
+
     def add_order(self, order_info: Paperorder, current_time: datetime):
-        self.order_history = self.order_history.append(order_info.order_position, ignore_index=True)
+        """记入一次成交(order_info.fill 之后调用)，直接写入账本行，不经过 order_position 字典"""
+        if order_info.order_type == ORDER_DIRECTION.BUY:
+            volume = order_info.deal_volume
+            release_day = order_info.deal_time.toordinal() + self.t
+            self.djsl += volume
+            self.order_ledger.append_row((order_info.deal_time, order_info.order_id, order_info.order_type,
+                                          order_info.deal_price, volume, 1, order_info.deal_commisson,
+                                          order_info.deal_tax, order_info.deal_money), release_day)
+        else:
+            volume = order_info.deal_volume * (-1)
+            self.order_ledger.append_row((order_info.deal_time, order_info.order_id, order_info.order_type,
+                                          order_info.deal_price, volume, 0, order_info.deal_commisson,
+                                          order_info.deal_tax, order_info.sell_money * (-1)))
         self.cpt_djsl(current_time)
-        self.gpye += order_info.order_position['volume']
+        self.gpye += volume
         if self.code_type == "stock_cn":
-            if self.gpye > 0 and self.order_history.shape[0] > 0:
+            if self.gpye > 0 and len(self.order_ledger) > 0:
                 self.cost_money += order_info.deal_money
-            elif self.gpye == 0 and self.order_history.shape[0] > 0:
-                self.old_history.append(self.order_history)
-                self.order_history = order_history_temple
+            elif self.gpye == 0 and len(self.order_ledger) > 0:
+                self.old_history.append(self.order_ledger.to_frame())
+                self.order_ledger = Paperledger()
                 self.cost_money = 0
                 self.dividend_money = 0
-        self.cpt_djsl(current_time)
+                self.djsl = 0
+
+    def add_xdxr(self, current_time: datetime, split: float, dividend: float) -> float:
+        """
+        除权除息：按每股送转比例增加股票余额，按每股分红计算现金，并记入流水(ORDER_DIRECTION.XDXR)
+        :return: 分红现金
+        """
+        dividend_money = self.gpye * dividend
+        split_volume = self.gpye * split
+        self.dividend_money += dividend_money
+        self.gpye = self.gpye * (1 + split)
+        self.order_ledger.append({"datetime": current_time,
+                                  "order_id": None,
+                                  "order_type": ORDER_DIRECTION.XDXR,
+                                  "price": dividend,
+                                  "volume": split_volume,
+                                  "is_frozen": 0,
+                                  "commission": 0,
+                                  "tax": 0,
+                                  "money": dividend_money * (-1)})
+        return dividend_money
 
     def cpt_djsl(self, current_time):
-        """计算冻结股票数量：触发时间为每次增加新订单后或者"""
-        self.order_history.loc[
-            (self.order_history.datetime.apply(lambda x: x.date() + timedelta(days=self.t)) <= current_time.date()) & (
-                    self.order_history.order_type == ORDER_DIRECTION.BUY), "is_frozen"] = 0
-        self.djsl = self.order_history.loc[self.order_history.is_frozen == 1, "volume"].sum()
+        """计算冻结股票数量：只有到期的解冻桶才会改变冻结数量"""
+        self.djsl -= self.order_ledger.release(current_time.toordinal())
 
 
 class Papertest:
@@ -225,35 +317,128 @@ class Papertest:
                  initcash: int = 100000,
                  commisson: float = 0.0001,
                  tax_percent: float = 0.001,
-                 t: int = 1):
+                 t: int = 1,
+                 settle_level: str = SETTLE_LEVEL.POSITION,
+                 settle_every: int = 1,
+                 settle_only_changed: bool = False,
+                 xdxr: Paperxdxr = None,
+                 metrics: bool = True,
+                 volume_ratio: float = 1.0,
+                 order_log: bool = True,
+                 volume_multiplier: float = 1,
+                 lot_size: int = 100):
+        """
+        :param initcash: 初始资金
+        :param commisson: 手续费率
+        :param tax_percent: 印花税率(卖出)
+        :param t: t+n
+        :param settle_level: 结算记录粒度：类 SETTLE_LEVEL
+        :param settle_every: 每N个bar记录一次结算，大于1时 settle_history.returns() 不是日收益，绩效用 self.metrics
+        :param settle_only_changed: 只记录有委托、成交或分红的bar，同上
+        :param xdxr: 除权除息日历，设置后每次推进到新日期时自动处理当日事件
+        :param metrics: 是否在每次结算时在线更新绩效指标 self.metrics
+        :param volume_ratio: match_orders 撮合时每个bar每个代码可成交量占bar成交量的比例上限，None为不限制
+        :param order_log: 是否把完成的委托归档到列式日志；False时只保留未成交委托，成交流水仍记入持仓账本
+        :param volume_multiplier: bar成交量每单位的股数，默认bar成交量单位为股；按手计的数据(如样本csv)为100
+        :param lot_size: 每手股数：match_orders 买入部分成交时向下取整到整手，rebalance 的默认取整单位
+        """
         self.cash_available = initcash
         self.frozen_money = 0
 
         self.current_time = datetime(1999, 1, 1)
         self.position = dict()
-        self.order = dict()
+        # 未成交委托按代码索引，完成的委托归档
+        self.order = Paperorderbook(volume_ratio, order_log, volume_multiplier=volume_multiplier, lot_size=lot_size)
+        self._order_count = 0  # 账户内自增的 order_id
 
         self.commisson = commisson
         self.tax_percent = tax_percent
         self.t = t
 
-        self.code_current_price = dict()
+        self.xdxr = xdxr
+        self._xdxr_day = None  # 最近一次处理除权除息的日期，同一日期只处理一次
+
+        self.code_current_price = Paperprice()
+        self._attached_count = 0  # 已挂接价格表的持仓数，用于发现外部直接加入position的持仓
+
+        # 增量维护的账户汇总：按价格表槽位记录持仓数量与成本，成交、分红、价格变动时按差值更新
+        self._hold_volume = np.zeros(0)
+        self._hold_cost = np.zeros(0)
+        self._positon_money = 0.0
+        self._cost_money = 0.0
+        self._open_position = dict()  # 当前持仓(gpye>0)
+
+        self.settle_history = Papersettle(level=settle_level, every=settle_every, only_changed=settle_only_changed)
+        self._settle_changed = True  # 自上次记录结算以来是否有委托、成交或分红
+        self.metrics = Papermetrics() if metrics else None
+        self._traded_money = 0.0  # 自上次结算以来的成交金额
+        self.exporter = None  # Paperexport，每次结算后增量导出成交流水与结算记录
 
-        self.settle_history = list()
+    def __getstate__(self):
+        """快照不包含导出器(打开的文件)"""
+        state = self.__dict__.copy()
+        state["exporter"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__dict__.setdefault("exporter", None)
+
+    def save_checkpoint(self, path: str):
+        """
+        保存账户完整状态快照(pickle)：资金、持仓及其账本与old_history、未成交委托与委托日志、
+        价格表、除权除息日历与进度、结算历史、绩效指标；
+        挂接了导出器时先把截至当前的流水与结算记录写出，恢复后重新 attach 的导出器从快照状态继续，不重复不遗漏；
+        快照只用于保存自己的回测状态，不适合作为交换格式分发，见 load_checkpoint
+        :param path: 快照文件路径
+        """
+        if self.exporter is not None:
+            self.exporter.collect(self)
+            self.exporter.flush()
+        with open(path, "wb") as checkpoint_file:
+            pickle.dump({"version": _checkpoint_version, "account": self}, checkpoint_file,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load_checkpoint(path: str, **params) -> "Papertest":
+        """
+        由 save_checkpoint 的快照恢复账户，之后用 Paperengine.run(data, after=account.current_time) 继续回测；
+        同一快照可多次加载为互不影响的账户，用于从同一预热状态分叉多组参数。
+        快照基于pickle，加载时可执行任意代码，不要加载来源不可信的快照文件
+        :param path: 快照文件路径
+        :param params: 覆盖的账户参数：commisson, tax_percent, t, volume_ratio, volume_multiplier, lot_size；
+                       t只影响之后的买入，已冻结批次按原解冻日解冻
+        :return: Papertest
+        """
+        with open(path, "rb") as checkpoint_file:
+            checkpoint = pickle.load(checkpoint_file)
+        if checkpoint.get("version") != _checkpoint_version:
+            raise ValueError(f"不支持的快照版本: {checkpoint.get('version')}")
+        account = checkpoint["account"]
+        for name, value in params.items():
+            if name in ("commisson", "tax_percent"):
+                setattr(account, name, value)
+            elif name == "t":
+                account.t = value
+                for posii in account.position.values():
+                    posii.t = value
+            elif name in ("volume_ratio", "volume_multiplier", "lot_size"):
+                setattr(account.order, name, value)
+            else:
+                raise ValueError(f"不支持覆盖的参数: {name}")
+        return account
 
     def settle(self):
         """
-        结算
+        结算，写入 settle_history
         """
-        settle_dict = {
-            "datetime": self.current_time,
-            "all_money": self.all_money,
-            "positon_money": self.positon_money,
-            "frozen_money": self.frozen_money,
-            "cash_available": self.cash_available,
-            "all_float_profit": self.all_float_profit,
-            "position": [posii.settle() for codei, posii in self.get_current_position.items()]}
-        self.settle_history.append(settle_dict)
+        if self.settle_history.record(self, self._settle_changed):
+            self._settle_changed = False
+        if self.metrics is not None:
+            self.metrics.update(self.current_time, self.all_money, self._traded_money)
+            self._traded_money = 0.0
+        if self.exporter is not None:
+            self.exporter.on_settle(self)
 
     @property
     def order_hisotry_dataframe(self) -> pd.DataFrame:
@@ -272,57 +457,166 @@ class Papertest:
     @property
     def positon_money(self) -> float:
         """计算持仓当前价格"""
-        return sum([posii.gpye * self.code_current_price[codei] for codei, posii in self.get_current_position.items()])
+        return self._positon_money
 
     @property
     def all_float_profit(self) -> float:
         """浮动盈亏"""
-        return sum([posii.gpye * self.code_current_price[codei] - posii.cost_money
-                    for codei, posii in self.get_current_position.items()])
+        return self._positon_money - self._cost_money
 
     @property
     def get_current_position(self) -> dict:
         """获取当前持仓，取持仓股票余额大于0的票返回"""
-        return {codei: posii for codei, posii in self.position.items() if posii.gpye > 0}
-
-    def get_wait_order(self) -> dict:
-        """获取未完成的订单"""
-        return {codei: oderi for codei, oderi in self.order.items() if oderi.order_status == ORDER_STATUS.WAIT}
+        return dict(self._open_position)
+
+    def _ensure_hold_capacity(self):
+        """持仓汇总数组与价格表槽位对齐"""
+        capacity = len(self.code_current_price.codes)
+        if self._hold_volume.shape[0] < capacity:
+            capacity = max(capacity, self._hold_volume.shape[0] * 2)
+            hold_volume, hold_cost = np.zeros(capacity), np.zeros(capacity)
+            hold_volume[:self._hold_volume.shape[0]] = self._hold_volume
+            hold_cost[:self._hold_cost.shape[0]] = self._hold_cost
+            self._hold_volume, self._hold_cost = hold_volume, hold_cost
+
+    def _sync_position(self, posii: Paperpositon):
+        """持仓数量或成本变化后，按差值更新账户汇总与当前持仓集合"""
+        if posii._price_board is not self.code_current_price:
+            self._attach_positions()
+        self._ensure_hold_capacity()
+        slot = posii._price_slot
+        if posii.gpye > 0:
+            volume, cost = posii.gpye, posii.cost_money
+            self._open_position[posii.code] = posii
+        else:
+            volume, cost = 0, 0
+            self._open_position.pop(posii.code, None)
+        price = self.code_current_price.price_at(slot)
+        if volume != self._hold_volume[slot] and not np.isnan(price):
+            self._positon_money += (volume - self._hold_volume[slot]) * price
+        self._cost_money += cost - self._hold_cost[slot]
+        self._hold_volume[slot] = volume
+        self._hold_cost[slot] = cost
+        if not self._open_position:
+            # 空仓时归零，避免差值累加的浮点误差跨持仓周期传递
+            self._positon_money, self._cost_money = 0.0, 0.0
+
+    def _on_prices(self, slots: np.ndarray, old_prices: np.ndarray):
+        """价格表更新后，按持仓数量 × 价格差值更新持仓市值，只计算有持仓的槽位"""
+        self._ensure_hold_capacity()
+        hold = self._hold_volume[slots]
+        held = np.flatnonzero(hold)
+        if held.size:
+            held_slots, first = np.unique(slots[held], return_index=True)
+            new_prices = np.nan_to_num(self.code_current_price.prices[held_slots])
+            old_prices = np.nan_to_num(old_prices[held][first])
+            self._positon_money += np.dot(self._hold_volume[held_slots], new_prices - old_prices)
+
+    def get_wait_order(self, code: str = None) -> dict:
+        """获取未完成的订单，可按代码过滤"""
+        return self.order.wait_orders(code)
 
     def on_current_time(self, current_time: datetime):
         """账户时间更新、t+1状态更新(冻结股票数计算)、除权除息更新"""
         self.current_time = current_time
-        # todo 除权除息账户修改
-        for codei, posii in self.position.items():
+        for codei, posii in self._open_position.items():
             posii.cpt_djsl(self.current_time)
+        if self.xdxr is not None and self._xdxr_day != current_time.toordinal():
+            self._xdxr_day = current_time.toordinal()
+            day_events = self.xdxr.get(current_time)
+            if day_events is not None:
+                self._apply_xdxr(*day_events)
+
+    def _apply_xdxr(self, codes, splits, dividends):
+        """一次处理一批除权除息事件，只作用于当前持仓"""
+        for codei, spliti, dividendi in zip(codes, splits, dividends):
+            posii = self._open_position.get(codei)
+            if posii is not None:
+                # 分红时候余额变化，除权时股票数量变化
+                self.cash_available += posii.add_xdxr(self.current_time, spliti, dividendi)
+                self._sync_position(posii)
+                self._settle_changed = True
 
     def on_dividend(self, dividend_dict: list):
         """
         计算分红和送股，单位：每股
+        已设置 xdxr 日历时由 on_current_time 自动处理，无需调用
         :param dividend_dict: [{"code":"601888","split":4,"dividend":0.6}]
         :return:
         """
-        # 分红时候余额变化
-        # 除权时股票数量变化
         if dividend_dict:
-            for spdi in dividend_dict:
-                if spdi["code"] in self.position.keys():
-                    dividend_money = self.position[spdi["code"]].gpye * spdi["dividend"]
-                    self.position[spdi["code"]].dividend_money += dividend_money
-                    self.cash_available += dividend_money
-                    self.position[spdi["code"]].gpye = self.position[spdi["code"]].gpye * (1 + spdi["split"])
-                    print("分红送股：", spdi)
+            self._apply_xdxr([spdi["code"] for spdi in dividend_dict],
+                             [spdi["split"] for spdi in dividend_dict],
+                             [spdi["dividend"] for spdi in dividend_dict])
+
+    def _attach_positions(self):
+        """挂接尚未挂接价格表的持仓"""
+        if self._attached_count != len(self.position):
+            for posii in self.position.values():
+                if posii._price_board is not self.code_current_price:
+                    posii.attach_price(self.code_current_price, self)
+            self._attached_count = len(self.position)
 
     def on_price_change(self, code: str, current_price: float):
         """更新股票当前价格-单个更新"""
+        slot = self.code_current_price.get_slot(code)
+        old_price = self.code_current_price.price_at(slot)
         self.code_current_price[code] = current_price
-        if code in self.position.keys():
-            self.position[code].current_price = current_price
+        self._attach_positions()
+        self._on_prices(np.array([slot]), np.array([old_price]))
 
-    def on_price_change_all(self, codeprice: pd.DataFrame):
-        """更新股票当前价格-批量更新"""
-        # todo
-        pass
+    def on_price_change_all(self, codeprice, price=None, price_column: str = "close"):
+        """
+        更新股票当前价格-批量更新
+        :param codeprice: 截面行情DataFrame(含code列或以code为索引)、以code为索引的价格Series，或代码数组
+        :param price: codeprice为代码数组时对应的价格数组
+        :param price_column: codeprice为DataFrame时使用的价格列
+        """
+        if price is not None:
+            codes, prices = codeprice, price
+        elif isinstance(codeprice, pd.Series):
+            codes, prices = codeprice.index.values, codeprice.values
+        else:
+            codes = codeprice["code"].values if "code" in codeprice.columns else codeprice.index.values
+            prices = codeprice[price_column].values
+        slots, old_prices = self.code_current_price.update(codes, prices)
+        self._attach_positions()
+        self._on_prices(slots, old_prices)
+
+    def share_price_board(self, price_board: Paperprice):
+        """
+        改用外部价格表(多账户共享，引用而不复制)；价格表此后由外部统一更新，更新后调用 on_shared_prices。
+        已有持仓重新挂接到新价格表并重建持仓汇总，结算记录中的槽位同步换算
+        :param price_board: 共享价格表
+        """
+        for codei, pricei in self.code_current_price.items():
+            if codei not in price_board:
+                price_board[codei] = pricei
+        self.settle_history.rebase_slots(price_board)
+        self.code_current_price = price_board
+        opened = list(self._open_position.values())  # 保持建仓先后，结算明细行序不变
+        self._hold_volume, self._hold_cost = np.zeros(0), np.zeros(0)
+        self._positon_money, self._cost_money = 0.0, 0.0
+        self._open_position = dict()
+        for posii in self.position.values():
+            posii.attach_price(price_board, self)
+        self._attached_count = len(self.position)
+        for posii in opened:
+            self._sync_position(posii)
+
+    def on_shared_prices(self, slots: np.ndarray, old_prices: np.ndarray):
+        """
+        共享价格表已由外部批量更新(Paperprice.update)后调用，按持仓数量 × 价格差值更新持仓市值
+        :param slots: Paperprice.update 返回的槽位数组
+        :param old_prices: Paperprice.update 返回的更新前价格数组
+        """
+        self._attach_positions()
+        self._on_prices(slots, old_prices)
+
+    def new_order_id(self) -> int:
+        """分配账户内自增的 order_id，手动构建 Paperorder 加入 self.order 时使用"""
+        self._order_count += 1
+        return self._order_count
 
     def send_order(self,
                    code: str,
@@ -330,7 +624,7 @@ class Papertest:
                    order_price: float,
                    order_volume: int,
                    order_type: int = ORDER_DIRECTION.BUY,
-                   ) -> str:
+                   ) -> int:
         """
         :param code: 代码
         :param order_time: 委托时间
@@ -339,7 +633,7 @@ class Papertest:
         :param order_type: 买卖类型：类 ORDER_DIRECTION
         :return: order_id
         """
-        order_id = str(uuid.uuid1())
+        order_id = self.new_order_id()
 
         order_create = Paperorder(code=code,
                                   order_time=order_time,
@@ -355,48 +649,221 @@ class Papertest:
             self.frozen_money += order_frozen_money
             self.cash_available -= order_frozen_money
         self.order[order_id] = order_create
+        self._settle_changed = True
         return order_id
 
-    def make_deal(self, order_id, deal_volume: int = None, deal_price: float = None, deal_time: datetime = None):
-        """成交订单"""
-        if deal_volume is None:
-            self.order[order_id].deal_volume = self.order[order_id].order_volume
-        else:
-            self.order[order_id].deal_volume = deal_volume
-
-        if deal_price is None:
-            self.order[order_id].deal_price = self.order[order_id].order_price
+    def send_orders(self, batch, order_time: datetime = None, deal: bool = True) -> list:
+        """
+        批量委托，冻结资金一次性计算；deal为True时按委托价立即成交，先卖后买，资金一次性结算。
+        卖出同 rebalance：同一代码的卖单合计不超过可用余额kyye，超出部分截去，未持仓代码的卖单不处理
+        :param batch: DataFrame或字典，列：code, order_price, order_volume, order_type(缺省为买入)
+        :param order_time: 委托时间，默认账户当前时间
+        :param deal: 是否立即成交
+        :return: order_id列表，与batch行顺序一致；委托量<=0、类型不是买卖或无可卖数量的行为None
+        """
+        codes = np.asarray(batch["code"], dtype=object)  # 元素为python原生类型，持仓键与 send_order 一致
+        prices = np.asarray(batch["order_price"], dtype=float)
+        volumes = np.asarray(batch["order_volume"], dtype=float)
+        if "order_type" in batch:
+            order_types = np.asarray(batch["order_type"])
         else:
-            self.order[order_id].deal_price = deal_price
-
-        if deal_time is None:
-            self.order[order_id].deal_time = self.order[order_id].order_time
+            order_types = np.full(codes.shape[0], ORDER_DIRECTION.BUY)
+        order_time = self.current_time if order_time is None else order_time
+
+        valid = volumes > 0
+        sell = valid & (order_types == ORDER_DIRECTION.SELL)
+        buy = valid & (order_types == ORDER_DIRECTION.BUY)
+        for rowi in np.flatnonzero(valid & ~sell & ~buy):
+            print("""订单未处理:""", codes[rowi], order_types[rowi])
+        if sell.any():
+            # 同一代码的卖单按行序依次占用kyye
+            sell_rows = np.flatnonzero(sell)
+            sell_volume = volumes[sell_rows]
+            inverse, sell_codes = pd.factorize(codes[sell_rows])
+            kyye = np.array([self.position[codei].kyye if codei in self.position else 0 for codei in sell_codes],
+                            dtype=float)
+            used = pd.Series(sell_volume).groupby(inverse).cumsum().values - sell_volume
+            volumes = volumes.copy()
+            volumes[sell_rows] = np.clip(kyye[inverse] - used, 0, sell_volume)
+            sell &= volumes > 0
+        buy_frozen = (prices[buy] * volumes[buy] * (1 + self.commisson)).sum()
+        self.frozen_money += buy_frozen
+        self.cash_available -= buy_frozen
+
+        order_ids = [None] * codes.shape[0]
+        volume_list = [int(volume) if volume.is_integer() else volume for volume in volumes.tolist()]
+        rows = np.concatenate([np.flatnonzero(sell), np.flatnonzero(buy)])  # 先卖后买
+        orders = []
+        for rowi in rows:
+            order_id = self.new_order_id()
+            order_create = Paperorder(code=codes[rowi],
+                                      order_time=order_time,
+                                      order_price=prices[rowi],
+                                      order_volume=volume_list[rowi],
+                                      order_type=int(order_types[rowi]),
+                                      commisson=self.commisson,
+                                      tax_percent=self.tax_percent,
+                                      order_id=order_id)
+            self.order[order_id] = order_create
+            order_ids[rowi] = order_id
+            orders.append(order_create)
+        if rows.shape[0]:
+            self._settle_changed = True
+        if not deal or not orders:
+            return order_ids
+
+        for order in orders:
+            order.fill(order.order_volume, order.order_price, order_time)
+            if order.code not in self.position.keys():
+                self.position[order.code] = Paperpositon(code=order.code, t=self.t, code_type=MARKET.stock_cn)
+                self._attach_positions()
+            self.position[order.code].add_order(order, self.current_time)
+            self._sync_position(self.position[order.code])
+            order.order_status = ORDER_STATUS.DONE
+        self.order.archive_many([order.order_id for order in orders])
+
+        # 按委托价成交，买入的冻结资金等于成交金额
+        self.frozen_money -= buy_frozen
+        self.cash_available += (prices[sell] * volumes[sell] * (1 - self.commisson - self.tax_percent)).sum()
+        if not self.order.wait_count:
+            self.frozen_money = 0
+        self._traded_money += (prices[rows] * volumes[rows]).sum()
+        return order_ids
+
+    def rebalance(self, target_weights, prices=None, lot_size: int = None, order_time: datetime = None) -> list:
+        """
+        调仓到目标权重，按当前价格立即成交
+        目标数量 = 总资产 × 权重 / (价格 × (1 + 手续费率))，向下取整到lot_size；
+        未在目标中的持仓目标为0。卖出不超过可用余额kyye，清仓时卖出全部kyye(含零股)；
+        先卖后买，买入资金不足时按比例缩减各买单
+        :param target_weights: {代码: 权重} 或以代码为索引的Series，权重为占总资产比例
+        :param prices: {代码: 价格} 或Series，默认账户当前价格
+        :param lot_size: 每手股数，默认账户的 lot_size
+        :param order_time: 委托时间，默认账户当前时间
+        :return: send_orders 返回的order_id列表(None已去除)
+        """
+        lot_size = self.order.lot_size if lot_size is None else lot_size
+        target_weights = pd.Series(target_weights, dtype=float)
+        held = [codei for codei in self._open_position if codei not in target_weights.index]
+        codes = np.concatenate([target_weights.index.values.astype(object), np.asarray(held, dtype=object)])
+        weights = np.concatenate([target_weights.values, np.zeros(len(held))])
+        if prices is None:
+            price = self.code_current_price.prices[self.code_current_price.get_slots(codes)]
         else:
-            self.order[order_id].deal_time = deal_time
-
-        if self.order[order_id].order_type == ORDER_DIRECTION.BUY:
-            if self.order[order_id].code not in self.position.keys():
-                self.position[self.order[order_id].code] = Paperpositon(code=self.order[order_id].code,
-                                                                        t=self.t,
-                                                                        code_type=MARKET.stock_cn)
-
-            self.position[self.order[order_id].code].add_order(self.order[order_id], self.current_time)
-            self.frozen_money -= self.order[order_id].frozen_money
-            self.cash_available += self.order[order_id].frozen_money - self.order[order_id].deal_money
+            price = pd.Series(prices, dtype=float).reindex(codes).values
+        gpye = np.array([self.position[codei].gpye if codei in self.position else 0 for codei in codes], dtype=float)
+        kyye = np.array([self.position[codei].kyye if codei in self.position else 0 for codei in codes], dtype=float)
+
+        priced = ~np.isnan(price) & (price > 0)
+        target = np.zeros(codes.shape[0])
+        target[priced] = np.floor(self.all_money * weights[priced] / (price[priced] * (1 + self.commisson))
+                                  / lot_size) * lot_size
+        delta = np.where(priced, target - gpye, 0)
+
+        sell_volume = np.where(target == 0, kyye, np.floor(-delta / lot_size) * lot_size)
+        sell_volume = np.where(delta < 0, np.minimum(sell_volume, kyye), 0)
+        sell_volume[~priced] = 0
+        cash = self.cash_available + (price[sell_volume > 0] * sell_volume[sell_volume > 0]).sum() \
+            * (1 - self.commisson - self.tax_percent)
+
+        buy_volume = np.where(delta > 0, np.floor(delta / lot_size) * lot_size, 0)
+        buy_money = (np.nan_to_num(price) * buy_volume).sum() * (1 + self.commisson)
+        if buy_money > cash:
+            buy_volume = np.floor(buy_volume * max(cash, 0) / buy_money / lot_size) * lot_size
+
+        order_volume = sell_volume + buy_volume
+        traded = order_volume > 0
+        order_ids = self.send_orders({"code": codes[traded],
+                                      "order_price": price[traded],
+                                      "order_volume": order_volume[traded],
+                                      "order_type": np.where(sell_volume[traded] > 0,
+                                                             ORDER_DIRECTION.SELL, ORDER_DIRECTION.BUY)},
+                                     order_time=order_time)
+        return [order_id for order_id in order_ids if order_id is not None]
 
-        elif self.order[order_id].order_type == ORDER_DIRECTION.SELL:
-            self.position[self.order[order_id].code].add_order(self.order[order_id], self.current_time)
-            self.cash_available += self.order[order_id].sell_money
-
-        else:
+    def make_deal(self, order_id, deal_volume: int = None, deal_price: float = None, deal_time: datetime = None):
+        """
+        成交订单，成交量小于剩余委托量时为部分成交，订单保持 WAIT
+        :param deal_volume: 成交量，默认剩余委托量
+        :param deal_price: 成交价，默认委托价
+        :param deal_time: 成交时间，默认委托时间
+        """
+        order = self.order[order_id]
+        if order.order_status != ORDER_STATUS.WAIT:
+            print("""订单已完成:""", order_id)
+            return None
+        if order.order_type not in (ORDER_DIRECTION.BUY, ORDER_DIRECTION.SELL):
             print("""订单未处理:""", order_id)
             return None
+        order.fill(order.remaining_volume if deal_volume is None else deal_volume,
+                   order.order_price if deal_price is None else deal_price,
+                   order.order_time if deal_time is None else deal_time)
+
+        if order.order_type == ORDER_DIRECTION.BUY:
+            if order.code not in self.position.keys():
+                self.position[order.code] = Paperpositon(code=order.code,
+                                                         t=self.t,
+                                                         code_type=MARKET.stock_cn)
+                self._attach_positions()
+
+            self.position[order.code].add_order(order, self.current_time)
+            self._sync_position(self.position[order.code])
+            self.frozen_money -= order.deal_frozen_money
+            self.cash_available += order.deal_frozen_money - order.deal_money
 
-        # 订单状态完成
-        self.order[order_id].order_status = ORDER_STATUS.DONE
+        else:
+            self.position[order.code].add_order(order, self.current_time)
+            self._sync_position(self.position[order.code])
+            self.cash_available += order.sell_money
+
+        if order.filled_volume >= order.order_volume:
+            # 订单状态完成
+            order.order_status = ORDER_STATUS.DONE
+            self._finish_order(order_id)
+        self._traded_money += order.deal_price * order.deal_volume
+        self._settle_changed = True
 
     def cancel_deal(self, order_id):
-        self.order[order_id].order_status = ORDER_STATUS.CANCEL
+        """撤销订单，买单释放未成交部分的冻结资金"""
+        order = self.order[order_id]
+        if order.order_status != ORDER_STATUS.WAIT:
+            return None
+        if order.order_type == ORDER_DIRECTION.BUY:
+            unfilled_money = order.order_price * order.remaining_volume * (1 + order.commisson)
+            self.frozen_money -= unfilled_money
+            self.cash_available += unfilled_money
+        order.order_status = ORDER_STATUS.CANCEL
+        self._finish_order(order_id)
+        self._settle_changed = True
+
+    def _finish_order(self, order_id):
+        """完成的订单归档；没有未成交委托时冻结资金归零，避免部分成交差值累加的浮点误差"""
+        self.order.archive(order_id)
+        if not self.order.wait_count:
+            self.frozen_money = 0
+
+    def match_orders(self,
+                     codes: np.ndarray,
+                     open_price: np.ndarray,
+                     high: np.ndarray,
+                     low: np.ndarray,
+                     volume: np.ndarray = None) -> list:
+        """
+        用当前bar撮合未成交的限价委托，以账户当前时间成交，规则见 Paperorderbook.match
+        :param codes: bar代码数组
+        :param open_price: 开盘价数组
+        :param high: 最高价数组
+        :param low: 最低价数组
+        :param volume: 成交量数组，单位为 volume_multiplier 股，None为不限制成交量
+        :return: [(order_id, 成交量, 成交价)]
+        """
+        if not self.order.wait_count:
+            return []
+        available = {codei: self.position[codei].kyye for codei in self.order.wait_codes if codei in self.position}
+        fills = self.order.match(codes, open_price, high, low, volume, available)
+        for order_id, deal_volume, deal_price in fills:
+            self.make_deal(order_id, deal_volume, deal_price, self.current_time)
+        return fills
 
 
 if __name__ == '__main__':
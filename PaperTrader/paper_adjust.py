@@ -0,0 +1,166 @@
+# -*- coding:utf-8 -*-
+"""
+复权：由除权除息表与未复权bar一次性计算前/后复权因子，按需生成并缓存复权后的OHLCV
+filename : paper_adjust.py
+createtime : 2026/10/18 22:05
+author : Demon Finch
+"""
+import numpy as np
+import pandas as pd
+from .paper_xdxr import Paperxdxr, _epoch_ordinal
+
+
+class ADJUST_METHOD:
+    """
+    复权方式，每次除权除息事件(每股送转 split、每股分红 dividend)对事件日之前的价格作用一次：
+    RATIO 等比复权：价格乘以 (前收盘 - dividend) / ((1 + split) × 前收盘)
+    DIFFERENCE 等差复权：价格先减 dividend 再除以 (1 + split)，与 复权数据回测样本.csv 的口径一致
+    """
+    RATIO = "ratio"
+    DIFFERENCE = "difference"
+
+
+class Paperadjust:
+    """
+    复权因子
+    每根bar的前复权价 = 未复权价 × forward_scale + forward_offset，后复权价 = 未复权价 × backward_scale + backward_offset；
+    等比复权时 offset 为0。因子在构造时按(代码, 日期)排序后一次性向量化计算：
+    每个事件是一个仿射变换，前复权为该bar之后全部事件按时间顺序的复合(组内后缀累积)，后复权为之前全部事件逆变换的复合(组内前缀累积)。
+    成交量只按送转调整(前复权乘以之后的 1 + split 累积)。
+    复权后的列在首次使用时计算并缓存，未复权bar只保留一份
+    """
+
+    def __init__(self,
+                 bars: pd.DataFrame,
+                 dividend,
+                 method: str = ADJUST_METHOD.RATIO,
+                 date_column: str = "date",
+                 code_column: str = "code",
+                 price_column: str = "close",
+                 price_columns: tuple = ("open", "high", "low", "close"),
+                 volume_column: str = "volume",
+                 date_format: str = "%Y-%m-%d"):
+        """
+        :param bars: 未复权bar，任意顺序
+        :param dividend: 除权除息日历 Paperxdxr 或除权除息表(列：code, split, datetime, dividend)
+        :param method: 复权方式：类 ADJUST_METHOD
+        :param date_column: 日期列
+        :param code_column: 代码列
+        :param price_column: 等比复权取前收盘价的列
+        :param price_columns: 需要复权的价格列
+        :param volume_column: 按送转调整的成交量列，None为不调整
+        :param date_format: 日期列为字符串时的格式
+        """
+        if method not in (ADJUST_METHOD.RATIO, ADJUST_METHOD.DIFFERENCE):
+            raise ValueError(f"不支持的复权方式: {method}")
+        self.bars = bars
+        self.method = method
+        self.price_columns = [name for name in price_columns if name in bars.columns]
+        self.volume_column = volume_column if volume_column in bars.columns else None
+        xdxr = dividend if isinstance(dividend, Paperxdxr) else Paperxdxr(dividend, date_format)
+        self._cache = dict()
+
+        dates = bars[date_column].values
+        if not pd.api.types.is_datetime64_any_dtype(bars[date_column]):
+            dates = pd.to_datetime(bars[date_column], format=date_format).values
+        bar_day = dates.astype("datetime64[D]").astype(np.int64) + _epoch_ordinal
+        bar_code, codes = pd.factorize(bars[code_column].values)
+        event_code = pd.Index(codes).get_indexer(xdxr.codes)
+        known = event_code >= 0
+        event_code, event_day = event_code[known], xdxr.days[known]
+        split, cash = xdxr.split[known], xdxr.dividend[known]
+
+        # (代码, 日期) 合成有序键，事件映射到bar行
+        span = np.int64(max(bar_day.max(initial=0), event_day.max(initial=0)) + 1)
+        bar_key = bar_code.astype(np.int64) * span + bar_day
+        bar_order = np.argsort(bar_key, kind="stable")
+        sorted_key = bar_key[bar_order]
+        event_key = event_code.astype(np.int64) * span + event_day
+        event_order = np.argsort(event_key, kind="stable")
+        event_key, event_code = event_key[event_order], event_code[event_order]
+        split, cash = split[event_order], cash[event_order]
+
+        # 每个事件的仿射变换 p -> a × p + b
+        if method == ADJUST_METHOD.RATIO:
+            before = np.searchsorted(sorted_key, event_key, side="left") - 1  # 事件日前最后一根bar
+            has_close = (before >= 0) & (bar_code[bar_order[np.maximum(before, 0)]] == event_code)
+            prev_close = np.where(has_close, bars[price_column].values[bar_order[np.maximum(before, 0)]], np.nan)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                step = np.where(has_close, (prev_close - cash) / prev_close, 1.0) / (1 + split)
+            a, b = step, np.zeros(step.shape[0])
+        else:
+            a, b = 1 / (1 + split), -cash / (1 + split)
+
+        # 前复权：组内后缀复合 F_k = F_{k+1} ∘ f_k，A_k = prod_{j>=k} a_j，B_k = sum_{j>=k} b_j × A_{j+1}
+        group = pd.Series(event_code[::-1])
+        forward_a = pd.Series(a[::-1]).groupby(group.values).cumprod().values[::-1]
+        forward_b = pd.Series((b * forward_a / a)[::-1]).groupby(group.values).cumsum().values[::-1]
+        forward_v = pd.Series((1 + split)[::-1]).groupby(group.values).cumprod().values[::-1]
+        # 后复权：逆变换 g_k(p) = (p - b_k) / a_k，组内前缀复合 G_k = G_{k-1} ∘ g_k
+        c, d = 1 / a, -b / a
+        backward_c = pd.Series(c).groupby(event_code).cumprod().values
+        backward_d = pd.Series(d * backward_c / c).groupby(event_code).cumsum().values
+        backward_v = pd.Series(1 / (1 + split)).groupby(event_code).cumprod().values
+
+        # bar 之后的第一个事件 k(事件日 > bar日)与之前的最后一个事件 k - 1
+        k = np.searchsorted(event_key, bar_key, side="right")
+        after = k < event_key.shape[0]
+        after[after] = event_code[k[after]] == bar_code[after]
+        prior = k > 0
+        prior[prior] = event_code[k[prior] - 1] == bar_code[prior]
+        kf, kb = np.where(after, k, 0), np.where(prior, k - 1, 0)
+        if event_key.shape[0] == 0:
+            after[:], prior[:] = False, False
+            forward_a = forward_b = forward_v = backward_c = backward_d = backward_v = np.zeros(1)
+        self.forward_scale = np.where(after, forward_a[kf], 1.0)
+        self.forward_offset = np.where(after, forward_b[kf], 0.0)
+        self.forward_volume = np.where(after, forward_v[kf], 1.0)
+        self.backward_scale = np.where(prior, backward_c[kb], 1.0)
+        self.backward_offset = np.where(prior, backward_d[kb], 0.0)
+        self.backward_volume = np.where(prior, backward_v[kb], 1.0)
+
+    def factors(self) -> pd.DataFrame:
+        """各bar的复权因子，与 bars 行对齐"""
+        return pd.DataFrame({"forward_scale": self.forward_scale,
+                             "forward_offset": self.forward_offset,
+                             "forward_volume": self.forward_volume,
+                             "backward_scale": self.backward_scale,
+                             "backward_offset": self.backward_offset,
+                             "backward_volume": self.backward_volume},
+                            index=self.bars.index)
+
+    def column(self, name: str, how: str = "forward") -> np.ndarray:
+        """
+        复权后的一列，首次使用时计算并缓存
+        :param name: 价格列或成交量列
+        :param how: forward 前复权，backward 后复权
+        """
+        key = (name, how)
+        if key not in self._cache:
+            if how not in ("forward", "backward"):
+                raise ValueError(f"不支持的复权方向: {how}")
+            values = self.bars[name].values.astype(float)
+            if name == self.volume_column:
+                adjusted = values * getattr(self, f"{how}_volume")
+            elif name in self.price_columns:
+                adjusted = values * getattr(self, f"{how}_scale") + getattr(self, f"{how}_offset")
+            else:
+                raise KeyError(name)
+            adjusted.flags.writeable = False
+            self._cache[key] = adjusted
+        return self._cache[key]
+
+    def frame(self, how: str = "forward") -> pd.DataFrame:
+        """
+        复权后的bar，价格列与成交量列替换为复权值，其余列不变；结果缓存
+        :param how: forward 前复权，backward 后复权
+        """
+        key = ("frame", how)
+        if key not in self._cache:
+            names = self.price_columns + ([self.volume_column] if self.volume_column else [])
+            self._cache[key] = self.bars.assign(**{name: self.column(name, how) for name in names})
+        return self._cache[key]
+
+    def clear(self):
+        """清空缓存的复权列"""
+        self._cache.clear()
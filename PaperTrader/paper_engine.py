@@ -0,0 +1,148 @@
+# -*- coding:utf-8 -*-
+"""
+按日期分组的流式回测驱动
+filename : paper_engine.py
+createtime : 2026/10/18 11:58
+author : Demon Finch
+"""
+import numpy as np
+import pandas as pd
+from .paper_account import Papertest
+from .paper_store import Paperstore
+from .paper_xdxr import Paperxdxr
+
+
+class Paperengine:
+    """
+    流式回测驱动：按日期把bar分组，每个日期推进一次账户
+    每个日期依次：on_current_time(含除权除息) -> on_price_change_all -> match_orders -> strategy -> settle
+    match_orders 用当日bar撮合此前未成交的限价委托；缺少最高/最低价列时以开盘价与盯市价代替
+    strategy 回调签名 strategy(account, date, bar)，bar为 {列名: 当日截面numpy数组} 字典
+    """
+
+    def __init__(self,
+                 account: Papertest,
+                 strategy=None,
+                 dividend=None,
+                 date_column: str = "date",
+                 code_column: str = "code",
+                 price_column: str = "close",
+                 open_column: str = "open",
+                 high_column: str = "high",
+                 low_column: str = "low",
+                 volume_column: str = "volume",
+                 date_format: str = "%Y-%m-%d",
+                 chunksize: int = 100000,
+                 stop=None):
+        """
+        :param account: 回测账户
+        :param strategy: 策略回调 strategy(account, date, bar)
+        :param dividend: 除权除息日历 Paperxdxr 或除权除息表(列：code, split, datetime, dividend)，设置为账户的 xdxr
+        :param date_column: 日期列
+        :param code_column: 代码列
+        :param price_column: 用于盯市的价格列
+        :param open_column: 撮合用开盘价列，缺失时用 price_column
+        :param high_column: 撮合用最高价列
+        :param low_column: 撮合用最低价列
+        :param volume_column: 撮合用成交量列，缺失时不限制成交量；默认单位为股，按手计时设置 Papertest(volume_multiplier=100)
+        :param date_format: 日期列为字符串时的格式
+        :param chunksize: 传入csv路径时分块读取的行数
+        :param stop: 提前终止条件 stop(account) -> bool，每个日期结算后调用，可读取 account.metrics
+        """
+        self.account = account
+        self.strategy = strategy
+        self.date_column = date_column
+        self.code_column = code_column
+        self.price_column = price_column
+        self.open_column = open_column
+        self.high_column = high_column
+        self.low_column = low_column
+        self.volume_column = volume_column
+        self.date_format = date_format
+        self.chunksize = chunksize
+        self.stop = stop
+        if dividend is not None:
+            self.account.xdxr = dividend if isinstance(dividend, Paperxdxr) else Paperxdxr(dividend, date_format)
+
+    def _to_datetime(self, dates) -> np.ndarray:
+        if not np.issubdtype(np.asarray(dates).dtype, np.datetime64):
+            dates = pd.to_datetime(dates, format=self.date_format)
+        return np.asarray(dates, dtype="datetime64[ns]")
+
+    def _chunks(self, data):
+        """统一为 {列名: numpy数组} 的分块"""
+        if isinstance(data, str):
+            data = pd.read_csv(data, chunksize=self.chunksize)
+        elif isinstance(data, Paperstore):
+            data = data.chunks()
+        elif isinstance(data, (pd.DataFrame, dict)):
+            data = [data]
+        for chunk in data:
+            if isinstance(chunk, pd.DataFrame):
+                chunk = {name: chunk[name].values for name in chunk.columns}
+            yield chunk
+
+    def iter_bars(self, data):
+        """
+        按日期流式产出当日截面；日期倒退(如多标的数据按代码排序)时抛出 ValueError
+        :param data: 按日期排序的DataFrame、{列名: numpy数组}字典、csv路径、Paperstore，
+                     或它们的分块迭代器(如 pd.read_csv(chunksize=...)、Paperstore.chunks())
+        :return: 生成器 (date, bar)
+        """
+        carry = None  # 上一分块末尾尚未结束的日期
+        for chunk in self._chunks(data):
+            columns = dict(chunk)
+            columns[self.date_column] = self._to_datetime(columns[self.date_column])
+            if carry is not None:
+                columns = {name: np.concatenate([carry[name], column]) for name, column in columns.items()}
+            dates = columns[self.date_column]
+            if dates.shape[0] == 0:
+                continue
+            # carry 为上一分块的最后一个日期，拼接后一并检查跨分块的顺序
+            backward = np.flatnonzero(dates[1:] < dates[:-1])
+            if backward.size:
+                raise ValueError(f"行情日期未按升序排列: {dates[backward[0]]} 之后为 {dates[backward[0] + 1]}，"
+                                 f"请先按日期排序(如 sort_values(date_column, kind=\"stable\"))")
+            starts = np.flatnonzero(dates[1:] != dates[:-1]) + 1
+            bounds = np.concatenate([[0], starts, [dates.shape[0]]])
+            for start, end in zip(bounds[:-2], bounds[1:-1]):
+                yield dates[start], {name: column[start:end] for name, column in columns.items()}
+            carry = {name: column[bounds[-2]:] for name, column in columns.items()}
+        if carry is not None:
+            yield carry[self.date_column][0], carry
+
+    def on_bar(self, date: np.datetime64, bar: dict):
+        """推进一个日期"""
+        current_time = pd.Timestamp(date)
+        self.account.on_current_time(current_time)
+        self.account.on_price_change_all(bar[self.code_column], bar[self.price_column])
+        if self.account.order.wait_count:
+            self.match_orders(bar)
+        if self.strategy is not None:
+            self.strategy(self.account, current_time, bar)
+        self.account.settle()
+
+    def match_orders(self, bar: dict) -> list:
+        """用当日bar撮合账户未成交的限价委托"""
+        price = bar[self.price_column]
+        open_price = bar.get(self.open_column, price)
+        high = bar[self.high_column] if self.high_column in bar else np.fmax(open_price, price)
+        low = bar[self.low_column] if self.low_column in bar else np.fmin(open_price, price)
+        return self.account.match_orders(bar[self.code_column], open_price, high, low, bar.get(self.volume_column))
+
+    def run(self, data, after=None) -> Papertest:
+        """
+        运行回测
+        :param data: 见 iter_bars
+        :param after: 只运行日期晚于after的bar，从快照恢复时传入 account.current_time
+        :return: 回测账户
+        """
+        if after is not None:
+            after = pd.Timestamp(after).to_datetime64()
+        for date, bar in self.iter_bars(data):
+            if after is not None and date <= after:
+                continue
+            self.on_bar(date, bar)
+            if self.stop is not None and self.stop(self.account):
+                break
+        return self.account
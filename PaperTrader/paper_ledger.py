@@ -0,0 +1,103 @@
+# -*- coding:utf-8 -*-
+"""
+持仓流水账本：数组列存储 + 按解冻日期分桶的冻结队列
+filename : paper_ledger.py
+createtime : 2026/10/18 10:02
+author : Demon Finch
+"""
+import heapq
+import numpy as np
+import pandas as pd
+
+order_history_columns = ["datetime", "order_id", "order_type", "price", "volume",
+                         "is_frozen", "commission", "tax", "money"]
+
+_ledger_dtypes = {"datetime": "datetime64[ns]",
+                  "order_id": object,
+                  "order_type": np.int64,
+                  "price": np.float64,
+                  "volume": np.float64,
+                  "is_frozen": np.int8,
+                  "commission": np.float64,
+                  "tax": np.float64,
+                  "money": np.float64}
+
+
+class Paperledger:
+    """
+    单个持仓的订单流水
+    每列为可原地追加的numpy数组，容量不足时翻倍扩容；
+    冻结的买入批次按解冻日(date ordinal)分桶，只有桶到期时才改变冻结数量
+    """
+
+    def __init__(self, capacity: int = 8):
+        self._size = 0
+        self._columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in _ledger_dtypes.items()}
+        self._release_days = []  # 解冻日小顶堆
+        self._release_rows = dict()  # 解冻日 -> 行号列表
+
+    def __len__(self):
+        return self._size
+
+    def __getstate__(self):
+        """快照时只保存已写入的行"""
+        state = self.__dict__.copy()
+        state["_columns"] = {name: column[:max(self._size, 1)] for name, column in self._columns.items()}
+        return state
+
+    def _grow(self):
+        for name, column in self._columns.items():
+            new_column = np.empty(column.shape[0] * 2, dtype=column.dtype)
+            new_column[:self._size] = column[:self._size]
+            self._columns[name] = new_column
+
+    def append(self, order_position: dict, release_day: int = None) -> int:
+        """
+        追加一条流水
+        :param order_position: Paperorder.order_position 格式的字典
+        :param release_day: 冻结批次的解冻日(date ordinal)，None表示不冻结
+        :return: 行号
+        """
+        return self.append_row(tuple(order_position[name] for name in self._columns), release_day)
+
+    def append_row(self, values: tuple, release_day: int = None) -> int:
+        """
+        按列顺序追加一条流水，免去构造字典
+        :param values: (datetime, order_id, order_type, price, volume, is_frozen, commission, tax, money)
+        :param release_day: 冻结批次的解冻日(date ordinal)，None表示不冻结
+        :return: 行号
+        """
+        if self._size == self._columns["volume"].shape[0]:
+            self._grow()
+        row = self._size
+        for column, value in zip(self._columns.values(), values):
+            column[row] = value
+        if release_day is not None and values[5]:
+            if release_day not in self._release_rows:
+                self._release_rows[release_day] = []
+                heapq.heappush(self._release_days, release_day)
+            self._release_rows[release_day].append(row)
+        self._size += 1
+        return row
+
+    def release(self, today: int) -> float:
+        """
+        解冻所有解冻日<=today的批次
+        :param today: 当前日期(date ordinal)
+        :return: 本次解冻的股票数量
+        """
+        released = 0
+        while self._release_days and self._release_days[0] <= today:
+            rows = self._release_rows.pop(heapq.heappop(self._release_days))
+            self._columns["is_frozen"][rows] = 0
+            released += self._columns["volume"][rows].sum()
+        return released
+
+    def column(self, name: str) -> np.ndarray:
+        """获取某列已写入部分的视图"""
+        return self._columns[name][:self._size]
+
+    def to_frame(self) -> pd.DataFrame:
+        """转化为与原order_history一致的DataFrame"""
+        return pd.DataFrame({name: self._columns[name][:self._size].copy() for name in order_history_columns},
+                            columns=order_history_columns)
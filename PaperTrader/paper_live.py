@@ -0,0 +1,321 @@
+# -*- coding:utf-8 -*-
+"""
+实时模拟盘：asyncio 消费行情流，合并批量更新价格、撮合限价委托并按交易日切换 t+n 状态
+filename : paper_live.py
+createtime : 2026/10/18 21:15
+author : Demon Finch
+"""
+import asyncio
+import numpy as np
+import pandas as pd
+from .paper_account import Papertest
+
+_END = object()  # 行情流结束标记
+
+
+class Paperlive:
+    """
+    实时模拟盘驱动
+    行情源为异步迭代器，每次产出一个行情包：
+        单笔 tick 元组 (code, price[, volume[, time]])、tick 元组列表，
+        或列式字典 {"code": 数组, "price": 数组[, "volume": 数组][, "time": 数组]}
+    接收协程只把行情包放入有界队列，队列满时暂停读取行情源(背压)；处理协程一次取出队列中积压的行情包，
+    同一代码在一批内合并为一行(open/high/low/close/volume)，再依次：
+        交易日切换(上一交易日结算 + on_current_time 解冻t+n与除权除息) -> on_price_change_all -> match_orders -> strategy
+    每个交易日结算(settle)一次：收盘时间到达时由定时器触发，或在下一交易日第一批行情前、行情流结束时补做。
+    tick 不带时间时以接收时的 clock() 为准；回放历史行情(带时间)时应设置 session_timer=False，交易日切换只由 tick 时间驱动。
+    strategy 回调签名与 Paperengine 一致：strategy(account, time, bar)，bar 为 {code, open, high, low, close, volume} 数组字典
+    """
+
+    def __init__(self,
+                 account: Papertest,
+                 strategy=None,
+                 queue_size: int = 1000,
+                 batch_size: int = 100000,
+                 session_close: str = "15:00:00",
+                 session_timer: bool = True,
+                 timer_interval: float = 1.0,
+                 clock=pd.Timestamp.now,
+                 executor=None):
+        """
+        :param account: 模拟账户
+        :param strategy: 策略回调 strategy(account, time, bar)
+        :param queue_size: 行情包队列长度，满时接收协程等待
+        :param batch_size: 一批最多合并的tick数(至少取一个行情包)
+        :param session_close: 每日收盘时间
+        :param session_timer: 是否按 clock() 在收盘时间结算
+        :param timer_interval: 收盘定时器检查间隔(秒)
+        :param clock: 当前时间函数，返回 pd.Timestamp
+        :param executor: concurrent.futures 执行器(如单线程 ThreadPoolExecutor)，设置后账户处理在执行器中运行，
+                         事件循环只负责接收行情；None 时在事件循环中处理
+        """
+        self.account = account
+        self.strategy = strategy
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.session_close = pd.Timedelta(session_close)
+        self.session_timer = session_timer
+        self.timer_interval = timer_interval
+        self.clock = clock
+        self.executor = executor
+        self.stats = {"ticks": 0, "packets": 0, "batches": 0, "updates": 0, "sessions": 0, "max_queue": 0}
+        self._day = None  # 当前交易日
+        self._closed = True  # 当前交易日是否已结算
+        self._lock = None
+        self._ingest_task = None
+
+    async def run(self, source) -> Papertest:
+        """
+        运行到行情源结束或调用 stop()
+        :param source: 异步迭代器，见 queue_source / socket_source / replay_source
+        :return: 模拟账户
+        """
+        self._lock = asyncio.Lock()
+        queue = asyncio.Queue(self.queue_size)
+        self._ingest_task = asyncio.ensure_future(self._ingest(source, queue))
+        timer = asyncio.ensure_future(self._session_timer()) if self.session_timer else None
+        try:
+            done = False
+            while not done:
+                packets, rows = [], 0
+                item = await queue.get()
+                while True:
+                    if item is _END:
+                        done = True
+                        break
+                    packets.append(item)
+                    rows += _packet_rows(item[0])
+                    if rows >= self.batch_size or queue.empty():
+                        break
+                    item = queue.get_nowait()
+                if packets:
+                    async with self._lock:
+                        await self._call(self._process, packets)
+                # 让出事件循环，接收协程在两批之间继续读取行情
+                await asyncio.sleep(0)
+            try:
+                await self._ingest_task
+            except asyncio.CancelledError:
+                pass
+        finally:
+            if timer is not None:
+                timer.cancel()
+            if not self._ingest_task.done():
+                self._ingest_task.cancel()
+        async with self._lock:
+            await self._call(self._close_session)
+        return self.account
+
+    def stop(self):
+        """停止接收行情，已入队的行情处理完后 run 返回"""
+        if self._ingest_task is not None:
+            self._ingest_task.cancel()
+
+    async def _ingest(self, source, queue: asyncio.Queue):
+        stamp = self.clock if self.clock is not None else pd.Timestamp.now
+        try:
+            async for packet in source:
+                await queue.put((packet, stamp()))
+                self.stats["packets"] += 1
+                self.stats["max_queue"] = max(self.stats["max_queue"], queue.qsize())
+        finally:
+            if hasattr(source, "aclose"):
+                await source.aclose()
+            await queue.put(_END)
+
+    async def _session_timer(self):
+        while True:
+            await asyncio.sleep(self.timer_interval)
+            if not self._closed and self.clock() >= self._day + self.session_close:
+                async with self._lock:
+                    await self._call(self._close_session)
+
+    async def _call(self, func, *args):
+        if self.executor is None:
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    def _close_session(self):
+        """结算当前交易日"""
+        if not self._closed:
+            self.account.settle()
+            self._closed = True
+            self.stats["sessions"] += 1
+
+    def _process(self, packets: list):
+        """合并一批行情包并推进账户，跨交易日的批次按日切分"""
+        ticks = _concat([_to_columns(packet, received) for packet, received in packets])
+        self.stats["ticks"] += ticks["code"].shape[0]
+        self.stats["batches"] += 1
+        days = ticks["time"].astype("datetime64[D]")
+        bounds = np.concatenate([[0], np.flatnonzero(days[1:] != days[:-1]) + 1, [days.shape[0]]])
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            segment = {name: column[start:end] for name, column in ticks.items()}
+            self._apply(pd.Timestamp(segment["time"].max()), _coalesce(segment))
+
+    def _apply(self, current_time: pd.Timestamp, bar: dict):
+        account = self.account
+        day = current_time.normalize()
+        if self._day is None or day > self._day:
+            self._close_session()
+            account.on_current_time(current_time)
+            self._day, self._closed = day, False
+        elif current_time > account.current_time:
+            # 同一交易日内只推进时间，冻结数与除权除息按日处理
+            account.current_time = current_time
+        self.stats["updates"] += bar["code"].shape[0]
+        account.on_price_change_all(bar["code"], bar["close"])
+        if account.order.wait_count:
+            account.match_orders(bar["code"], bar["open"], bar["high"], bar["low"], bar["volume"])
+        if self.strategy is not None:
+            self.strategy(account, current_time, bar)
+
+
+def _packet_rows(packet) -> int:
+    if isinstance(packet, dict):
+        return len(packet["code"])
+    return 1 if isinstance(packet, tuple) else len(packet)
+
+
+def _to_columns(packet, received: pd.Timestamp) -> dict:
+    """行情包统一为列式字典，缺少时间的tick以接收时间为准，缺少成交量时为nan"""
+    if isinstance(packet, dict):
+        codes = np.asarray(packet["code"], dtype=object)
+        prices = np.asarray(packet["price"], dtype=np.float64)
+        volumes = np.asarray(packet["volume"], dtype=np.float64) if "volume" in packet else None
+        times = np.asarray(packet["time"], dtype="datetime64[ns]") if "time" in packet else None
+    else:
+        ticks = [packet] if isinstance(packet, tuple) else packet
+        codes = np.array([tick[0] for tick in ticks], dtype=object)
+        prices = np.array([tick[1] for tick in ticks], dtype=np.float64)
+        volumes = np.array([tick[2] if len(tick) > 2 and tick[2] is not None else np.nan for tick in ticks])
+        times = np.array([tick[3] if len(tick) > 3 else None for tick in ticks], dtype="datetime64[ns]")
+    if volumes is None:
+        volumes = np.full(codes.shape[0], np.nan)
+    if times is None:
+        times = np.full(codes.shape[0], received.to_datetime64(), dtype="datetime64[ns]")
+    elif np.isnat(times).any():
+        times = np.where(np.isnat(times), received.to_datetime64(), times)
+    return {"code": codes, "price": prices, "volume": volumes, "time": times}
+
+
+def _concat(columns: list) -> dict:
+    if len(columns) == 1:
+        return columns[0]
+    return {name: np.concatenate([column[name] for column in columns]) for name in columns[0]}
+
+
+def _coalesce(ticks: dict) -> dict:
+    """同一代码的tick合并为一行：首笔价为open，末笔价为close；成交量求和，全部缺失时为None(不限制撮合量)"""
+    codes, prices, volumes = ticks["code"], ticks["price"], ticks["volume"]
+    volume_known = not np.isnan(volumes).all()
+    inverse, keys = pd.factorize(codes)
+    if keys.shape[0] == codes.shape[0]:
+        return {"code": codes, "open": prices, "high": prices, "low": prices, "close": prices,
+                "volume": np.nan_to_num(volumes) if volume_known else None}
+    n, position = keys.shape[0], np.arange(codes.shape[0])
+    first = np.full(n, codes.shape[0])
+    last = np.zeros(n, dtype=np.int64)
+    high = np.full(n, -np.inf)
+    low = np.full(n, np.inf)
+    np.minimum.at(first, inverse, position)
+    np.maximum.at(last, inverse, position)
+    np.maximum.at(high, inverse, prices)
+    np.minimum.at(low, inverse, prices)
+    return {"code": np.asarray(keys, dtype=object),
+            "open": prices[first],
+            "high": high,
+            "low": low,
+            "close": prices[last],
+            "volume": np.bincount(inverse, np.nan_to_num(volumes), n) if volume_known else None}
+
+
+async def queue_source(queue: asyncio.Queue):
+    """
+    进程内行情源：从 asyncio.Queue 读取行情包，读到 None 时结束
+    :param queue: 行情包队列
+    """
+    while True:
+        packet = await queue.get()
+        if packet is None:
+            return
+        yield packet
+
+
+def parse_line(line: bytes) -> tuple:
+    """解析一行 code,price[,volume[,time]]"""
+    fields = line.decode().strip().split(",")
+    volume = float(fields[2]) if len(fields) > 2 and fields[2] else None
+    time = pd.Timestamp(fields[3]) if len(fields) > 3 and fields[3] else None
+    return fields[0], float(fields[1]), volume, time
+
+
+async def socket_source(host: str, port: int, read_size: int = 65536):
+    """
+    本地 socket 行情源：每行一笔 tick，格式 code,price[,volume[,time]]，每次读取到的完整行作为一个行情包
+    :param host: 地址
+    :param port: 端口
+    :param read_size: 每次读取的字节数
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        rest = b""
+        while True:
+            data = await reader.read(read_size)
+            if not data:
+                break
+            lines = (rest + data).split(b"\n")
+            rest = lines.pop()
+            packet = [parse_line(line) for line in lines if line.strip()]
+            if packet:
+                yield packet
+        if rest.strip():
+            yield [parse_line(rest)]
+    finally:
+        writer.close()
+
+
+async def replay_source(data,
+                        code_column: str = "code",
+                        price_column: str = "close",
+                        volume_column: str = None,
+                        time_column: str = None,
+                        packet_size: int = 1000,
+                        speed: float = None,
+                        chunksize: int = 100000):
+    """
+    文件回放行情源，产出列式行情包
+    :param data: csv路径或DataFrame，按时间排序
+    :param code_column: 代码列
+    :param price_column: 价格列
+    :param volume_column: 成交量列，None为不带成交量
+    :param time_column: 时间列，None为以接收时间为准
+    :param packet_size: 每个行情包的行数
+    :param speed: 按时间列间隔回放的倍速，None为尽快回放
+    :param chunksize: 读取csv的分块行数
+    """
+    chunks = pd.read_csv(data, chunksize=chunksize, dtype={code_column: str}) if isinstance(data, str) else [data]
+    last_time = None
+    for chunk in chunks:
+        columns = {"code": chunk[code_column].values, "price": chunk[price_column].values}
+        if volume_column is not None:
+            columns["volume"] = chunk[volume_column].values
+        if time_column is not None:
+            columns["time"] = pd.to_datetime(chunk[time_column]).values
+        if speed is not None and time_column is not None:
+            # 同一时间的行作为一个行情包，按时间间隔等待
+            times = columns["time"]
+            bounds = np.concatenate([[0], np.flatnonzero(times[1:] != times[:-1]) + 1, [times.shape[0]]])
+        else:
+            bounds = np.arange(0, len(chunk) + packet_size, packet_size).clip(max=len(chunk))
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            if start == end:
+                continue
+            packet = {name: column[start:end] for name, column in columns.items()}
+            if speed is not None and time_column is not None:
+                if last_time is not None:
+                    await asyncio.sleep(max((packet["time"][0] - last_time) / np.timedelta64(1, "s"), 0) / speed)
+                last_time = packet["time"][0]
+            else:
+                await asyncio.sleep(0)
+            yield packet
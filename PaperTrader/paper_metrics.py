@@ -0,0 +1,131 @@
+# -*- coding:utf-8 -*-
+"""
+回测过程中在线计算的绩效指标
+filename : paper_metrics.py
+createtime : 2026/10/18 15:48
+author : Demon Finch
+"""
+import math
+from collections import OrderedDict
+from datetime import datetime
+
+APPROX_BDAYS_PER_YEAR = 252
+
+
+class Papermetrics:
+    """
+    在线绩效指标：每次结算更新一次，每个指标O(1)内存
+    口径与 show_perf_stats(empyrical) 一致：收益率为账户总资产的逐bar变化率，
+    波动率为 ddof=1 标准差，Sortino 的下行风险为 sqrt(mean(min(r, 0)^2))；
+    换手率为 成交金额 / 账户总资产 的逐bar均值
+    """
+
+    def __init__(self, annualization: int = APPROX_BDAYS_PER_YEAR):
+        self.annualization = annualization
+
+        self.count = 0  # 收益率个数
+        self.start_time = None
+        self.current_time = None
+        self._last_money = None
+
+        self._growth = 1.0  # 累计净值，prod(1 + r)
+        self._mean = 0.0  # Welford 均值与二阶中心矩
+        self._m2 = 0.0
+        self._downside_sq = 0.0  # sum(min(r, 0)^2)
+
+        self._peak_growth = 1.0
+        self._peak_time = None
+        self.max_drawdown = 0.0
+        self.max_drawdown_peak = None
+        self.max_drawdown_valley = None
+
+        self._turnover_sum = 0.0
+        self._turnover_count = 0
+
+    def update(self, current_time: datetime, all_money: float, traded_money: float = 0.0):
+        """
+        :param current_time: 结算时间
+        :param all_money: 账户总资产
+        :param traded_money: 自上次结算以来的成交金额
+        """
+        self.current_time = current_time
+        if all_money:
+            self._turnover_sum += traded_money / all_money
+            self._turnover_count += 1
+        if self._last_money is None:
+            self.start_time = self._peak_time = current_time
+            self._last_money = all_money
+            return
+        returns = all_money / self._last_money - 1
+        self._last_money = all_money
+
+        self.count += 1
+        delta = returns - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (returns - self._mean)
+        if returns < 0:
+            self._downside_sq += returns * returns
+
+        self._growth *= 1 + returns
+        if self._growth > self._peak_growth:
+            self._peak_growth = self._growth
+            self._peak_time = current_time
+        drawdown = (self._growth - self._peak_growth) / self._peak_growth
+        if drawdown < self.max_drawdown:
+            self.max_drawdown = drawdown
+            self.max_drawdown_peak = self._peak_time
+            self.max_drawdown_valley = current_time
+
+    @property
+    def cum_returns(self) -> float:
+        return self._growth - 1 if self.count else math.nan
+
+    @property
+    def annual_return(self) -> float:
+        if not self.count:
+            return math.nan
+        return self._growth ** (1 / (self.count / self.annualization)) - 1
+
+    @property
+    def _std(self) -> float:
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else math.nan
+
+    @property
+    def annual_volatility(self) -> float:
+        return self._std * math.sqrt(self.annualization)
+
+    @property
+    def sharpe_ratio(self) -> float:
+        std = self._std
+        return self._mean / std * math.sqrt(self.annualization) if std else math.nan
+
+    @property
+    def sortino_ratio(self) -> float:
+        if self.count < 2:
+            return math.nan
+        downside_risk = math.sqrt(self._downside_sq / self.count) * math.sqrt(self.annualization)
+        return self._mean * self.annualization / downside_risk if downside_risk else math.inf
+
+    @property
+    def calmar_ratio(self) -> float:
+        if self.max_drawdown >= 0:
+            return math.nan
+        calmar = self.annual_return / abs(self.max_drawdown)
+        return math.nan if math.isinf(calmar) else calmar
+
+    @property
+    def turnover(self) -> float:
+        return self._turnover_sum / self._turnover_count if self._turnover_count else math.nan
+
+    def stats(self) -> OrderedDict:
+        """当前指标，名称与 show_perf_stats 一致"""
+        return OrderedDict([("Annual return", self.annual_return),
+                            ("Cumulative returns", self.cum_returns),
+                            ("Annual volatility", self.annual_volatility),
+                            ("Sharpe ratio", self.sharpe_ratio),
+                            ("Calmar ratio", self.calmar_ratio),
+                            ("Max drawdown", self.max_drawdown if self.count else math.nan),
+                            ("Sortino ratio", self.sortino_ratio),
+                            ("Max drawdown peak", self.max_drawdown_peak),
+                            ("Max drawdown valley", self.max_drawdown_valley),
+                            ("Daily turnover", self.turnover)])
@@ -0,0 +1,96 @@
+# -*- coding:utf-8 -*-
+"""
+多账户回测驱动：行情只读取、分组一次，广播给多个账户
+filename : paper_multi.py
+createtime : 2026/10/18 21:40
+author : Demon Finch
+"""
+import numpy as np
+import pandas as pd
+from .paper_engine import Paperengine
+from .paper_price import Paperprice
+from .paper_xdxr import Paperxdxr
+
+
+class Papermulti(Paperengine):
+    """
+    多账户回测驱动
+    所有账户共享同一张价格表(share_price_board)和同一份除权除息日历，每个日期：
+        各账户 on_current_time -> 价格表更新一次 -> 各账户 on_shared_prices、match_orders、strategy、settle
+    行情分组、日期转换、价格写入与撮合用的高低价只做一次，每多一个账户只增加其自身的持仓与委托处理。
+    策略中不应直接修改价格(on_price_change)，价格表由驱动统一更新
+    """
+
+    def __init__(self,
+                 accounts,
+                 strategies,
+                 dividend=None,
+                 stop=None,
+                 **engine_params):
+        """
+        :param accounts: 账户列表，或 {名称: 账户}
+        :param strategies: 与 accounts 对应的策略列表/字典，或所有账户共用的一个策略回调
+        :param dividend: 除权除息日历 Paperxdxr 或除权除息表，所有账户共用
+        :param stop: 提前终止条件 stop(account) -> bool，某个账户满足时只停止该账户
+        :param engine_params: 列名等参数，见 Paperengine
+        """
+        if not isinstance(accounts, dict):
+            accounts = dict(enumerate(accounts))
+        if callable(strategies):
+            strategies = dict.fromkeys(accounts, strategies)
+        elif not isinstance(strategies, dict):
+            strategies = dict(zip(accounts, strategies))
+        if set(strategies) != set(accounts):
+            raise ValueError("strategies 与 accounts 不对应")
+        super().__init__(next(iter(accounts.values())), None, None, stop=stop, **engine_params)
+        self.accounts = accounts
+        self.strategies = strategies
+        self.price_board = Paperprice()
+        if dividend is not None and not isinstance(dividend, Paperxdxr):
+            dividend = Paperxdxr(dividend, self.date_format)
+        for account in accounts.values():
+            account.share_price_board(self.price_board)
+            if dividend is not None:
+                account.xdxr = dividend
+        self._active = list(accounts)  # 尚未停止的账户
+
+    def on_bar(self, date: np.datetime64, bar: dict):
+        """推进一个日期，广播给所有未停止的账户"""
+        current_time = pd.Timestamp(date)
+        accounts = [self.accounts[name] for name in self._active]
+        for account in accounts:
+            account.on_current_time(current_time)
+        slots, old_prices = self.price_board.update(bar[self.code_column], bar[self.price_column])
+
+        price = bar[self.price_column]
+        open_price = bar.get(self.open_column, price)
+        high = bar[self.high_column] if self.high_column in bar else np.fmax(open_price, price)
+        low = bar[self.low_column] if self.low_column in bar else np.fmin(open_price, price)
+        volume = bar.get(self.volume_column)
+        for name, account in zip(self._active, accounts):
+            account.on_shared_prices(slots, old_prices)
+            if account.order.wait_count:
+                account.match_orders(bar[self.code_column], open_price, high, low, volume)
+            strategy = self.strategies[name]
+            if strategy is not None:
+                strategy(account, current_time, bar)
+            account.settle()
+
+    def run(self, data, after=None) -> dict:
+        """
+        运行回测
+        :param data: 见 Paperengine.iter_bars
+        :param after: 只运行日期晚于after的bar
+        :return: {名称: 账户}
+        """
+        if after is not None:
+            after = pd.Timestamp(after).to_datetime64()
+        for date, bar in self.iter_bars(data):
+            if after is not None and date <= after:
+                continue
+            self.on_bar(date, bar)
+            if self.stop is not None:
+                self._active = [name for name in self._active if not self.stop(self.accounts[name])]
+                if not self._active:
+                    break
+        return self.accounts
@@ -0,0 +1,278 @@
+# -*- coding:utf-8 -*-
+"""
+委托簿：未成交委托按代码索引，按bar撮合限价委托，完成的委托归档为列式日志
+filename : paper_orderbook.py
+createtime : 2026/10/18 19:05
+author : Demon Finch
+"""
+import numpy as np
+import pandas as pd
+
+order_log_columns = ["order_id", "code", "order_time", "order_price", "order_volume", "order_type",
+                     "order_status", "deal_time", "deal_price", "deal_volume", "commisson", "tax_percent"]
+
+_log_dtypes = {"order_id": np.int64,  # 出现非整数 order_id 时转为object
+               "code": np.int32,  # 代码字典编码
+               "order_time": "datetime64[ns]",
+               "order_price": np.float64,
+               "order_volume": np.float64,
+               "order_type": np.int8,
+               "order_status": np.int8,
+               "deal_time": "datetime64[ns]",
+               "deal_price": np.float64,  # 成交均价
+               "deal_volume": np.float64,  # 累计成交量
+               "commisson": np.float64,
+               "tax_percent": np.float64}
+
+
+class Paperorderbook:
+    """
+    委托簿
+    未成交(WAIT)委托按 order_id 与代码两级索引；成交完毕或撤销的委托移出并追加到列式日志，
+    撮合只遍历有未成交委托的代码，成本与历史委托数量无关。
+    按 order_id 读取的用法与原 Papertest.order 字典一致，已归档的委托返回由日志重建的 Paperorder；
+    日志每笔委托约90字节：代码字典编码，整数 order_id 经数组定位日志行号，不为每笔委托建字典项
+    """
+
+    def __init__(self, volume_ratio: float = 1.0, keep_log: bool = True, capacity: int = 64,
+                 volume_multiplier: float = 1, lot_size: int = 100):
+        """
+        :param volume_ratio: 每个bar每个代码可成交量占bar成交量的比例上限，None为不限制
+        :param keep_log: 是否归档完成的委托，False时完成的委托直接丢弃
+        :param capacity: 归档日志初始容量
+        :param volume_multiplier: bar成交量每单位的股数，成交量按手(100股)计时为100
+        :param lot_size: 每手股数，买入委托部分成交时成交量向下取整到整手
+        """
+        self.volume_ratio = volume_ratio
+        self.volume_multiplier = volume_multiplier
+        self.lot_size = lot_size
+        self.keep_log = keep_log
+        self.finished_count = 0  # 已完成(含未归档)的委托数
+        self._wait = dict()  # order_id -> Paperorder
+        self._wait_code = dict()  # code -> {order_id: Paperorder}，按委托先后排序
+        self._size = 0
+        self._columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in _log_dtypes.items()}
+        self._codes = []  # 日志代码字典
+        self._code_id = dict()
+        self._id_row = np.full(capacity, -1, dtype=np.int64)  # 整数 order_id -> 日志行号
+        self._log_row = dict()  # 非整数 order_id -> 日志行号
+
+    def __len__(self):
+        return len(self._wait) + self._size
+
+    def __getstate__(self):
+        """快照时日志只保存已写入的行"""
+        state = self.__dict__.copy()
+        state["_columns"] = {name: column[:max(self._size, 1)] for name, column in self._columns.items()}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__dict__.setdefault("volume_multiplier", 1)
+        self.__dict__.setdefault("lot_size", 1)  # 旧快照不按整手取整
+
+    def _row(self, order_id) -> int:
+        """日志行号，不在日志中时为-1"""
+        if isinstance(order_id, (int, np.integer)) and not isinstance(order_id, bool):
+            return self._id_row[order_id] if 0 <= order_id < self._id_row.shape[0] else -1
+        return self._log_row.get(order_id, -1)
+
+    def __contains__(self, order_id):
+        return order_id in self._wait or self._row(order_id) >= 0
+
+    def __getitem__(self, order_id):
+        order = self._wait.get(order_id)
+        if order is None:
+            row = self._row(order_id)
+            if row < 0:
+                raise KeyError(order_id)
+            order = self._from_log(row)
+        return order
+
+    def __setitem__(self, order_id, order):
+        if order.order_id is None:
+            order.order_id = order_id
+        elif order.order_id != order_id:
+            raise ValueError(f"order_id 不一致: {order_id} != {order.order_id}")
+        self.add(order)
+
+    def get(self, order_id, default=None):
+        return self[order_id] if order_id in self else default
+
+    def keys(self):
+        return list(self._wait) + self._columns["order_id"][:self._size].tolist()
+
+    def values(self):
+        return [self[order_id] for order_id in self.keys()]
+
+    def items(self):
+        return [(order_id, self[order_id]) for order_id in self.keys()]
+
+    @property
+    def wait_count(self) -> int:
+        return len(self._wait)
+
+    @property
+    def order_count(self) -> int:
+        """委托总数(未成交 + 已完成)，不受 keep_log 影响"""
+        return len(self._wait) + self.finished_count
+
+    @property
+    def wait_codes(self) -> list:
+        return list(self._wait_code)
+
+    def add(self, order):
+        """加入一笔未成交委托"""
+        if order.order_id is None:
+            raise ValueError("委托缺少 order_id")
+        self._wait[order.order_id] = order
+        self._wait_code.setdefault(order.code, dict())[order.order_id] = order
+
+    def wait_orders(self, code: str = None) -> dict:
+        """未成交委托 {order_id: Paperorder}，可按代码过滤"""
+        if code is None:
+            return dict(self._wait)
+        return dict(self._wait_code.get(code, {}))
+
+    def archive(self, order_id):
+        """把已成交完毕或已撤销的委托移出未成交索引，写入日志"""
+        self.archive_many([order_id])
+
+    def archive_many(self, order_ids: list):
+        """批量归档，日志各列一次写入"""
+        orders = []
+        for order_id in order_ids:
+            order = self._wait.pop(order_id)
+            code_orders = self._wait_code[order.code]
+            del code_orders[order_id]
+            if not code_orders:
+                del self._wait_code[order.code]
+            orders.append(order)
+        self.finished_count += len(orders)
+        if not self.keep_log or not orders:
+            return
+
+        for order in orders:
+            if order.code not in self._code_id:
+                self._code_id[order.code] = len(self._codes)
+                self._codes.append(order.code)
+        int_ids = all(isinstance(order_id, (int, np.integer)) and not isinstance(order_id, bool) and order_id >= 0
+                      for order_id in order_ids)
+        if not int_ids and self._columns["order_id"].dtype != object:
+            self._columns["order_id"] = self._columns["order_id"].astype(object)
+        while self._size + len(orders) > self._columns["order_id"].shape[0]:
+            self._grow()
+
+        rows = slice(self._size, self._size + len(orders))
+        values = {"order_id": [order.order_id for order in orders],
+                  "code": [self._code_id[order.code] for order in orders],
+                  "order_time": [order.order_time for order in orders],
+                  "order_price": [order.order_price for order in orders],
+                  "order_volume": [order.order_volume for order in orders],
+                  "order_type": [order.order_type for order in orders],
+                  "order_status": [order.order_status for order in orders],
+                  "deal_time": [order.deal_time for order in orders],
+                  "deal_price": [order.filled_money / order.filled_volume if order.filled_volume else np.nan
+                                 for order in orders],
+                  "deal_volume": [order.filled_volume for order in orders],
+                  "commisson": [order.commisson for order in orders],
+                  "tax_percent": [order.tax_percent for order in orders]}
+        for name, column in self._columns.items():
+            column[rows] = values[name] if name not in ("order_time", "deal_time") else \
+                pd.to_datetime(values[name]).values
+        if self._columns["order_id"].dtype == object:
+            self._log_row.update(zip(values["order_id"], range(rows.start, rows.stop)))
+        else:
+            ids = np.asarray(values["order_id"], dtype=np.int64)
+            if ids.max() >= self._id_row.shape[0]:
+                id_row = np.full(max(ids.max() + 1, self._id_row.shape[0] * 2), -1, dtype=np.int64)
+                id_row[:self._id_row.shape[0]] = self._id_row
+                self._id_row = id_row
+            self._id_row[ids] = np.arange(rows.start, rows.stop)
+        self._size += len(orders)
+
+    def _grow(self):
+        for name, column in self._columns.items():
+            new_column = np.empty(column.shape[0] * 2, dtype=column.dtype)
+            new_column[:self._size] = column[:self._size]
+            self._columns[name] = new_column
+
+    def _from_log(self, row: int):
+        """由日志行重建 Paperorder(只读快照)"""
+        from .paper_account import Paperorder
+        columns = self._columns
+        order = Paperorder(code=self._codes[columns["code"][row]],
+                           order_time=pd.Timestamp(columns["order_time"][row]),
+                           order_price=columns["order_price"][row],
+                           order_volume=columns["order_volume"][row],
+                           order_type=int(columns["order_type"][row]),
+                           commisson=columns["commisson"][row],
+                           tax_percent=columns["tax_percent"][row],
+                           order_id=columns["order_id"][row].item()
+                           if columns["order_id"].dtype != object else columns["order_id"][row])
+        order.order_status = int(columns["order_status"][row])
+        if columns["deal_volume"][row]:
+            # 以均价与累计成交量还原一次成交
+            order.fill(columns["deal_volume"][row], columns["deal_price"][row], pd.Timestamp(columns["deal_time"][row]))
+        return order
+
+    def to_frame(self) -> pd.DataFrame:
+        """已归档委托的DataFrame，代码列解码为原始代码"""
+        frame = {name: self._columns[name][:self._size].copy() for name in order_log_columns}
+        frame["code"] = np.asarray(self._codes, dtype=object)[frame["code"]]
+        return pd.DataFrame(frame, columns=order_log_columns)
+
+    def match(self,
+              codes: np.ndarray,
+              open_price: np.ndarray,
+              high: np.ndarray,
+              low: np.ndarray,
+              volume: np.ndarray = None,
+              available: dict = None) -> list:
+        """
+        用一个bar撮合未成交的限价委托，不修改委托状态
+        买入类(order_type>0)：low<=委托价时成交，成交价 min(open, 委托价)；
+        卖出类(order_type<0)：high>=委托价时成交，成交价 max(open, 委托价)；
+        同一代码的委托按委托先后共享 volume_ratio × bar成交量 × volume_multiplier 股的可成交量，不足时部分成交，
+        买入的部分成交量向下取整到 lot_size 的整数倍(不足一手时本bar不成交)，卖出可成交零股
+        :param codes: bar代码数组
+        :param open_price: 开盘价数组
+        :param high: 最高价数组
+        :param low: 最低价数组
+        :param volume: 成交量数组(单位见 volume_multiplier)，None为不限制成交量
+        :param available: {代码: 可卖数量}，卖出成交量不超过可卖数量
+        :return: [(order_id, 成交量, 成交价)]
+        """
+        if not self._wait_code:
+            return []
+        wait_codes = list(self._wait_code)
+        rows = pd.Index(codes).get_indexer(wait_codes)
+        fills = []
+        for codei, row in zip(wait_codes, rows):
+            if row < 0:
+                continue
+            bar_open, bar_high, bar_low = open_price[row], high[row], low[row]
+            if volume is None or self.volume_ratio is None:
+                capacity = np.inf
+            else:
+                capacity = np.floor(volume[row] * self.volume_multiplier * self.volume_ratio)
+            sellable = np.inf if available is None else available.get(codei, 0)
+            for order_id, order in self._wait_code[codei].items():
+                if capacity <= 0:
+                    break
+                if order.order_type > 0:
+                    if not bar_low <= order.order_price:
+                        continue
+                    deal_price, deal_volume = min(bar_open, order.order_price), min(order.remaining_volume, capacity)
+                    if deal_volume < order.remaining_volume:
+                        deal_volume = np.floor(deal_volume / self.lot_size) * self.lot_size
+                else:
+                    if not bar_high >= order.order_price:
+                        continue
+                    deal_price = max(bar_open, order.order_price)
+                    deal_volume = min(order.remaining_volume, capacity, sellable)
+                    sellable -= deal_volume
+                if deal_volume > 0:
+                    capacity -= deal_volume
+                    fills.append((order_id, deal_volume, deal_price))
+        return fills
@@ -0,0 +1,97 @@
+# -*- coding:utf-8 -*-
+"""
+行情价格表：代码 -> 槽位索引 + numpy价格数组
+filename : paper_price.py
+createtime : 2026/10/18 10:41
+author : Demon Finch
+"""
+import numpy as np
+import pandas as pd
+
+
+class Paperprice:
+    """
+    股票当前价格表，用法与 {code: price} 字典一致，
+    价格存放在按槽位排列的数组中，批量更新时一次性写入
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.slot = dict()  # code -> 槽位
+        self.codes = list()  # 槽位 -> code
+        self._price = np.full(capacity, np.nan)
+        self._index = None  # 批量查找槽位用的pd.Index缓存，新增代码时失效
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __contains__(self, code):
+        return code in self.slot and not np.isnan(self._price[self.slot[code]])
+
+    def __getitem__(self, code) -> float:
+        if code not in self:
+            raise KeyError(code)
+        return self._price[self.slot[code]]
+
+    def __setitem__(self, code, price: float):
+        slot = self.get_slot(code)  # 新建槽位可能扩容替换 self._price，先取槽位
+        self._price[slot] = price
+
+    def __repr__(self):
+        return str(dict(self.items()))
+
+    def get(self, code, default=None):
+        return self[code] if code in self else default
+
+    def keys(self) -> list:
+        return [codei for codei, sloti in self.slot.items() if not np.isnan(self._price[sloti])]
+
+    def items(self) -> list:
+        return [(codei, self._price[sloti]) for codei, sloti in self.slot.items() if not np.isnan(self._price[sloti])]
+
+    @property
+    def prices(self) -> np.ndarray:
+        """按槽位排列的价格数组视图，未报价为nan"""
+        return self._price[:len(self.codes)]
+
+    def price_at(self, slot: int) -> float:
+        return self._price[slot]
+
+    def _new_slot(self, code) -> int:
+        slot = len(self.codes)
+        if slot == self._price.shape[0]:
+            price = np.full(slot * 2, np.nan)
+            price[:slot] = self._price
+            self._price = price
+        self.slot[code] = slot
+        self.codes.append(code)
+        self._index = None
+        return slot
+
+    def get_slot(self, code) -> int:
+        """获取代码对应槽位，不存在时新建"""
+        slot = self.slot.get(code)
+        return self._new_slot(code) if slot is None else slot
+
+    def get_slots(self, codes) -> np.ndarray:
+        """批量获取代码对应槽位，不存在时新建"""
+        if self._index is None:
+            self._index = pd.Index(self.codes)
+        slots = self._index.get_indexer(codes)
+        missing = slots < 0
+        if missing.any():
+            codes = np.asarray(codes)
+            for idx in np.flatnonzero(missing):
+                slots[idx] = self.get_slot(codes[idx])
+        return slots
+
+    def update(self, codes, prices):
+        """
+        批量更新价格
+        :param codes: 代码数组
+        :param prices: 与codes对应的价格数组
+        :return: (槽位数组, 更新前价格数组)
+        """
+        slots = self.get_slots(codes)
+        old_prices = self._price[slots]
+        self._price[slots] = prices
+        return slots, old_prices
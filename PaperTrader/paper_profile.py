@@ -0,0 +1,157 @@
+# -*- coding:utf-8 -*-
+"""
+账户回调耗时统计：启用时替换为计时包装，停用时恢复原方法
+filename : paper_profile.py
+createtime : 2026/10/18 19:52
+author : Demon Finch
+"""
+import time
+import functools
+from array import array
+import numpy as np
+import pandas as pd
+from .paper_account import Papertest, Paperpositon
+
+profile_targets = [(Papertest, "on_current_time"),
+                   (Papertest, "on_price_change"),
+                   (Papertest, "on_price_change_all"),
+                   (Papertest, "on_dividend"),
+                   (Papertest, "send_order"),
+                   (Papertest, "send_orders"),
+                   (Papertest, "make_deal"),
+                   (Papertest, "match_orders"),
+                   (Papertest, "settle"),
+                   (Paperpositon, "add_order"),
+                   (Paperpositon, "cpt_djsl")]
+
+_active = [None]  # 当前启用的 Paperprofiler，同一时间只允许一个
+
+
+class Paperprofiler:
+    """
+    账户回调耗时统计
+    enable() 把被测方法在类上替换为计时包装，记录每次调用的耗时(ns)；
+    Paperpositon.add_order / cpt_djsl 另记录触及的持仓账本行数(按代码汇总)。
+    disable() 恢复原方法，未启用时没有任何额外开销
+    用法：
+        with Paperprofiler() as profiler:
+            engine.run(data)
+        profiler.report()
+    """
+
+    def __init__(self, targets: list = None):
+        """
+        :param targets: [(类, 方法名)]，默认 profile_targets
+        """
+        self.targets = profile_targets if targets is None else targets
+        self._durations = dict()  # 方法名 -> array("q") 每次调用耗时ns
+        self._ledger_rows = dict()  # 方法名 -> 触及的账本行数
+        self._code_rows = dict()  # 代码 -> 触及的账本行数
+        self._originals = []
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.disable()
+
+    @property
+    def enabled(self) -> bool:
+        return _active[0] is self
+
+    def enable(self):
+        if _active[0] is not None:
+            raise RuntimeError("已有启用中的 Paperprofiler")
+        _active[0] = self
+        for cls, name in self.targets:
+            method = cls.__dict__[name]
+            self._originals.append((cls, name, method))
+            setattr(cls, name, self._wrap(cls, name, method))
+
+    def disable(self):
+        if _active[0] is not self:
+            return
+        for cls, name, method in reversed(self._originals):
+            setattr(cls, name, method)
+        self._originals = []
+        _active[0] = None
+
+    def reset(self):
+        """清空已记录的数据"""
+        for durations in self._durations.values():
+            del durations[:]
+        for name in self._ledger_rows:
+            self._ledger_rows[name] = 0
+        self._code_rows.clear()
+
+    def _count_rows(self, name: str, code, rows: int):
+        self._ledger_rows[name] += rows
+        self._code_rows[code] = self._code_rows.get(code, 0) + rows
+
+    def _wrap(self, cls, name: str, method):
+        key = f"{cls.__name__}.{name}"
+        durations = self._durations.setdefault(key, array("q"))
+        clock = time.perf_counter_ns
+
+        if cls is Paperpositon and name == "add_order":
+            self._ledger_rows.setdefault(key, 0)
+
+            @functools.wraps(method)
+            def wrapper(position, *args, **kwargs):
+                ledger, ledger_size = position.order_ledger, len(position.order_ledger)
+                start = clock()
+                try:
+                    return method(position, *args, **kwargs)
+                finally:
+                    durations.append(clock() - start)
+                    # 追加一行；持仓归零时整个账本转存到 old_history
+                    self._count_rows(key, position.code,
+                                     1 if position.order_ledger is ledger else ledger_size + 1)
+        elif cls is Paperpositon and name == "cpt_djsl":
+            self._ledger_rows.setdefault(key, 0)
+
+            @functools.wraps(method)
+            def wrapper(position, current_time, *args, **kwargs):
+                ledger, today = position.order_ledger, current_time.toordinal()
+                rows = sum(len(ledger._release_rows[day]) for day in ledger._release_days if day <= today)
+                start = clock()
+                try:
+                    return method(position, current_time, *args, **kwargs)
+                finally:
+                    durations.append(clock() - start)
+                    if rows:
+                        self._count_rows(key, position.code, rows)
+        else:
+            @functools.wraps(method)
+            def wrapper(*args, **kwargs):
+                start = clock()
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    durations.append(clock() - start)
+        return wrapper
+
+    def report(self) -> pd.DataFrame:
+        """
+        各方法耗时统计
+        :return: DataFrame，索引为方法，列：calls, total_ms, mean_us, p99_us, max_us, ledger_rows；按total_ms降序
+        """
+        rows = []
+        for key, durations in self._durations.items():
+            if not durations:
+                continue
+            elapsed = np.frombuffer(durations, dtype=np.int64).copy()
+            rows.append({"method": key,
+                         "calls": elapsed.shape[0],
+                         "total_ms": elapsed.sum() / 1e6,
+                         "mean_us": elapsed.mean() / 1e3,
+                         "p99_us": np.percentile(elapsed, 99) / 1e3,
+                         "max_us": elapsed.max() / 1e3,
+                         "ledger_rows": self._ledger_rows.get(key, np.nan)})
+        columns = ["method", "calls", "total_ms", "mean_us", "p99_us", "max_us", "ledger_rows"]
+        return pd.DataFrame(rows, columns=columns).set_index("method").sort_values("total_ms", ascending=False)
+
+    def ledger_report(self) -> pd.Series:
+        """各持仓代码触及的账本行数，降序"""
+        return pd.Series(self._code_rows, dtype=np.int64, name="ledger_rows").sort_values(ascending=False)
@@ -5,13 +5,14 @@ createtime : 2021/4/2 20:46
 author : Demon Finch
 """
 
+import warnings
 from collections import OrderedDict
-import empyrical as ep
+from functools import partial
+import numpy as np
 import pandas as pd
-from pyfolio import timeseries
+from .paper_metrics import APPROX_BDAYS_PER_YEAR
 
-from pyfolio.utils import (APPROX_BDAYS_PER_MONTH,
-                           MM_DISPLAY_UNIT)
+APPROX_BDAYS_PER_MONTH = 21
 
 STAT_FUNCS_PCT = [
     'Annual return',
@@ -23,7 +24,499 @@ STAT_FUNCS_PCT = [
 ]
 
 
-def show_worst_drawdown_periods(returns, top=5):
+def perf_stats(returns, factor_returns=None, positions=None,
+               transactions=None, turnover_denom='AGB'):
+    """
+    Calculates various performance metrics of a strategy.
+
+    Same names, order and formulas as pyfolio.timeseries.perf_stats, computed
+    with numpy in one pass over the returns instead of one empyrical call per
+    statistic.
+
+    Parameters
+    ----------
+    returns : pd.Series
+        Daily returns of the strategy, noncumulative.
+    factor_returns : pd.Series, optional
+        Daily noncumulative returns of the benchmark factor; adds Alpha and
+        Beta.
+    positions : pd.DataFrame, optional
+        Daily net position values, with a 'cash' column; adds Gross leverage.
+    transactions : pd.DataFrame, optional
+        Executed trades with 'amount' and 'price' columns; adds Daily turnover
+        when positions are given as well.
+    turnover_denom : str, optional
+        Either AGB or portfolio_value, default AGB.
+
+    Returns
+    -------
+    pd.Series
+        Performance metrics.
+    """
+    r = np.asarray(returns, dtype=float)
+    n = r.shape[0]
+    valid = r[~np.isnan(r)]
+    count = valid.shape[0]
+    nan = np.nan
+    stats = OrderedDict()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 累计净值(缺失收益率按0处理)，前置起点1用于回撤
+        growth = np.ones(n + 1)
+        np.cumprod(1 + np.nan_to_num(r), out=growth[1:])
+        mean = valid.mean() if count else nan
+        std = valid.std(ddof=1) if count > 1 else nan
+        annual_return = growth[-1] ** (1 / (n / APPROX_BDAYS_PER_YEAR)) - 1 if n else nan
+        peak = np.maximum.accumulate(growth)
+        max_drawdown = ((growth - peak) / peak).min() if n else nan
+
+        stats['Annual return'] = annual_return
+        stats['Cumulative returns'] = growth[-1] - 1 if n else nan
+        # 波动率类指标按有效收益率个数判断，缺失值不计入样本
+        stats['Annual volatility'] = std * np.sqrt(APPROX_BDAYS_PER_YEAR) if count > 1 else nan
+        stats['Sharpe ratio'] = mean / std * np.sqrt(APPROX_BDAYS_PER_YEAR) if count > 1 else nan
+        calmar = annual_return / abs(max_drawdown) if max_drawdown < 0 else nan
+        stats['Calmar ratio'] = nan if np.isinf(calmar) else calmar
+
+        stability = nan
+        if count > 1:
+            cum_log_returns = np.log1p(valid).cumsum()
+            x = np.arange(count) - (count - 1) / 2
+            y = cum_log_returns - cum_log_returns.mean()
+            ssy = (y * y).sum()
+            # 净值曲线水平时 R² 无定义，同 scipy.stats.linregress 为nan
+            stability = (x * y).sum() ** 2 / ((x * x).sum() * ssy) if ssy else nan
+        stats['Stability'] = stability
+        stats['Max drawdown'] = max_drawdown
+
+        omega = nan
+        if count > 1:
+            denom = -valid[valid < 0].sum()
+            omega = valid[valid > 0].sum() / denom if denom > 0 else nan
+        stats['Omega ratio'] = omega
+        downside_risk = np.sqrt(np.mean(np.minimum(valid, 0) ** 2)) * np.sqrt(APPROX_BDAYS_PER_YEAR)
+        stats['Sortino ratio'] = np.divide(mean * APPROX_BDAYS_PER_YEAR, downside_risk) if count > 1 else nan
+
+        # 总体矩，与 scipy.stats.skew / kurtosis(Fisher) 一致，含缺失值时为nan
+        skew = kurtosis = nan
+        if n and count == n:
+            deviation = r - mean
+            m2 = np.mean(deviation ** 2)
+            if m2 > (np.finfo(float).eps * abs(mean)) ** 2:
+                skew = np.mean(deviation ** 3) / m2 ** 1.5
+                kurtosis = np.mean(deviation ** 4) / m2 ** 2 - 3
+        stats['Skew'] = skew
+        stats['Kurtosis'] = kurtosis
+        if count:
+            tail_5, tail_95 = np.percentile(valid, [5, 95])
+            stats['Tail ratio'] = np.abs(tail_95) / np.abs(tail_5)
+        else:
+            stats['Tail ratio'] = nan
+        stats['Daily value at risk'] = mean - 2 * std
+
+        if positions is not None:
+            stats['Gross leverage'] = gross_lev(positions).mean()
+            if transactions is not None:
+                stats['Daily turnover'] = get_turnover(positions, transactions, turnover_denom).mean()
+
+        if factor_returns is not None:
+            stats['Alpha'], stats['Beta'] = _alpha_beta(returns, factor_returns)
+
+    return pd.Series(stats)
+
+
+def _alpha_beta(returns, factor_returns) -> tuple:
+    """按日期外连接对齐后计算 alpha、beta，口径同 empyrical.alpha_beta"""
+    if isinstance(returns, np.ndarray) and isinstance(factor_returns, np.ndarray) \
+            and returns.shape[0] == factor_returns.shape[0]:
+        r, f = returns.astype(float), factor_returns.astype(float)
+    else:
+        aligned = pd.concat([pd.Series(returns), pd.Series(factor_returns)], axis=1)
+        r, f = aligned.iloc[:, 0].values.astype(float), aligned.iloc[:, 1].values.astype(float)
+    if r.shape[0] < 2:
+        return np.nan, np.nan
+    independent = np.where(np.isnan(r), np.nan, f)
+    residual = independent - np.nanmean(independent)
+    variance = np.nanmean(residual * residual)
+    beta = np.nanmean(residual * r) / variance if variance >= 1e-30 else np.nan
+    alpha = (np.nanmean(r - beta * f) + 1) ** APPROX_BDAYS_PER_YEAR - 1
+    return alpha, beta
+
+
+def perf_stats_bootstrap(returns, factor_returns=None, return_stats=True,
+                         n_samples=1000, seed=None, processes=None,
+                         chunk_size=None, **kwargs):
+    """
+    Calculates various bootstrapped performance metrics of a strategy.
+
+    Same output as pyfolio.timeseries.perf_stats_bootstrap, but all resample
+    indices are drawn as one (n_samples, n_days) matrix and every statistic is
+    computed along its rows, instead of one Python-level call per statistic
+    per sample. Statistics follow perf_stats.
+
+    Parameters
+    ----------
+    returns : pd.Series
+        Daily returns of the strategy, noncumulative. Missing returns are
+        dropped before resampling.
+    factor_returns : pd.Series, optional
+        Daily noncumulative returns of the benchmark factor, aligned to
+        returns by index; adds Alpha and Beta.
+    return_stats : boolean, optional
+        If True, returns mean, median, 5 and 95 percentiles of each metric.
+        If False, returns the bootstrap samples of each metric.
+    n_samples : int, optional
+        Number of bootstrap samples to draw. Default is 1000.
+    seed : int, optional
+        Seed of the resample indices. The result only depends on seed,
+        n_samples and chunk_size, not on the number of processes.
+    processes : int, optional
+        Worker processes for the chunks. None uses all cores when there is
+        more than one chunk; 1 runs in the current process.
+    chunk_size : int, optional
+        Samples per chunk, default keeps each chunk around 4M values.
+    **kwargs
+        Ignored; accepts the positions/transactions arguments passed by
+        show_perf_stats.
+
+    Returns
+    -------
+    pd.DataFrame
+        if return_stats is True:
+        - Distributional statistics of bootstrapped sampling
+        distribution of performance metrics.
+        if return_stats is False:
+        - Bootstrap samples for each performance metric.
+    """
+    returns = pd.Series(returns).dropna()
+    r = returns.values.astype(float)
+    f = None
+    if factor_returns is not None:
+        f = pd.Series(factor_returns).reindex(returns.index).values.astype(float)
+    if r.shape[0] == 0:
+        # 空样本(如样本外区间为空)：各指标为nan
+        r = np.full(1, np.nan)
+        f = None if f is None else np.full(1, np.nan)
+    n = r.shape[0]
+    if chunk_size is None:
+        chunk_size = max(1, 4_000_000 // max(n, 1))
+    starts = list(range(0, n_samples, chunk_size))
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    tasks = [(r, f, min(chunk_size, n_samples - start), seedi) for start, seedi in zip(starts, seeds)]
+
+    if processes == 1 or len(tasks) <= 1:
+        chunks = [_bootstrap_chunk(*task) for task in tasks]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            chunks = list(executor.map(_bootstrap_chunk, *zip(*tasks)))
+
+    bootstrap_values = pd.DataFrame(
+        {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+        if chunks else {})
+    if not return_stats:
+        return bootstrap_values
+    values = bootstrap_values.values
+    with np.errstate(invalid='ignore'):
+        stats = pd.DataFrame({'mean': values.mean(axis=0),
+                              'median': np.median(values, axis=0),
+                              '5%': np.percentile(values, 5, axis=0),
+                              '95%': np.percentile(values, 95, axis=0)},
+                             index=bootstrap_values.columns)
+    return stats
+
+
+def _bootstrap_chunk(r, f, n_samples, seed) -> OrderedDict:
+    """一块重抽样：抽样矩阵每行一个样本，各指标按行计算"""
+    n = r.shape[0]
+    nan = np.nan
+    index = np.random.default_rng(seed).integers(0, n, size=(n_samples, n))
+    sample = r[index]
+    stats = OrderedDict()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = np.cumprod(1 + sample, axis=1)
+        final = growth[:, -1]
+        mean = sample.mean(axis=1)
+        std = sample.std(axis=1, ddof=1) if n > 1 else np.full(n_samples, nan)
+        annual_return = final ** (APPROX_BDAYS_PER_YEAR / n) - 1
+        # 峰值包含起点1
+        peak = np.maximum(np.maximum.accumulate(growth, axis=1), 1)
+        max_drawdown = np.minimum(((growth - peak) / peak).min(axis=1), 0)
+
+        stats['Annual return'] = annual_return
+        stats['Cumulative returns'] = final - 1
+        stats['Annual volatility'] = std * np.sqrt(APPROX_BDAYS_PER_YEAR)
+        stats['Sharpe ratio'] = mean / std * np.sqrt(APPROX_BDAYS_PER_YEAR)
+        calmar = np.where(max_drawdown < 0, annual_return / np.abs(max_drawdown), nan)
+        stats['Calmar ratio'] = np.where(np.isinf(calmar), nan, calmar)
+
+        cum_log_returns = np.cumsum(np.log1p(sample), axis=1)
+        x = np.arange(n) - (n - 1) / 2
+        y = cum_log_returns - cum_log_returns.mean(axis=1, keepdims=True)
+        ssy = (y * y).sum(axis=1)
+        stability = np.where(ssy > 0, (y @ x) ** 2 / ((x * x).sum() * ssy), nan)
+        stats['Stability'] = stability if n > 1 else np.full(n_samples, nan)
+        stats['Max drawdown'] = max_drawdown
+
+        loss = -np.minimum(sample, 0).sum(axis=1)
+        omega = np.where(loss > 0, np.maximum(sample, 0).sum(axis=1) / loss, nan)
+        stats['Omega ratio'] = omega if n > 1 else np.full(n_samples, nan)
+        downside_risk = np.sqrt(np.mean(np.minimum(sample, 0) ** 2, axis=1)) * np.sqrt(APPROX_BDAYS_PER_YEAR)
+        stats['Sortino ratio'] = np.divide(mean * APPROX_BDAYS_PER_YEAR, downside_risk)
+
+        deviation = sample - mean[:, None]
+        m2 = np.mean(deviation ** 2, axis=1)
+        degenerate = m2 <= (np.finfo(float).eps * np.abs(mean)) ** 2
+        stats['Skew'] = np.where(degenerate, nan, np.mean(deviation ** 3, axis=1) / m2 ** 1.5)
+        stats['Kurtosis'] = np.where(degenerate, nan, np.mean(deviation ** 4, axis=1) / m2 ** 2 - 3)
+        tail_5, tail_95 = np.percentile(sample, [5, 95], axis=1)
+        stats['Tail ratio'] = np.abs(tail_95) / np.abs(tail_5)
+        stats['Daily value at risk'] = mean - 2 * std
+
+        if f is not None:
+            factor = f[index]
+            independent = np.where(np.isnan(sample), nan, factor)
+            with warnings.catch_warnings():
+                # 因子收益率整行缺失时 nanmean 为nan
+                warnings.simplefilter('ignore', RuntimeWarning)
+                residual = independent - np.nanmean(independent, axis=1, keepdims=True)
+                variance = np.nanmean(residual * residual, axis=1)
+                beta = np.where(variance >= 1e-30, np.nanmean(residual * sample, axis=1) / variance, nan)
+                alpha = (np.nanmean(sample - beta[:, None] * factor, axis=1) + 1) ** APPROX_BDAYS_PER_YEAR - 1
+            stats['Alpha'], stats['Beta'] = alpha, beta
+
+    return stats
+
+
+ROLLING_STATS = [
+    'Annual return',
+    'Cumulative returns',
+    'Annual volatility',
+    'Sharpe ratio',
+    'Calmar ratio',
+    'Max drawdown'
+]
+
+
+def rolling_perf_stats(returns, window, step=None, chunk_size=None):
+    """
+    Calculates performance metrics over every rolling window in one pass.
+
+    Window sums come from prefix sums of the returns, so each window costs
+    O(1) for return, volatility and Sharpe ratio; max drawdown takes the
+    running peak of each window's log equity curve over a strided view,
+    vectorized across windows. Formulas follow perf_stats.
+
+    Parameters
+    ----------
+    returns : pd.Series or pd.DataFrame
+        Daily returns, noncumulative; one column per strategy for a
+        DataFrame. Missing returns count as flat days.
+    window : int
+        Window length in days.
+    step : int, optional
+        Days between window starts, default window (non-overlapping).
+    chunk_size : int, optional
+        Windows per drawdown chunk, default keeps each chunk around 4M
+        values.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per window (and strategy), columns window, start, end,
+        [strategy,] then ROLLING_STATS. For walk-forward selection, pick
+        per window in-sample and read the same strategy in window + 1.
+    """
+    is_series = isinstance(returns, pd.Series)
+    frame = returns.to_frame() if is_series else returns
+    r = frame.fillna(0).values.astype(float)
+    n, k = r.shape
+    step = window if step is None else step
+    starts = np.arange(0, n - window + 1, step)
+    ends = starts + window
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 减去全样本均值后再累加，降低平方和相减的抵消误差
+        overall = r.mean(axis=0) if n else np.zeros(k)
+        centered = r - overall
+        zeros = np.zeros((1, k))
+        sum1 = np.vstack([zeros, np.cumsum(centered, axis=0)])
+        sum2 = np.vstack([zeros, np.cumsum(centered * centered, axis=0)])
+        log_equity = np.vstack([zeros, np.cumsum(np.log1p(r), axis=0)])
+
+        window_sum = sum1[ends] - sum1[starts]
+        mean = window_sum / window
+        variance = (sum2[ends] - sum2[starts] - window_sum * mean) / (window - 1)
+        std = np.sqrt(np.maximum(variance, 0))
+        mean = mean + overall
+        growth = np.exp(log_equity[ends] - log_equity[starts])
+        annual_return = growth ** (APPROX_BDAYS_PER_YEAR / window) - 1
+
+        max_drawdown = np.empty((starts.shape[0], k))
+        if starts.shape[0]:
+            # (窗口, 策略, window+1) 的只读视图，含窗口起点前的净值
+            views = np.lib.stride_tricks.sliding_window_view(log_equity, window + 1, axis=0)
+            if chunk_size is None:
+                chunk_size = max(1, 4_000_000 // ((window + 1) * k))
+            for chunk in range(0, starts.shape[0], chunk_size):
+                view = views[starts[chunk:chunk + chunk_size]]
+                peak = np.maximum.accumulate(view, axis=2)
+                max_drawdown[chunk:chunk + chunk_size] = np.expm1((view - peak).min(axis=2))
+
+        calmar = np.where(max_drawdown < 0, annual_return / np.abs(max_drawdown), np.nan)
+        stats = OrderedDict()
+        stats['Annual return'] = annual_return
+        stats['Cumulative returns'] = growth - 1
+        stats['Annual volatility'] = std * np.sqrt(APPROX_BDAYS_PER_YEAR)
+        stats['Sharpe ratio'] = mean / std * np.sqrt(APPROX_BDAYS_PER_YEAR)
+        stats['Calmar ratio'] = np.where(np.isinf(calmar), np.nan, calmar)
+        stats['Max drawdown'] = max_drawdown
+
+    rows = OrderedDict()
+    rows['window'] = np.repeat(np.arange(starts.shape[0]), k)
+    rows['start'] = np.repeat(frame.index[starts], k)
+    rows['end'] = np.repeat(frame.index[ends - 1], k)
+    if not is_series:
+        rows['strategy'] = np.tile(frame.columns.values, starts.shape[0])
+    for name, values in stats.items():
+        rows[name] = values.ravel()
+    return pd.DataFrame(rows)
+
+
+def gross_lev(positions):
+    """
+    Calculates the gross leverage of a strategy.
+
+    Parameters
+    ----------
+    positions : pd.DataFrame
+        Daily net position values, with a 'cash' column.
+
+    Returns
+    -------
+    pd.Series
+        Gross leverage.
+    """
+    exposure = positions.drop('cash', axis=1).abs().sum(axis=1)
+    return exposure / positions.sum(axis=1)
+
+
+def get_turnover(positions, transactions, denominator='AGB'):
+    """
+    Value of purchases and sales divided by either the actual gross book or
+    the portfolio value for the time step.
+
+    Parameters
+    ----------
+    positions : pd.DataFrame
+        Daily net position values, with a 'cash' column.
+    transactions : pd.DataFrame
+        Executed trades with 'amount' and 'price' columns.
+    denominator : str, optional
+        Either 'AGB' or 'portfolio_value', default AGB.
+
+    Returns
+    -------
+    pd.Series
+        Daily turnover.
+    """
+    traded_value = (transactions['amount'].abs() * transactions['price'])
+    traded_value = traded_value.groupby(transactions.index.normalize()).sum()
+    if denominator == 'AGB':
+        gross_book = positions.drop('cash', axis=1).abs().sum(axis=1)
+        denom = gross_book.rolling(2).mean()
+        denom.iloc[0] = gross_book.iloc[0] / 2
+    elif denominator == 'portfolio_value':
+        denom = positions.sum(axis=1)
+    else:
+        raise ValueError(
+            "Unexpected value for denominator '{}'. The "
+            "denominator parameter must be either 'AGB'"
+            " or 'portfolio_value'.".format(denominator)
+        )
+    denom.index = denom.index.normalize()
+    return traded_value.div(denom, axis='index').fillna(0)
+
+
+def gen_drawdown_table(returns, top=10):
+    """
+    Places top drawdowns in a table.
+
+    The underwater curve is split once at its zero points: every run of
+    negative values between two zeros is one drawdown period, its valley is
+    the run's minimum, its peak the zero before it and its recovery the zero
+    after it (NaT while not recovered). The top periods by depth are the same
+    ones pyfolio finds by repeatedly removing the deepest period.
+
+    Parameters
+    ----------
+    returns : pd.Series
+        Daily returns of the strategy, noncumulative.
+    top : int, optional
+        The amount of top drawdowns to find (default 10).
+
+    Returns
+    -------
+    df_drawdowns : pd.DataFrame
+        Information about top drawdowns.
+    """
+    r = np.nan_to_num(np.asarray(returns, dtype=float))
+    dates = pd.DatetimeIndex(returns.index).normalize()
+    cum = np.cumprod(1 + r)
+    underwater = cum / np.maximum.accumulate(cum) - 1
+
+    is_zero = underwater == 0
+    zero_pos = np.flatnonzero(is_zero)
+    negative = np.flatnonzero(~is_zero)
+    # 第k个零点开始第k段；段内负值按(段, 回撤, 位置)排序后每段第一个即谷底
+    segment = np.cumsum(is_zero)[negative] - 1
+    order = np.lexsort((negative, underwater[negative], segment))
+    first = np.ones(order.shape[0], dtype=bool)
+    first[1:] = segment[order][1:] != segment[order][:-1]
+    valley = negative[order][first]
+    valley_segment = segment[order][first]
+    # 按回撤深度取前top段，深度相同时较早的在前
+    pick = np.lexsort((valley, underwater[valley]))[:top]
+    valley, valley_segment = valley[pick], valley_segment[pick]
+    peak = zero_pos[valley_segment]
+    recovered = valley_segment + 1 < zero_pos.shape[0]
+    recovery = zero_pos[np.minimum(valley_segment + 1, zero_pos.shape[0] - 1)]
+
+    peak_date = dates.values[peak]
+    recovery_date = np.where(recovered, dates.values[recovery], np.datetime64('NaT'))
+    # 起止日期(含)之间的工作日数，同 len(pd.date_range(peak, recovery, freq='B'))
+    duration = np.busday_count(peak_date.astype('datetime64[D]'),
+                               dates.values[recovery].astype('datetime64[D]') + 1).astype(float)
+    duration[~recovered] = np.nan
+
+    df_drawdowns = pd.DataFrame(index=list(range(top)),
+                                columns=['Net drawdown in %',
+                                         'Peak date',
+                                         'Valley date',
+                                         'Recovery date',
+                                         'Duration'])
+    rows = np.arange(pick.shape[0])
+    df_drawdowns.loc[rows, 'Net drawdown in %'] = (cum[peak] - cum[valley]) / cum[peak] * 100
+    df_drawdowns.loc[rows, 'Duration'] = duration
+    df_drawdowns['Peak date'] = pd.Series(peak_date, index=rows)
+    df_drawdowns['Valley date'] = pd.Series(dates.values[valley], index=rows)
+    df_drawdowns['Recovery date'] = pd.Series(recovery_date, index=rows)
+    return df_drawdowns
+
+
+def _live_start(returns, live_start_date):
+    """把 live_start_date 转为与收益率索引相同时区的 Timestamp"""
+    live_start_date = pd.Timestamp(live_start_date)
+    index_tz = getattr(returns.index, 'tz', None)
+    if index_tz is None:
+        return live_start_date.tz_convert(None) if live_start_date.tz is not None else live_start_date
+    if live_start_date.tz is None:
+        return live_start_date.tz_localize('UTC').tz_convert(index_tz)
+    return live_start_date.tz_convert(index_tz)
+
+
+def show_worst_drawdown_periods(returns, top=5, use_pyfolio=False):
     """
     Prints information about the worst drawdown periods.
 
@@ -37,9 +530,16 @@ def show_worst_drawdown_periods(returns, top=5):
          - See full explanation in tears.create_full_tear_sheet.
     top : int, optional
         Amount of top drawdowns periods to plot (default 5).
+    use_pyfolio : bool, optional
+        Use pyfolio.timeseries.gen_drawdown_table instead of the native
+        implementation, for cross-checking.
     """
 
-    drawdown_df = timeseries.gen_drawdown_table(returns, top=top)
+    if use_pyfolio:
+        from pyfolio import timeseries
+        drawdown_df = timeseries.gen_drawdown_table(returns, top=top)
+    else:
+        drawdown_df = gen_drawdown_table(returns, top=top)
     #     utils.print_table(
     #         drawdown_df.sort_values('Net drawdown in %', ascending=False),
     #         name='Worst drawdown periods',
@@ -51,7 +551,8 @@ def show_worst_drawdown_periods(returns, top=5):
 def show_perf_stats(returns, factor_returns=None, positions=None,
                     transactions=None, turnover_denom='AGB',
                     live_start_date=None, bootstrap=False,
-                    header_rows=None):
+                    header_rows=None, use_pyfolio=False,
+                    n_samples=1000, seed=None, processes=None):
     """
     Prints some performance metrics of the strategy.
 
@@ -84,16 +585,30 @@ def show_perf_stats(returns, factor_returns=None, positions=None,
         its backtest period.
     bootstrap : boolean, optional
         Whether to perform bootstrap analysis for the performance
-        metrics.
-         - For more information, see timeseries.perf_stats_bootstrap
+        metrics; each column becomes mean, median, 5% and 95% of the
+        bootstrap distribution.
+         - For more information, see perf_stats_bootstrap
     header_rows : dict or OrderedDict, optional
         Extra rows to display at the top of the displayed table.
+    use_pyfolio : bool, optional
+        Use pyfolio.timeseries.perf_stats instead of the native
+        implementation, for cross-checking.
+    n_samples : int, optional
+        Number of bootstrap samples when bootstrap is True.
+    seed : int, optional
+        Seed of the bootstrap resample indices.
+    processes : int, optional
+        Worker processes for the bootstrap, see perf_stats_bootstrap.
     """
 
     if bootstrap:
-        perf_func = timeseries.perf_stats_bootstrap
-    else:
+        perf_func = partial(perf_stats_bootstrap, n_samples=n_samples,
+                            seed=seed, processes=processes)
+    elif use_pyfolio:
+        from pyfolio import timeseries
         perf_func = timeseries.perf_stats
+    else:
+        perf_func = perf_stats
 
     perf_stats_all = perf_func(
         returns,
@@ -108,7 +623,7 @@ def show_perf_stats(returns, factor_returns=None, positions=None,
         date_rows['End date'] = returns.index[-1].strftime('%Y-%m-%d')
 
     if live_start_date is not None:
-        live_start_date = ep.utils.get_utc_timestamp(live_start_date)
+        live_start_date = _live_start(returns, live_start_date)
         returns_is = returns[returns.index < live_start_date]
         returns_oos = returns[returns.index >= live_start_date]
 
@@ -145,7 +660,7 @@ def show_perf_stats(returns, factor_returns=None, positions=None,
             date_rows['Out-of-sample months'] = int(len(returns_oos) /
                                                     APPROX_BDAYS_PER_MONTH)
 
-        perf_stats = pd.concat(OrderedDict([
+        perf_stats_df = pd.concat(OrderedDict([
             ('In-sample', perf_stats_is),
             ('Out-of-sample', perf_stats_oos),
             ('All', perf_stats_all),
@@ -154,11 +669,14 @@ def show_perf_stats(returns, factor_returns=None, positions=None,
         if len(returns.index) > 0:
             date_rows['Total months'] = int(len(returns) /
                                             APPROX_BDAYS_PER_MONTH)
-        perf_stats = pd.DataFrame(perf_stats_all, columns=['Backtest'])
+        if bootstrap:
+            perf_stats_df = perf_stats_all
+        else:
+            perf_stats_df = pd.DataFrame(perf_stats_all, columns=['Backtest'])
 
-    # for column in perf_stats.columns:
-    #     for stat, value in perf_stats[column].iteritems():
+    # for column in perf_stats_df.columns:
+    #     for stat, value in perf_stats_df[column].iteritems():
     #         if stat in STAT_FUNCS_PCT:
-    #             perf_stats.loc[stat, column] = str(np.round(value * 100, 3)) + '%'
+    #             perf_stats_df.loc[stat, column] = str(np.round(value * 100, 3)) + '%'
 
-    return perf_stats
+    return perf_stats_df
@@ -0,0 +1,163 @@
+# -*- coding:utf-8 -*-
+"""
+结算记录：列式预分配数组，账户汇总与持仓明细(长表)分开存储
+filename : paper_settle.py
+createtime : 2026/10/18 11:26
+author : Demon Finch
+"""
+import warnings
+import numpy as np
+import pandas as pd
+
+
+class SETTLE_LEVEL:
+    """
+    结算记录粒度
+    ACCOUNT 只记录账户汇总
+    POSITION 同时记录每只持仓的明细
+    """
+    ACCOUNT = "account"
+    POSITION = "position"
+
+
+class Papersettle:
+    """
+    结算历史记录器
+    账户汇总字段存放在一个 (bar数, 字段数) 的float64二维数组中，to_frame()直接以视图构建DataFrame；
+    持仓明细为长表：每行一个(结算时间, 持仓)
+    """
+    account_columns = ["all_money", "positon_money", "frozen_money", "cash_available", "all_float_profit"]
+    position_columns = ["cost_money", "gpye", "djsl", "kyye", "dividend_money"]
+
+    def __init__(self,
+                 level: str = SETTLE_LEVEL.POSITION,
+                 every: int = 1,
+                 only_changed: bool = False,
+                 capacity: int = 1024):
+        """
+        :param level: 记录粒度：类 SETTLE_LEVEL
+        :param every: 每N次结算记录一次
+        :param only_changed: 只记录自上次记录以来有委托、成交或分红的bar
+        :param capacity: 预分配的结算行数，不足时翻倍扩容
+        """
+        self.level = level
+        self.every = every
+        self.only_changed = only_changed
+        self.settle_count = 0
+
+        self._size = 0
+        self._datetime = np.empty(capacity, dtype="datetime64[ns]")
+        self._values = np.empty((capacity, len(self.account_columns)))
+
+        self._position_size = 0
+        self._position_datetime = np.empty(capacity, dtype="datetime64[ns]")
+        self._position_slot = np.empty(capacity, dtype=np.int64)
+        self._position_values = np.empty((capacity, len(self.position_columns)))
+        self._codes = []  # 槽位 -> code，指向账户价格表的代码列表
+
+    def __len__(self):
+        return self._size
+
+    def __getstate__(self):
+        """快照时只保存已写入的行"""
+        state = self.__dict__.copy()
+        for name in ("_datetime", "_values"):
+            state[name] = state[name][:max(self._size, 1)]
+        for name in ("_position_datetime", "_position_slot", "_position_values"):
+            state[name] = state[name][:max(self._position_size, 1)]
+        return state
+
+    def rows_since(self, size: int, position_size: int) -> tuple:
+        """
+        第 size 行之后的账户汇总与第 position_size 行之后的持仓明细，供增量导出
+        :return: (账户汇总 {列名: 数组}, 持仓明细 {列名: 数组})，均含 datetime 列，持仓明细含 code 列
+        """
+        account_rows = {"datetime": self._datetime[size:self._size].copy()}
+        for column, name in enumerate(self.account_columns):
+            account_rows[name] = self._values[size:self._size, column].copy()
+        codes = np.asarray(self._codes, dtype=object)
+        position_rows = {"datetime": self._position_datetime[position_size:self._position_size].copy(),
+                         "code": codes[self._position_slot[position_size:self._position_size]]}
+        for column, name in enumerate(self.position_columns):
+            position_rows[name] = self._position_values[position_size:self._position_size, column].copy()
+        return account_rows, position_rows
+
+    def clear(self):
+        """丢弃已记录的行(已导出后用于限制内存)，结算计数不变"""
+        self._size = 0
+        self._position_size = 0
+
+    def rebase_slots(self, price_board):
+        """账户改用另一张价格表时，把已记录持仓明细的槽位换算到新表"""
+        if self._position_size:
+            codes = np.asarray(self._codes, dtype=object)[self._position_slot[:self._position_size]]
+            self._position_slot[:self._position_size] = price_board.get_slots(codes)
+        self._codes = price_board.codes
+
+    @staticmethod
+    def _grow(array: np.ndarray, size: int) -> np.ndarray:
+        new_array = np.empty((max(size, array.shape[0] * 2),) + array.shape[1:], dtype=array.dtype)
+        new_array[:array.shape[0]] = array
+        return new_array
+
+    def record(self, account, changed: bool = True) -> bool:
+        """
+        记录一次结算
+        :param account: Papertest
+        :param changed: 自上次记录以来账户是否有委托、成交或分红
+        :return: 本次是否写入
+        """
+        self.settle_count += 1
+        if self.settle_count % self.every != 0 or (self.only_changed and not changed):
+            return False
+
+        if self._size == self._values.shape[0]:
+            self._datetime = self._grow(self._datetime, self._size + 1)
+            self._values = self._grow(self._values, self._size + 1)
+        self._datetime[self._size] = account.current_time
+        self._values[self._size] = (account.all_money, account.positon_money, account.frozen_money,
+                                    account.cash_available, account.all_float_profit)
+        self._size += 1
+
+        if self.level == SETTLE_LEVEL.POSITION:
+            positions = account.get_current_position
+            end = self._position_size + len(positions)
+            if end > self._position_values.shape[0]:
+                self._position_datetime = self._grow(self._position_datetime, end)
+                self._position_slot = self._grow(self._position_slot, end)
+                self._position_values = self._grow(self._position_values, end)
+            self._position_datetime[self._position_size:end] = account.current_time
+            for row, posii in enumerate(positions.values(), self._position_size):
+                self._position_slot[row] = posii._price_slot
+                self._position_values[row] = (posii.cost_money, posii.gpye, posii.djsl, posii.kyye,
+                                              posii.dividend_money)
+            self._position_size = end
+            self._codes = account.code_current_price.codes
+        return True
+
+    def to_frame(self) -> pd.DataFrame:
+        """账户汇总DataFrame，以结算时间为索引，数值列为内部数组的视图"""
+        return pd.DataFrame(self._values[:self._size],
+                            index=pd.DatetimeIndex(self._datetime[:self._size], name="datetime"),
+                            columns=self.account_columns,
+                            copy=False)
+
+    def position_frame(self) -> pd.DataFrame:
+        """持仓明细长表：datetime, code, cost_money, gpye, djsl, kyye, dividend_money"""
+        position_frame = pd.DataFrame(self._position_values[:self._position_size],
+                                      columns=self.position_columns)
+        codes = np.asarray(self._codes, dtype=object)
+        position_frame.insert(0, "code", codes[self._position_slot[:self._position_size]])
+        position_frame.insert(0, "datetime", self._position_datetime[:self._position_size])
+        return position_frame
+
+    def returns(self) -> pd.Series:
+        """
+        按结算记录计算的收益率序列，每日结算一次且逐bar记录时可直接传入 show_perf_stats。
+        every>1 或 only_changed 时记录不是逐日的，收益率为相邻记录之间的区间收益，
+        show_perf_stats 按日收益年化的结果不正确，此时发出警告；逐日指标用 Papertest.metrics(每次结算都更新)
+        """
+        if self.every > 1 or self.only_changed:
+            warnings.warn("结算记录不是逐日的(every>1 或 only_changed)，收益率为相邻记录的区间收益，不能按日收益年化",
+                          RuntimeWarning, stacklevel=2)
+        return self.to_frame()["all_money"].pct_change().dropna()
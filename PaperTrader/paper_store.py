@@ -0,0 +1,177 @@
+# -*- coding:utf-8 -*-
+"""
+列式二进制行情库：每个字段一个内存映射的.npy文件，附按日期、按代码的偏移索引
+filename : paper_store.py
+createtime : 2026/10/18 15:10
+author : Demon Finch
+"""
+import os
+import json
+import numpy as np
+import pandas as pd
+
+_store_version = 1
+
+
+def _column_values(series: pd.Series) -> np.ndarray:
+    """
+    列转为可写入.npy或共享内存的numpy数组：
+    数值、布尔与日期列保持原类型(含缺失值的布尔/整数列转为float，缺失为nan)，
+    object列只有元素全为数值或布尔(可含缺失值)时才转为float，其余(含 "000300"、"1e3" 这类字符串)存为定长字符串
+    """
+    dtype = series.dtype
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return series.values
+    if isinstance(dtype, np.dtype) and dtype != object:
+        return series.values
+    if dtype != object and (pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_numeric_dtype(dtype)):
+        # Int64、boolean 等扩展类型
+        if series.isna().any():
+            return series.to_numpy(dtype=float, na_value=np.nan)
+        return series.to_numpy(dtype=getattr(dtype, "numpy_dtype", None))
+    values = series.to_numpy(dtype=object)
+    missing = pd.isna(values)
+    if pd.api.types.infer_dtype(values, skipna=True) in ("boolean", "integer", "floating", "mixed-integer-float"):
+        numbers = np.full(values.shape[0], np.nan)
+        numbers[~missing] = values[~missing].astype(float)
+        return numbers
+    values[missing] = ""
+    return values.astype(str)
+
+
+def write_barstore(data, path: str,
+                   date_column: str = "date",
+                   code_column: str = "code",
+                   date_format: str = "%Y-%m-%d") -> "Paperstore":
+    """
+    把行情数据转换为 Paperstore 目录
+    行按(日期, 代码)排序；日期存为int64天数(1970-01-01起)，代码字典编码为int32
+    :param data: 行情DataFrame或csv路径
+    :param path: 输出目录
+    :param date_column: 日期列
+    :param code_column: 代码列
+    :param date_format: 日期列为字符串时的格式
+    :return: Paperstore
+    """
+    if isinstance(data, str):
+        data = pd.read_csv(data)
+    dates = data[date_column].values
+    if not pd.api.types.is_datetime64_any_dtype(data[date_column]):
+        dates = pd.to_datetime(data[date_column], format=date_format).values
+    days = dates.astype("datetime64[D]").astype(np.int64)
+    code_values, code_ids = np.unique(data[code_column].values, return_inverse=True)
+    code_ids = code_ids.astype(np.int32)
+    order = np.lexsort((code_ids, days))
+    days, code_ids = days[order], code_ids[order]
+
+    os.makedirs(path, exist_ok=True)
+    fields = [name for name in data.columns if name not in (date_column, code_column)]
+    for name in fields:
+        np.save(os.path.join(path, f"{name}.npy"), _column_values(data[name])[order])
+    np.save(os.path.join(path, "date.npy"), days)
+    np.save(os.path.join(path, "code.npy"), code_ids)
+
+    # 按日期偏移：date_index[i] 的行为 [date_offset[i], date_offset[i+1])
+    date_index, date_start = np.unique(days, return_index=True)
+    np.save(os.path.join(path, "date_index.npy"), date_index)
+    np.save(os.path.join(path, "date_offset.npy"), np.append(date_start, days.shape[0]).astype(np.int64))
+    # 按代码偏移：code_rows[code_offset[c]:code_offset[c+1]] 为代码c按日期排序的行号
+    code_rows = np.argsort(code_ids, kind="stable").astype(np.int64)
+    code_offset = np.searchsorted(code_ids[code_rows], np.arange(code_values.shape[0] + 1))
+    np.save(os.path.join(path, "code_rows.npy"), code_rows)
+    np.save(os.path.join(path, "code_offset.npy"), code_offset.astype(np.int64))
+
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as meta_file:
+        json.dump({"version": _store_version,
+                   "rows": int(days.shape[0]),
+                   "date_column": date_column,
+                   "code_column": code_column,
+                   "fields": fields,
+                   "codes": code_values.tolist()}, meta_file, ensure_ascii=False)
+    return Paperstore(path)
+
+
+class Paperstore:
+    """
+    内存映射的列式行情库，由 write_barstore 生成
+    按日期区间取数返回内存映射数组的切片视图(零拷贝)；按代码取数通过代码行号索引读取
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as meta_file:
+            self.meta = json.load(meta_file)
+        self.date_column = self.meta["date_column"]
+        self.code_column = self.meta["code_column"]
+        self.fields = self.meta["fields"]
+        self.codes = np.asarray(self.meta["codes"])
+        self.code_slot = {codei: sloti for sloti, codei in enumerate(self.meta["codes"])}
+
+        self._columns = {name: self._load(name) for name in self.fields}
+        self.day = self._load("date")
+        self.code_id = self._load("code")
+        self.date_index = self._load("date_index")
+        self.date_offset = self._load("date_offset")
+        self.code_rows = self._load("code_rows")
+        self.code_offset = self._load("code_offset")
+
+    def _load(self, name: str) -> np.ndarray:
+        return np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    @property
+    def dates(self) -> np.ndarray:
+        """全部交易日 datetime64[D]"""
+        return self.date_index.view("datetime64[D]")
+
+    def _row_range(self, start=None, end=None) -> tuple:
+        """日期区间 [start, end] 对应的行区间"""
+        lo = 0 if start is None else np.searchsorted(self.date_index, np.datetime64(start, "D").astype(np.int64))
+        hi = (self.date_index.shape[0] if end is None else
+              np.searchsorted(self.date_index, np.datetime64(end, "D").astype(np.int64), side="right"))
+        return self.date_offset[lo], self.date_offset[hi]
+
+    def _rows(self, rows, decode_codes: bool) -> dict:
+        bar = {self.date_column: self.day[rows].view("datetime64[D]"),
+               self.code_column: self.codes[self.code_id[rows]] if decode_codes else self.code_id[rows]}
+        for name in self.fields:
+            bar[name] = self._columns[name][rows]
+        return bar
+
+    def select(self, start=None, end=None, codes=None, decode_codes: bool = True) -> dict:
+        """
+        按日期区间与代码取数
+        :param start: 起始日期(含)
+        :param end: 结束日期(含)
+        :param codes: 代码列表，None为全部代码；指定时返回按(日期, 代码)排序的拷贝
+        :param decode_codes: 代码列是否解码为原始代码，False时返回int32编码
+        :return: {列名: numpy数组}，codes为None时除代码列外均为内存映射视图
+        """
+        row_start, row_end = self._row_range(start, end)
+        if codes is None:
+            return self._rows(slice(row_start, row_end), decode_codes)
+        slots = [self.code_slot[codei] for codei in codes if codei in self.code_slot]
+        rows = np.concatenate([np.zeros(0, dtype=np.int64)] +
+                              [self.code_rows[self.code_offset[sloti]:self.code_offset[sloti + 1]] for sloti in slots])
+        rows = np.sort(rows[(rows >= row_start) & (rows < row_end)])
+        return self._rows(rows, decode_codes)
+
+    def chunks(self, start=None, end=None, dates_per_chunk: int = 250, decode_codes: bool = True):
+        """
+        按交易日分块产出，可直接传入 Paperengine.run
+        :param dates_per_chunk: 每块包含的交易日数
+        :return: 生成器 {列名: numpy数组}
+        """
+        row_start, row_end = self._row_range(start, end)
+        lo, hi = np.searchsorted(self.date_offset, [row_start, row_end])
+        for chunk_lo in range(lo, hi, dates_per_chunk):
+            chunk_hi = min(chunk_lo + dates_per_chunk, hi)
+            yield self._rows(slice(self.date_offset[chunk_lo], self.date_offset[chunk_hi]), decode_codes)
+
+    def to_frame(self, start=None, end=None, codes=None) -> pd.DataFrame:
+        """取数并转为DataFrame，列顺序为 日期、代码、其余字段"""
+        bar = self.select(start, end, codes)
+        bar[self.date_column] = bar[self.date_column].astype("datetime64[ns]")
+        return pd.DataFrame(bar, columns=[self.date_column, self.code_column] + self.fields)
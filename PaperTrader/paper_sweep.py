@@ -0,0 +1,150 @@
+# -*- coding:utf-8 -*-
+"""
+参数扫描：行情数据放入共享内存一次，多进程并行运行多组回测配置
+filename : paper_sweep.py
+createtime : 2026/10/18 13:52
+author : Demon Finch
+"""
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from .paper_account import Papertest
+from .paper_engine import Paperengine
+from .paper_settle import SETTLE_LEVEL
+from .paper_store import _column_values
+from .paper_xdxr import Paperxdxr
+
+account_params = ("initcash", "commisson", "tax_percent", "t")
+
+_worker_state = dict()  # 子进程内：共享内存列视图、策略工厂等
+
+
+def _share_columns(data: pd.DataFrame, code_column: str, blocks: list) -> list:
+    """
+    把DataFrame各列复制进共享内存，返回列描述；新建的共享内存块立即追加到 blocks，出错时由调用方释放。
+    代码列字典编码为int32，子进程按代码表还原，代码原样保留(不经过数值转换)
+    """
+    specs = []
+    for name in data.columns:
+        categories = None
+        if name == code_column:
+            column, categories = pd.factorize(data[name])
+            column, categories = column.astype(np.int32), categories.to_numpy()
+        else:
+            column = _column_values(data[name])
+        block = shared_memory.SharedMemory(create=True, size=max(column.nbytes, 1))
+        blocks.append(block)
+        np.ndarray(column.shape, dtype=column.dtype, buffer=block.buf)[:] = column
+        specs.append((name, block.name, column.dtype.str, column.shape, categories))
+    return specs
+
+
+def _block_columns(blocks: list, specs: list) -> dict:
+    """共享内存块上的只读列视图，代码列还原为代码数组"""
+    columns = dict()
+    for block, (name, _, dtype, shape, categories) in zip(blocks, specs):
+        column = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        column.flags.writeable = False
+        columns[name] = column if categories is None else categories[column]
+    return columns
+
+
+def _attach_columns(specs: list) -> tuple:
+    """按列描述挂接共享内存，返回 (共享内存块列表, {列名: 只读数组视图})"""
+    blocks = [shared_memory.SharedMemory(name=spec[1]) for spec in specs]
+    return blocks, _block_columns(blocks, specs)
+
+
+def _init_worker(specs, strategy_factory, engine_kwargs, perf_stats):
+    _worker_state["blocks"], _worker_state["columns"] = _attach_columns(specs)
+    _worker_state["strategy_factory"] = strategy_factory
+    _worker_state["engine_kwargs"] = engine_kwargs
+    _worker_state["perf_stats"] = perf_stats
+
+
+def _run_config(config: dict) -> dict:
+    """子进程内运行一组配置，返回结算摘要与绩效指标"""
+    account_kwargs = {key: value for key, value in config.items() if key in account_params}
+    strategy_kwargs = {key: value for key, value in config.items() if key not in account_params}
+    account = Papertest(settle_level=SETTLE_LEVEL.ACCOUNT, **account_kwargs)
+    engine = Paperengine(account, _worker_state["strategy_factory"](**strategy_kwargs),
+                         **_worker_state["engine_kwargs"])
+    engine.run(_worker_state["columns"])
+
+    settle_frame = account.settle_history.to_frame()
+    summary = dict(config)
+    summary["bars"] = len(settle_frame)
+    summary["orders"] = account.order.order_count
+    if len(settle_frame):
+        summary["final_money"] = settle_frame["all_money"].iloc[-1]
+        summary["max_money"] = settle_frame["all_money"].max()
+        summary["min_money"] = settle_frame["all_money"].min()
+    if _worker_state["perf_stats"] and len(settle_frame) > 2:
+        from .paper_pyfolio import show_perf_stats
+        summary.update(show_perf_stats(account.settle_history.returns())["Backtest"].to_dict())
+    return summary
+
+
+class Papersweep:
+    """
+    参数扫描
+    行情数据只解析一次并放入共享内存，子进程挂接只读视图，不再各自读取csv；
+    每组配置中 initcash/commisson/tax_percent/t 用于构建 Papertest，其余参数传给策略工厂
+    """
+
+    def __init__(self,
+                 data: pd.DataFrame,
+                 strategy_factory,
+                 dividend: pd.DataFrame = None,
+                 processes: int = None,
+                 perf_stats: bool = True,
+                 **engine_kwargs):
+        """
+        :param data: 按日期排序的行情DataFrame，格式同 Paperengine
+        :param strategy_factory: 策略工厂 strategy_factory(**strategy_params) -> strategy(account, date, bar)，需可pickle
+        :param dividend: 除权除息表或 Paperxdxr，只构建一次后分发给各进程
+        :param processes: 进程数，默认CPU核数；为1时在当前进程串行运行
+        :param perf_stats: 是否计算 show_perf_stats 绩效指标
+        :param engine_kwargs: 其余 Paperengine 参数
+        """
+        date_column = engine_kwargs.get("date_column", "date")
+        date_format = engine_kwargs.get("date_format", "%Y-%m-%d")
+        if not pd.api.types.is_datetime64_any_dtype(data[date_column]):
+            data = data.assign(**{date_column: pd.to_datetime(data[date_column], format=date_format)})
+        self.data = data
+        self.strategy_factory = strategy_factory
+        self.processes = processes
+        self.perf_stats = perf_stats
+        if isinstance(dividend, pd.DataFrame):
+            dividend = Paperxdxr(dividend, date_format)
+        self.engine_kwargs = dict(engine_kwargs, dividend=dividend)
+
+    def run(self, configs: list) -> pd.DataFrame:
+        """
+        :param configs: 配置字典列表，如 [{"commisson": 0.0003, "t": 1, "window": 20}]
+        :return: 每组配置一行的结果表
+        """
+        blocks = []
+        try:
+            specs = _share_columns(self.data, self.engine_kwargs.get("code_column", "code"), blocks)
+            if self.processes == 1:
+                _worker_state.update(columns=_block_columns(blocks, specs),
+                                     strategy_factory=self.strategy_factory,
+                                     engine_kwargs=self.engine_kwargs,
+                                     perf_stats=self.perf_stats)
+                try:
+                    results = [_run_config(config) for config in configs]
+                finally:
+                    _worker_state.clear()
+            else:
+                with ProcessPoolExecutor(max_workers=self.processes,
+                                         initializer=_init_worker,
+                                         initargs=(specs, self.strategy_factory, self.engine_kwargs,
+                                                   self.perf_stats)) as executor:
+                    results = list(executor.map(_run_config, configs))
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+        return pd.DataFrame(results)
@@ -0,0 +1,209 @@
+# -*- coding:utf-8 -*-
+"""
+信号列策略的向量化回测：一次计算同一标的上的多组多空信号
+filename : paper_vector.py
+createtime : 2026/10/18 13:05
+author : Demon Finch
+"""
+import numpy as np
+import pandas as pd
+from .paper_account import ORDER_DIRECTION
+
+
+class Papervector:
+    """
+    duo/kong 信号列策略的向量化回测，与 Papertest 逐笔模拟的示例策略结果一致：
+    duo 且空仓时以收盘价全仓买入(100股取整)；kong 时卖出全部可用余额；
+    持仓有分红时按开盘价估算数量、收盘价买入再投资；t+n 按自然日解冻。
+    时间维度逐bar推进，信号变体维度(K)为numpy向量运算，适合批量筛选同一标的上的信号变体
+    """
+
+    def __init__(self,
+                 initcash: float = 100000,
+                 commisson: float = 0.0001,
+                 tax_percent: float = 0.001,
+                 t: int = 1):
+        self.initcash = initcash
+        self.commisson = commisson
+        self.tax_percent = tax_percent
+        self.t = t
+
+        self.datetime = None
+        self.all_money = None
+        self.positon_money = None
+        self.cash_available = None
+        self.all_float_profit = None
+        self.gpye = None
+        self.trades = None
+
+    @staticmethod
+    def align_dividend(date: np.ndarray, code, dividend: pd.DataFrame) -> tuple:
+        """
+        把除权除息表对齐到bar
+        :param date: bar日期数组
+        :param code: 标的代码
+        :param dividend: 除权除息表，列：code, split, datetime, dividend
+        :return: (bar序号数组, 送转比例数组, 每股分红数组)，按bar序号排序
+        """
+        dividend = dividend[dividend["code"] == code]
+        days = np.asarray(date, dtype="datetime64[D]")
+        event_days = np.asarray(pd.to_datetime(dividend["datetime"].values), dtype="datetime64[D]")
+        bar_idx = np.searchsorted(days, event_days)
+        matched = (bar_idx < days.shape[0]) & (days[np.minimum(bar_idx, days.shape[0] - 1)] == event_days)
+        order = np.argsort(bar_idx[matched], kind="stable")
+        return (bar_idx[matched][order],
+                dividend["split"].values[matched][order].astype(float),
+                dividend["dividend"].values[matched][order].astype(float))
+
+    def run(self,
+            date: np.ndarray,
+            open_price: np.ndarray,
+            close: np.ndarray,
+            duo: np.ndarray,
+            kong: np.ndarray,
+            dividend: tuple = None):
+        """
+        :param date: bar日期数组 (T,)
+        :param open_price: 开盘价 (T,)
+        :param close: 收盘价 (T,)
+        :param duo: 做多信号 (T,) 或 (T, K)
+        :param kong: 做空信号 (T,) 或 (T, K)
+        :param dividend: align_dividend 的返回值
+        :return: self，结果为 (T, K) 数组属性与 trades 成交表
+        """
+        date = np.asarray(date, dtype="datetime64[ns]")
+        duo, kong = np.asarray(duo, dtype=bool), np.asarray(kong, dtype=bool)
+        if duo.ndim == 1:
+            duo, kong = duo[:, None], kong[:, None]
+        n_bar, n_var = duo.shape
+        commisson, tax_percent = self.commisson, self.tax_percent
+
+        days = date.astype("datetime64[D]").astype(np.int64)
+        release_bar = np.searchsorted(days, days + self.t)  # 第i根bar买入的批次在第release_bar[i]根bar解冻
+        release = np.zeros((n_bar + 1, n_var))
+
+        if dividend is None:
+            dividend = (np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0))
+        event_bar, event_split, event_dividend = dividend
+        event_pos = 0
+
+        cash = np.full(n_var, float(self.initcash))
+        gpye, djsl = np.zeros(n_var), np.zeros(n_var)
+        cost, dividend_money = np.zeros(n_var), np.zeros(n_var)
+
+        self.all_money = np.empty((n_bar, n_var))
+        self.positon_money = np.empty((n_bar, n_var))
+        self.cash_available = np.empty((n_bar, n_var))
+        self.all_float_profit = np.empty((n_bar, n_var))
+        self.gpye = np.empty((n_bar, n_var))
+        trades = []
+
+        for j in range(n_bar):
+            djsl -= release[j]
+
+            while event_pos < event_bar.shape[0] and event_bar[event_pos] == j:
+                dividend_cash = gpye * event_dividend[event_pos]
+                dividend_money += dividend_cash
+                cash += dividend_cash
+                gpye = gpye * (1 + event_split[event_pos])
+                event_pos += 1
+
+            price = close[j]
+            buy = duo[j] & (gpye == 0)
+            sell = ~duo[j] & kong[j] & (gpye - djsl > 0)
+            reinvest = ~duo[j] & ~kong[j] & (dividend_money > 0)
+
+            volume = np.zeros(n_var)
+            volume[buy] = np.ceil(cash[buy] / price / 100 / (1 + commisson)) * 100 - 100
+            volume[reinvest] = np.ceil(cash[reinvest] / open_price[j] / 100 / (1 + commisson)) * 100 - 100
+            reinvest &= volume > 0
+            buy |= reinvest
+            volume[sell] = (gpye - djsl)[sell]
+
+            if buy.any():
+                buy_money = price * volume[buy] * (1 + commisson)
+                cash[buy] -= buy_money
+                if release_bar[j] > j:  # t=0 时当日即解冻
+                    djsl[buy] += volume[buy]
+                    release[release_bar[j], buy] += volume[buy]
+                gpye[buy] += volume[buy]
+                trades.append((np.flatnonzero(buy), j, ORDER_DIRECTION.BUY, price, volume[buy],
+                               price * volume[buy] * commisson, 0.0, buy_money))
+            if sell.any():
+                sell_money = price * volume[sell] * (1 - commisson - tax_percent)
+                cash[sell] += sell_money
+                gpye[sell] += volume[sell] * (-1)
+                trades.append((np.flatnonzero(sell), j, ORDER_DIRECTION.SELL, price, volume[sell] * (-1),
+                               price * volume[sell] * commisson, price * volume[sell] * tax_percent, -sell_money))
+
+            traded = buy | sell
+            if traded.any():
+                # 与 Paperpositon.add_order 一致：成交后仍有持仓则累加成交金额为成本，持仓归零则重置
+                keep = traded & (gpye > 0)
+                cost[keep] += price * volume[keep] * (1 + commisson)
+                closed = traded & (gpye == 0)
+                if closed.any():
+                    cost[closed] = 0
+                    dividend_money[closed] = 0
+                    djsl[closed] = 0
+                    release[j + 1:, closed] = 0
+
+            holding = gpye > 0
+            positon_money = np.where(holding, gpye * price, 0.0)
+            self.positon_money[j] = positon_money
+            self.cash_available[j] = cash
+            self.all_money[j] = cash + positon_money
+            self.all_float_profit[j] = np.where(holding, positon_money - cost, 0.0)
+            self.gpye[j] = gpye
+
+        self.datetime = date
+        self.trades = self._trades_frame(trades, date)
+        return self
+
+    @staticmethod
+    def _trades_frame(trades: list, date: np.ndarray) -> pd.DataFrame:
+        columns = ["variant", "datetime", "order_type", "price", "volume", "commission", "tax", "money"]
+        if not trades:
+            return pd.DataFrame(columns=columns)
+        variant = np.concatenate([trade[0] for trade in trades])
+        repeat = [trade[0].shape[0] for trade in trades]
+        trades_frame = pd.DataFrame({
+            "variant": variant,
+            "datetime": np.repeat(date[[trade[1] for trade in trades]], repeat),
+            "order_type": np.repeat([trade[2] for trade in trades], repeat),
+            "price": np.repeat([trade[3] for trade in trades], repeat),
+            "volume": np.concatenate([trade[4] for trade in trades]),
+            "commission": np.concatenate([trade[5] for trade in trades]),
+            "tax": np.concatenate([np.broadcast_to(trade[6], trade[0].shape) for trade in trades]),
+            "money": np.concatenate([trade[7] for trade in trades])}, columns=columns)
+        return trades_frame.sort_values(["variant", "datetime"], kind="stable").reset_index(drop=True)
+
+    def run_frame(self, data: pd.DataFrame, dividend: pd.DataFrame = None, duo: str = "duo", kong: str = "kong"):
+        """
+        直接使用样本csv格式的单标的数据运行，含多个代码时抛出 ValueError(逐个代码分别运行)
+        :param data: 列：date, code, open, close, duo, kong
+        :param dividend: 除权除息表
+        :param duo: 做多信号列，或 (T, K) 信号数组
+        :param kong: 做空信号列，或 (T, K) 信号数组
+        """
+        if data["code"].nunique() > 1:
+            raise ValueError(f"run_frame 只支持单个标的，数据含 {data['code'].nunique()} 个代码")
+        date = np.asarray(pd.to_datetime(data["date"].values), dtype="datetime64[ns]")
+        aligned = None
+        if dividend is not None:
+            aligned = self.align_dividend(date, data["code"].values[0], dividend)
+        return self.run(date,
+                        data["open"].values,
+                        data["close"].values,
+                        data[duo].values if isinstance(duo, str) else duo,
+                        data[kong].values if isinstance(kong, str) else kong,
+                        aligned)
+
+    def to_frame(self, variant: int = 0) -> pd.DataFrame:
+        """单个信号变体的账户汇总，格式同 Papersettle.to_frame"""
+        return pd.DataFrame({"all_money": self.all_money[:, variant],
+                             "positon_money": self.positon_money[:, variant],
+                             "frozen_money": 0.0,
+                             "cash_available": self.cash_available[:, variant],
+                             "all_float_profit": self.all_float_profit[:, variant]},
+                            index=pd.DatetimeIndex(self.datetime, name="datetime"))
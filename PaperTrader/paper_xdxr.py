@@ -0,0 +1,69 @@
+# -*- coding:utf-8 -*-
+"""
+除权除息日历：由除权除息表一次性构建，按(日期, 代码)索引
+filename : paper_xdxr.py
+createtime : 2026/10/18 14:37
+author : Demon Finch
+"""
+import numpy as np
+import pandas as pd
+
+_epoch_ordinal = 719163  # 1970-01-01 的 date ordinal
+
+
+class Paperxdxr:
+    """
+    除权除息日历
+    事件按日期排序存放为numpy数组，日期以 date ordinal 表示，
+    账户推进时间时取当日的事件切片一次性处理
+    """
+
+    def __init__(self, dividend: pd.DataFrame, date_format: str = "%Y-%m-%d"):
+        """
+        :param dividend: 除权除息表，列：code, split, datetime, dividend；split、dividend 单位：每股
+        :param date_format: datetime列为字符串时的格式
+        """
+        dividend = dividend.reset_index(drop=True)
+        dates = dividend["datetime"].values
+        if not pd.api.types.is_datetime64_any_dtype(dividend["datetime"]):
+            dates = pd.to_datetime(dividend["datetime"], format=date_format).values
+        days = dates.astype("datetime64[D]").astype(np.int64) + _epoch_ordinal
+        order = np.argsort(days, kind="stable")
+
+        self.days = days[order]
+        self.codes = dividend["code"].values[order]
+        self.split = dividend["split"].values[order].astype(float)
+        self.dividend = dividend["dividend"].values[order].astype(float)
+
+        bounds = np.concatenate([[0], np.flatnonzero(self.days[1:] != self.days[:-1]) + 1, [self.days.shape[0]]])
+        self._day_slice = {self.days[start]: (start, end) for start, end in zip(bounds[:-1], bounds[1:])
+                           if start < end}
+        self._index = {(day, code): row for row, (day, code) in enumerate(zip(self.days, self.codes))}
+
+    def __len__(self):
+        return self.days.shape[0]
+
+    def __getitem__(self, key) -> dict:
+        """(日期, 代码) -> {"code", "split", "dividend"}"""
+        current_time, code = key
+        row = self._index[(current_time.toordinal(), code)]
+        return {"code": self.codes[row], "split": self.split[row], "dividend": self.dividend[row]}
+
+    def get(self, current_time) -> tuple:
+        """
+        获取某日全部事件
+        :return: (代码数组, 送转比例数组, 每股分红数组)，无事件时为None
+        """
+        day_slice = self._day_slice.get(current_time.toordinal())
+        if day_slice is None:
+            return None
+        start, end = day_slice
+        return self.codes[start:end], self.split[start:end], self.dividend[start:end]
+
+    def events(self, current_time) -> list:
+        """某日全部事件，格式同 Papertest.on_dividend 的参数"""
+        day_events = self.get(current_time)
+        if day_events is None:
+            return []
+        return [{"code": codei, "split": spliti, "dividend": dividendi}
+                for codei, spliti, dividendi in zip(*day_events)]
@@ -0,0 +1,10 @@
+# -*- coding:utf-8 -*-
+"""
+基准测试：合成行情上的回测场景与回归检查，命令行入口见 __main__.py
+filename : __init__.py
+createtime : 2026/10/18 20:15
+author : Demon Finch
+"""
+from .market import make_market
+from .scenarios import SCENARIOS
+from .runner import run_scenario, run_benchmarks, save_baseline, load_baseline, check_regression
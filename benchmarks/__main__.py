@@ -0,0 +1,44 @@
+# -*- coding:utf-8 -*-
+"""
+命令行：python -m benchmarks [--save baseline.json] [--check baseline.json]
+filename : __main__.py
+createtime : 2026/10/18 21:00
+author : Demon Finch
+"""
+import sys
+import argparse
+import pandas as pd
+from .scenarios import SCENARIOS
+from .runner import run_benchmarks, save_baseline, load_baseline, check_regression
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="PaperTrader 基准测试")
+    parser.add_argument("--codes", type=int, default=200, help="股票数量")
+    parser.add_argument("--days", type=int, default=250, help="交易日数量")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--repeat", type=int, default=3, help="计时次数，取最快一次")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="只运行指定场景，可重复")
+    parser.add_argument("--no-memory", action="store_true", help="不测量峰值内存")
+    parser.add_argument("--save", metavar="PATH", help="把结果保存为JSON基线")
+    parser.add_argument("--check", metavar="PATH", help="与JSON基线比较，有回归时返回码为1")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的相对变化")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.scenario, n_codes=args.codes, n_days=args.days, seed=args.seed,
+                             repeat=args.repeat, memory=not args.no_memory)
+    with pd.option_context("display.width", 200, "display.max_columns", 20):
+        print(results.round(3))
+    if args.save:
+        save_baseline(results, args.save)
+    if args.check:
+        regressions = check_regression(results, load_baseline(args.check), args.tolerance)
+        for regression in regressions:
+            print("回归:", regression)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
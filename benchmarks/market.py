@@ -0,0 +1,84 @@
+# -*- coding:utf-8 -*-
+"""
+合成A股行情：N只股票 × M个交易日的未复权bar、均线信号与除权除息事件，由随机种子完全确定
+filename : market.py
+createtime : 2026/10/18 20:20
+author : Demon Finch
+"""
+import numpy as np
+import pandas as pd
+
+
+def make_market(n_codes: int = 500,
+                n_days: int = 500,
+                seed: int = 0,
+                start: str = "2010-01-04",
+                xdxr_per_year: float = 1.0,
+                fast: int = 5,
+                slow: int = 20) -> tuple:
+    """
+    生成合成行情
+    日收益率正态分布并截断在±10%涨跌停内；价格按0.01取整；除权除息日价格按
+    (前收盘 - 每股分红) / (1 + 送转比例) 整体下调，与未复权数据一致
+    :param n_codes: 股票数量
+    :param n_days: 交易日数量
+    :param seed: 随机种子
+    :param start: 起始日期
+    :param xdxr_per_year: 每只股票每年平均除权除息次数
+    :param fast: duo/kong 信号的短均线窗口
+    :param slow: duo/kong 信号的长均线窗口
+    :return: (bars, dividend)
+             bars 按(date, code)排序，列：date, code, open, high, low, close, volume, duo, kong
+             dividend 列：code, split, datetime, dividend，格式同除权除息.csv
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start, periods=n_days)
+    codes = np.array([f"{600000 + i:06d}" for i in range(n_codes)], dtype=object)
+
+    returns = np.clip(rng.normal(0.0003, 0.02, (n_days, n_codes)), -0.1, 0.1)
+    growth = np.exp(np.cumsum(np.log1p(returns), axis=0))
+    close = rng.uniform(5, 50, n_codes) * growth
+
+    # 除权除息事件：每只股票按泊松次数随机落在交易日上(首日除外)
+    n_events = rng.poisson(xdxr_per_year * n_days / 252, n_codes)
+    event_code = np.repeat(np.arange(n_codes), n_events)
+    event_day = rng.integers(1, max(n_days, 2), event_code.shape[0])
+    event_key = np.unique(event_day * n_codes + event_code)
+    event_day, event_code = event_key // n_codes, event_key % n_codes
+    split = rng.choice([0.0, 0.0, 0.0, 0.2, 0.3, 0.5, 1.0], event_code.shape[0])
+    dividend_ratio = rng.uniform(0.005, 0.03, event_code.shape[0])  # 每股分红 / 前收盘
+    factor = np.ones((n_days, n_codes))
+    factor[event_day, event_code] = (1 - dividend_ratio) / (1 + split)
+    close = close * np.cumprod(factor, axis=0)
+    dividend = np.round(close[event_day - 1, event_code] * dividend_ratio, 2)
+    close = np.maximum(np.round(close, 2), 0.01)
+
+    prev = np.vstack([close[:1], close[:-1]]) * factor
+    open_price = np.round(np.clip(prev * (1 + rng.normal(0, 0.005, close.shape)), prev * 0.9, prev * 1.1), 2)
+    high = np.round(np.maximum(open_price, close) * (1 + np.abs(rng.normal(0, 0.008, close.shape))), 2)
+    low = np.round(np.minimum(open_price, close) * (1 - np.abs(rng.normal(0, 0.008, close.shape))), 2)
+    volume = np.round(rng.lognormal(11, 1, close.shape) / 100) * 100
+
+    # 均线信号
+    cumsum = np.vstack([np.zeros((1, n_codes)), np.cumsum(close, axis=0)])
+    fast_ma = (cumsum[fast:] - cumsum[:-fast]) / fast
+    slow_ma = (cumsum[slow:] - cumsum[:-slow]) / slow
+    duo = np.zeros(close.shape, dtype=bool)
+    kong = np.zeros(close.shape, dtype=bool)
+    duo[slow - 1:] = fast_ma[slow - fast:] > slow_ma
+    kong[slow - 1:] = fast_ma[slow - fast:] < slow_ma
+
+    bars = pd.DataFrame({"date": np.repeat(dates.values, n_codes),
+                         "code": np.tile(codes, n_days),
+                         "open": open_price.ravel(),
+                         "high": high.ravel(),
+                         "low": low.ravel(),
+                         "close": close.ravel(),
+                         "volume": volume.ravel(),
+                         "duo": duo.ravel(),
+                         "kong": kong.ravel()})
+    dividend_frame = pd.DataFrame({"code": codes[event_code],
+                                   "split": split,
+                                   "datetime": dates.values[event_day],
+                                   "dividend": dividend})
+    return bars, dividend_frame.sort_values(["datetime", "code"]).reset_index(drop=True)
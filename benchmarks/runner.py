@@ -0,0 +1,133 @@
+# -*- coding:utf-8 -*-
+"""
+基准运行与回归检查：吞吐量(bars/秒、委托/秒)与峰值内存，结果保存为JSON基线
+filename : runner.py
+createtime : 2026/10/18 20:50
+author : Demon Finch
+"""
+import gc
+import json
+import time
+import platform
+import tracemalloc
+import numpy as np
+import pandas as pd
+from .market import make_market
+from .scenarios import SCENARIOS
+
+_markets = dict()  # (n_codes, n_days, seed, xdxr_per_year) -> (bars, dividend)
+
+
+def _market(n_codes: int, n_days: int, seed: int, xdxr_per_year: float) -> tuple:
+    key = (n_codes, n_days, seed, xdxr_per_year)
+    if key not in _markets:
+        _markets[key] = make_market(n_codes, n_days, seed, xdxr_per_year=xdxr_per_year)
+    return _markets[key]
+
+
+def run_scenario(name: str,
+                 n_codes: int = 200,
+                 n_days: int = 250,
+                 seed: int = 0,
+                 repeat: int = 3,
+                 memory: bool = True) -> dict:
+    """
+    运行一个场景
+    计时取 repeat 次中最快的一次，计时期间不开启 tracemalloc；峰值内存另跑一次测量
+    :param name: 场景名，见 SCENARIOS
+    :param n_codes: 股票数量
+    :param n_days: 交易日数量
+    :param seed: 随机种子
+    :param repeat: 计时次数
+    :param memory: 是否测量峰值内存
+    :return: {scenario, codes, days, seed, bars, orders, seconds, bars_per_sec, orders_per_sec, peak_memory_mb}
+    """
+    _, build, xdxr_per_year = SCENARIOS[name]
+    bars, dividend = _market(n_codes, n_days, seed, xdxr_per_year)
+
+    seconds, orders = np.inf, 0
+    for _ in range(max(repeat, 1)):
+        engine = build(bars, dividend, seed)
+        gc.collect()
+        start = time.perf_counter()
+        engine.run(bars)
+        elapsed = time.perf_counter() - start
+        if elapsed < seconds:
+            seconds, orders = elapsed, engine.account.order.order_count
+
+    result = {"scenario": name,
+              "codes": n_codes,
+              "days": n_days,
+              "seed": seed,
+              "bars": len(bars),
+              "orders": orders,
+              "seconds": seconds,
+              "bars_per_sec": len(bars) / seconds,
+              "orders_per_sec": orders / seconds,
+              "peak_memory_mb": np.nan}
+    if memory:
+        engine = build(bars, dividend, seed)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            engine.run(bars)
+            result["peak_memory_mb"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def run_benchmarks(scenarios: list = None, **params) -> pd.DataFrame:
+    """
+    运行多个场景
+    :param scenarios: 场景名列表，默认全部
+    :param params: 传给 run_scenario 的参数
+    :return: DataFrame，索引为场景名
+    """
+    names = list(SCENARIOS) if scenarios is None else scenarios
+    return pd.DataFrame([run_scenario(name, **params) for name in names]).set_index("scenario")
+
+
+def save_baseline(results: pd.DataFrame, path: str):
+    """结果连同运行环境写入JSON基线"""
+    baseline = {"environment": {"python": platform.python_version(),
+                                "numpy": np.__version__,
+                                "pandas": pd.__version__,
+                                "machine": platform.machine(),
+                                "created": pd.Timestamp.now().isoformat(timespec="seconds")},
+                "results": json.loads(results.reset_index().to_json(orient="records"))}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2)
+
+
+def load_baseline(path: str) -> pd.DataFrame:
+    with open(path, encoding="utf-8") as f:
+        return pd.DataFrame(json.load(f)["results"]).set_index("scenario")
+
+
+def check_regression(results: pd.DataFrame, baseline: pd.DataFrame, tolerance: float = 0.2) -> list:
+    """
+    与基线比较
+    bars_per_sec / orders_per_sec 低于基线 (1 - tolerance) 倍，或 peak_memory_mb 高于基线 (1 + tolerance) 倍时报告；
+    规模(codes, days, seed)与基线不同的场景不比较
+    :param results: run_benchmarks 的结果
+    :param baseline: load_baseline 读取的基线
+    :param tolerance: 允许的相对变化
+    :return: 回归描述列表，为空表示没有回归
+    """
+    regressions = []
+    for name, row in results.iterrows():
+        if name not in baseline.index:
+            continue
+        base = baseline.loc[name]
+        if (row["codes"], row["days"], row["seed"]) != (base["codes"], base["days"], base["seed"]):
+            continue
+        for column in ("bars_per_sec", "orders_per_sec"):
+            if base[column] > 0 and row[column] < base[column] * (1 - tolerance):
+                regressions.append(f"{name}: {column} {row[column]:.0f} < 基线 {base[column]:.0f} "
+                                   f"({row[column] / base[column] - 1:+.1%})")
+        memory, base_memory = row["peak_memory_mb"], base["peak_memory_mb"]
+        if base_memory > 0 and memory > base_memory * (1 + tolerance):
+            regressions.append(f"{name}: peak_memory_mb {memory:.1f} > 基线 {base_memory:.1f} "
+                               f"({memory / base_memory - 1:+.1%})")
+    return regressions
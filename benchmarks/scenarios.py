@@ -0,0 +1,106 @@
+# -*- coding:utf-8 -*-
+"""
+基准场景：每个场景构建账户、引擎与策略，分别压测委托量、t+n冻结、除权除息与结算频率
+filename : scenarios.py
+createtime : 2026/10/18 20:35
+author : Demon Finch
+"""
+import numpy as np
+from PaperTrader import Papertest, Paperengine, ORDER_DIRECTION, SETTLE_LEVEL
+
+
+def _signal(bars, dividend, seed):
+    """逐只股票 send_order + make_deal：duo 空仓时买入，kong 时卖出全部可用余额(同示例notebook)"""
+    account = Papertest(initcash=1e8, t=1)
+    per_code = account.cash_available / bars["code"].nunique()
+
+    def strategy(account, date, bar):
+        for code, close, duo, kong in zip(bar["code"], bar["close"], bar["duo"], bar["kong"]):
+            position = account.position.get(code)
+            if duo:
+                if position is None or position.gpye == 0:
+                    volume = np.floor(per_code / close / 100) * 100
+                    if volume > 0:
+                        account.make_deal(account.send_order(code, date, close, volume, ORDER_DIRECTION.BUY))
+            elif kong and position is not None and position.kyye > 0:
+                account.make_deal(account.send_order(code, date, close, position.kyye, ORDER_DIRECTION.SELL))
+
+    return Paperengine(account, strategy, dividend=dividend)
+
+
+def _rebalance(bars, dividend, seed):
+    """每日对随机10%的股票做等权调仓(Papertest.rebalance)，压测批量委托"""
+    account = Papertest(initcash=1e8, t=1)
+    rng = np.random.default_rng(seed)
+
+    def strategy(account, date, bar):
+        pick = bar["code"][rng.random(bar["code"].shape[0]) < 0.1]
+        if pick.shape[0]:
+            account.rebalance(dict.fromkeys(pick, 0.95 / pick.shape[0]))
+
+    return Paperengine(account, strategy, dividend=dividend)
+
+
+def _tplus(bars, dividend, seed):
+    """t+5：每日买入全部股票各100股并卖出一半可用余额，压测冻结批次的解冻"""
+    account = Papertest(initcash=1e10, t=5)
+
+    def strategy(account, date, bar):
+        codes = bar["code"]
+        kyye = np.array([account.position[code].kyye if code in account.position else 0 for code in codes])
+        sell = np.floor(kyye / 200) * 100
+        account.send_orders({"code": np.concatenate([codes[sell > 0], codes]),
+                             "order_price": np.concatenate([bar["close"][sell > 0], bar["close"]]),
+                             "order_volume": np.concatenate([sell[sell > 0], np.full(codes.shape[0], 100.0)]),
+                             "order_type": np.concatenate([np.full((sell > 0).sum(), ORDER_DIRECTION.SELL),
+                                                           np.full(codes.shape[0], ORDER_DIRECTION.BUY)])})
+
+    return Paperengine(account, strategy, dividend=dividend)
+
+
+def _hold_all(settle_level: str):
+    def build(bars, dividend, seed):
+        account = Papertest(initcash=1e10, t=1, settle_level=settle_level)
+
+        def strategy(account, date, bar):
+            if not account.position:
+                account.send_orders({"code": bar["code"],
+                                     "order_price": bar["close"],
+                                     "order_volume": np.full(bar["code"].shape[0], 1000.0)})
+
+        return Paperengine(account, strategy, dividend=dividend)
+    return build
+
+
+def _limit(bars, dividend, seed):
+    """每日对随机10%的股票挂收盘价下浮1%的限价买单，持仓挂上浮1%的限价卖单，由 match_orders 撮合"""
+    account = Papertest(initcash=1e9, t=1, volume_ratio=0.05)
+    rng = np.random.default_rng(seed)
+
+    def strategy(account, date, bar):
+        for order_id in list(account.get_wait_order()):
+            account.cancel_deal(order_id)
+        codes, close = bar["code"], bar["close"]
+        buy = rng.random(codes.shape[0]) < 0.1
+        kyye = np.array([account.position[code].kyye if code in account.position else 0 for code in codes])
+        sell = kyye > 0
+        account.send_orders({"code": np.concatenate([codes[sell], codes[buy]]),
+                             "order_price": np.round(np.concatenate([close[sell] * 1.01, close[buy] * 0.99]), 2),
+                             "order_volume": np.concatenate([kyye[sell], np.full(buy.sum(), 1000.0)]),
+                             "order_type": np.concatenate([np.full(sell.sum(), ORDER_DIRECTION.SELL),
+                                                           np.full(buy.sum(), ORDER_DIRECTION.BUY)])},
+                            deal=False)
+
+    return Paperengine(account, strategy, dividend=dividend)
+
+
+# 场景名 -> (说明, 构建函数 build(bars, dividend, seed) -> Paperengine, 每年除权除息次数)
+SCENARIOS = {
+    "signal": ("duo/kong信号逐笔委托", _signal, 1.0),
+    "rebalance": ("每日随机10%股票等权调仓", _rebalance, 1.0),
+    "tplus": ("t+5每日全市场买入与部分卖出", _tplus, 1.0),
+    "dividend": ("全市场持有，每只股票每月除权除息", _hold_all(SETTLE_LEVEL.ACCOUNT), 12.0),
+    "settle_position": ("全市场持有，逐bar记录持仓明细", _hold_all(SETTLE_LEVEL.POSITION), 0.0),
+    "settle_account": ("全市场持有，逐bar只记录账户汇总", _hold_all(SETTLE_LEVEL.ACCOUNT), 0.0),
+    "limit": ("限价委托挂单与bar撮合", _limit, 1.0),
+}
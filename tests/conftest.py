@@ -0,0 +1,54 @@
+# -*- coding:utf-8 -*-
+"""
+测试共用：样本数据路径与 回测-除权除息.ipynb 中的 duo/kong 示例策略
+"""
+import math
+import os
+import pandas as pd
+import pytest
+from PaperTrader import Papertest, Paperengine, ORDER_DIRECTION
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+UNADJUSTED_CSV = os.path.join(DATA_DIR, "未复权数据回测样本.csv")
+ADJUSTED_CSV = os.path.join(DATA_DIR, "复权数据回测样本.csv")
+DIVIDEND_CSV = os.path.join(DATA_DIR, "除权除息.csv")
+
+
+def duo_kong_strategy(account, date, bar):
+    """duo 且空仓时收盘价全仓买入，kong 时卖出全部可用余额，有分红时按开盘价估算数量再投资"""
+    for code, open_price, close, duo, kong in zip(bar["code"], bar["open"], bar["close"], bar["duo"], bar["kong"]):
+        position = account.position.get(code)
+        if duo:
+            if position is None or position.gpye == 0:
+                order_buy = account.send_order(code=code, order_time=date,
+                                               order_volume=math.ceil(account.cash_available / close / 100 /
+                                                                      (1 + account.commisson)) * 100 - 100,
+                                               order_price=close, order_type=ORDER_DIRECTION.BUY)
+                account.make_deal(order_buy)
+        elif kong:
+            if position is not None and position.kyye > 0:
+                order_sell = account.send_order(code=code, order_time=date, order_volume=position.kyye,
+                                                order_price=close, order_type=ORDER_DIRECTION.SELL)
+                account.make_deal(order_sell)
+        elif position is not None and position.dividend_money > 0:
+            fengong = math.ceil(account.cash_available / open_price / 100 / (1 + account.commisson)) * 100 - 100
+            if fengong > 0:
+                order_divi = account.send_order(code=code, order_time=date, order_volume=fengong,
+                                                order_price=close, order_type=ORDER_DIRECTION.BUY)
+                account.make_deal(order_divi)
+
+
+def duo_kong_factory():
+    return duo_kong_strategy
+
+
+def run_sample(csv_path: str, t: int = 1, dividend: bool = True, **account_params) -> Papertest:
+    """用 Paperengine 在样本csv上运行示例策略"""
+    account = Papertest(t=t, **account_params)
+    Paperengine(account, duo_kong_strategy, dividend=pd.read_csv(DIVIDEND_CSV) if dividend else None).run(csv_path)
+    return account
+
+
+@pytest.fixture(scope="session")
+def dividend_table() -> pd.DataFrame:
+    return pd.read_csv(DIVIDEND_CSV)
@@ -0,0 +1,120 @@
+# -*- coding:utf-8 -*-
+"""
+Papertest 增量维护的账户汇总、价格表与持仓账本
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from PaperTrader import Papertest, ORDER_DIRECTION
+from PaperTrader.paper_price import Paperprice
+
+codes = [f"{i:06d}" for i in range(70)]  # 超过价格表初始容量64
+
+
+def _recompute(account: Papertest) -> tuple:
+    """由持仓与价格表从头计算 (持仓市值, 持仓成本)"""
+    held = [posii for posii in account.position.values() if posii.gpye > 0]
+    money = sum(posii.gpye * account.code_current_price[posii.code] for posii in held)
+    cost = sum(posii.cost_money for posii in held)
+    return money, cost
+
+
+def _assert_totals(account: Papertest):
+    money, cost = _recompute(account)
+    assert account.positon_money == pytest.approx(money, abs=1e-6)
+    assert account.all_float_profit == pytest.approx(money - cost, abs=1e-6)
+    assert account.all_money == pytest.approx(account.cash_available + account.frozen_money + money, abs=1e-6)
+    assert set(account.get_current_position) == {posii.code for posii in account.position.values() if posii.gpye > 0}
+    for posii in account.position.values():
+        assert posii.order_ledger.column("volume").sum() == pytest.approx(posii.gpye)
+
+
+def _buy(account, code, volume, price):
+    account.make_deal(account.send_order(code, account.current_time, price, volume, ORDER_DIRECTION.BUY))
+
+
+def _sell(account, code, volume, price):
+    account.make_deal(account.send_order(code, account.current_time, price, volume, ORDER_DIRECTION.SELL))
+
+
+@pytest.fixture
+def account() -> Papertest:
+    account = Papertest(initcash=10000000, t=1)
+    account.on_current_time(pd.Timestamp("2020-01-02"))
+    account.on_price_change_all(np.array(codes, dtype=object), np.linspace(5, 40, len(codes)))
+    return account
+
+
+def test_running_totals_after_trades_prices_and_dividend(account):
+    for code in codes[::7]:
+        _buy(account, code, 1000, account.code_current_price[code])
+    _assert_totals(account)
+
+    account.on_price_change_all(pd.Series(np.linspace(6, 38, len(codes)), index=codes))
+    account.on_price_change(codes[63], 99.0)
+    _assert_totals(account)
+
+    account.on_dividend([{"code": codes[0], "split": 0.5, "dividend": 0.3},
+                         {"code": codes[1], "split": 1.0, "dividend": 0.2}])  # codes[1] 未持仓，不处理
+    assert account.position[codes[0]].gpye == 1500
+    assert codes[1] not in account.position
+    _assert_totals(account)
+
+    account.on_current_time(pd.Timestamp("2020-01-03"))
+    _sell(account, codes[7], 400, 20.0)
+    _sell(account, codes[14], 1000, 21.0)
+    assert codes[14] not in account.get_current_position
+    account.settle()
+    _assert_totals(account)
+    last = account.settle_history.to_frame().iloc[-1]
+    money, cost = _recompute(account)
+    assert last["positon_money"] == pytest.approx(money)
+    assert last["all_float_profit"] == pytest.approx(money - cost)
+
+
+def test_position_current_price_setter_updates_totals(account):
+    _buy(account, codes[3], 1000, 10.0)
+    _buy(account, codes[66], 500, 20.0)
+    account.position[codes[66]].current_price = 25.0
+    assert account.code_current_price[codes[66]] == 25.0
+    _assert_totals(account)
+    assert account.positon_money == pytest.approx(1000 * account.code_current_price[codes[3]] + 500 * 25.0)
+
+
+def test_close_position_moves_ledger_to_old_history(account):
+    _buy(account, codes[5], 1000, 10.0)
+    account.on_current_time(pd.Timestamp("2020-01-03"))
+    _sell(account, codes[5], 1000, 11.0)
+    position = account.position[codes[5]]
+    assert position.gpye == 0 and len(position.order_ledger) == 0
+    assert len(position.old_history) == 1
+    assert position.old_history[0]["volume"].tolist() == [1000, -1000]
+    assert account.positon_money == 0 and account.all_float_profit == 0
+
+
+@pytest.mark.parametrize("t", [0, 1, 3])
+def test_ledger_releases_frozen_batches_by_calendar_day(t):
+    account = Papertest(initcash=1000000, t=t)
+    start = pd.Timestamp("2020-01-02")
+    account.on_current_time(start)
+    _buy(account, "600000", 1000, 10.0)
+    account.on_current_time(start + pd.Timedelta(days=1))
+    _buy(account, "600000", 500, 10.0)
+    position = account.position["600000"]
+    for day in range(1, 6):
+        account.on_current_time(start + pd.Timedelta(days=day))
+        expected = (1000 if day >= t else 0) + (500 if day - 1 >= t else 0)
+        assert position.kyye == expected, day
+        assert position.djsl == 1500 - expected
+
+
+def test_price_map_grows_with_dict_style_writes():
+    prices = Paperprice()
+    for i, code in enumerate(codes * 3):
+        prices[f"{code}-{i // len(codes)}"] = float(i)
+    assert len(prices) == len(codes) * 3
+    assert prices[f"{codes[64]}-0"] == 64.0
+    assert prices[f"{codes[5]}-2"] == 2 * len(codes) + 5.0
+    slots, old = prices.update(np.array([f"{codes[0]}-0", "new"], dtype=object), np.array([1.5, 2.5]))
+    assert old[0] == 0.0 and np.isnan(old[1])
+    assert prices.prices[slots].tolist() == [1.5, 2.5]
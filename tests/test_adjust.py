@@ -0,0 +1,94 @@
+# -*- coding:utf-8 -*-
+"""
+Paperadjust 复权：等差复权与 复权数据回测样本.csv 一致，等比复权的送转与分红
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from PaperTrader import Paperadjust, ADJUST_METHOD
+from conftest import UNADJUSTED_CSV, ADJUSTED_CSV
+
+PRICES = ["open", "high", "low", "close"]
+
+
+def test_difference_matches_adjusted_sample(dividend_table):
+    bars = pd.read_csv(UNADJUSTED_CSV)
+    adjusted = Paperadjust(bars, dividend_table, method=ADJUST_METHOD.DIFFERENCE).frame("forward")
+    merged = adjusted.merge(pd.read_csv(ADJUSTED_CSV), on=["date", "code"], suffixes=("", "_sample"))
+    assert merged.shape[0] == bars.shape[0] - 1  # 样本首日在未复权数据之前
+
+    # 样本价格保留两位小数
+    error = np.column_stack([(merged[name] - merged[f"{name}_sample"]).abs() for name in PRICES])
+    matched = (error <= 0.005 + 1e-9).all(axis=1)
+    assert matched.mean() > 0.99
+    # 不一致的bar都在除权除息日前一周内(样本数据源的除权日与除权除息表相差几天)
+    dates = pd.to_datetime(merged.loc[~matched, "date"]).values
+    events = pd.to_datetime(dividend_table["datetime"]).values
+    gap = events[None, :] - dates[:, None]
+    assert ((gap >= np.timedelta64(0, "D")) & (gap <= np.timedelta64(7, "D"))).any(axis=1).all()
+
+
+@pytest.fixture(scope="module")
+def synthetic():
+    """
+    两个代码：600000 在第4根bar除权(10送5派0.2)、第7根bar派息0.3，000001 无事件；
+    除权除息表中 601888 不在bar中，忽略
+    """
+    dates = pd.bdate_range("2020-01-01", periods=8)
+    close = np.array([10.0, 10.4, 10.0, 6.8, 7.0, 7.2, 6.9, 7.1])
+    bars = pd.DataFrame({"date": np.tile(dates.strftime("%Y-%m-%d"), 2),
+                         "code": ["600000"] * 8 + ["000001"] * 8,
+                         "open": np.concatenate([close - 0.1, np.full(8, 5.0)]),
+                         "high": np.concatenate([close + 0.2, np.full(8, 5.2)]),
+                         "low": np.concatenate([close - 0.2, np.full(8, 4.8)]),
+                         "close": np.concatenate([close, np.full(8, 5.1)]),
+                         "volume": np.full(16, 1000.0)})
+    dividend = pd.DataFrame({"code": ["600000", "600000", "601888"],
+                             "split": [0.5, 0.0, 1.0],
+                             "datetime": [dates[3].strftime("%Y-%m-%d"), dates[6].strftime("%Y-%m-%d"),
+                                          dates[2].strftime("%Y-%m-%d")],
+                             "dividend": [0.2, 0.3, 0.0]})
+    # 打乱行序，结果按原行对齐
+    return bars.sample(frac=1, random_state=1), dividend
+
+
+def test_ratio_split_and_dividend(synthetic):
+    bars, dividend = synthetic
+    adjust = Paperadjust(bars, dividend, method=ADJUST_METHOD.RATIO)
+    # 每个事件的比例 (前收盘 - 分红) / ((1 + 送转) × 前收盘)
+    first = (10.0 - 0.2) / (1.5 * 10.0)
+    second = (7.2 - 0.3) / 7.2
+    position = pd.to_datetime(bars["date"]).rank(method="dense").astype(int).values - 1
+    stock = (bars["code"] == "600000").values
+    forward = np.where(position < 3, first * second, np.where(position < 6, second, 1.0))
+    backward = np.where(position < 3, 1.0, np.where(position < 6, 1 / first, 1 / (first * second)))
+    forward[~stock], backward[~stock] = 1.0, 1.0
+
+    frame = adjust.frame("forward")
+    for name in PRICES:
+        np.testing.assert_allclose(frame[name].values, bars[name].values * forward, rtol=1e-12)
+        np.testing.assert_allclose(adjust.column(name, "backward"), bars[name].values * backward, rtol=1e-12)
+    volume = np.where(stock & (position < 3), 1.5, 1.0)
+    np.testing.assert_allclose(frame["volume"].values, bars["volume"].values * volume)
+    np.testing.assert_allclose(adjust.column("volume", "backward"), bars["volume"].values / np.where(
+        stock & (position >= 3), 1.5, 1.0))
+    assert (frame.index == bars.index).all()
+    # 除权日的前复权涨幅 = 送转后市值 / 扣除分红的前收盘
+    series = frame[stock].assign(position=position[stock]).sort_values("position")["close"].values
+    assert series[3] / series[2] == pytest.approx(6.8 * 1.5 / (10.0 - 0.2))
+    assert adjust.factors()["forward_offset"].eq(0).all()
+
+
+def test_difference_split_and_dividend(synthetic):
+    bars, dividend = synthetic
+    adjust = Paperadjust(bars, dividend, method=ADJUST_METHOD.DIFFERENCE)
+    position = pd.to_datetime(bars["date"]).rank(method="dense").astype(int).values - 1
+    stock = (bars["code"] == "600000").values
+    close = bars["close"].values
+    expected = np.where(position < 3, ((close - 0.2) / 1.5) - 0.3, np.where(position < 6, close - 0.3, close))
+    expected[~stock] = close[~stock]
+    np.testing.assert_allclose(adjust.column("close"), expected, rtol=1e-12)
+    # 后复权：事件之后的价格逐次按逆变换 p × (1 + split) + dividend 还原
+    backward = np.where(position < 3, close, np.where(position < 6, close * 1.5 + 0.2, (close + 0.3) * 1.5 + 0.2))
+    backward[~stock] = close[~stock]
+    np.testing.assert_allclose(adjust.column("close", "backward"), backward, rtol=1e-12)
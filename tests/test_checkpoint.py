@@ -0,0 +1,45 @@
+# -*- coding:utf-8 -*-
+"""
+save_checkpoint / load_checkpoint：回测中途快照后恢复继续，与不中断的回测逐位一致
+"""
+import pandas as pd
+import pytest
+from PaperTrader import Papertest, Paperengine
+from conftest import UNADJUSTED_CSV, duo_kong_strategy
+
+
+def _assert_same_account(account: Papertest, expected: Papertest):
+    pd.testing.assert_frame_equal(account.settle_history.to_frame(), expected.settle_history.to_frame(),
+                                  check_exact=True)
+    pd.testing.assert_frame_equal(account.order.to_frame(), expected.order.to_frame(), check_exact=True)
+    pd.testing.assert_frame_equal(account.order_hisotry_dataframe, expected.order_hisotry_dataframe,
+                                  check_exact=True)
+    for name in ["cash_available", "frozen_money", "all_money", "positon_money", "all_float_profit", "current_time"]:
+        assert getattr(account, name) == getattr(expected, name), name
+    assert {code: (posii.gpye, posii.kyye, posii.cost_money) for code, posii in account.position.items()} == \
+        {code: (posii.gpye, posii.kyye, posii.cost_money) for code, posii in expected.position.items()}
+    assert account.metrics.stats() == expected.metrics.stats()
+    assert account.new_order_id() == expected.new_order_id()
+
+
+@pytest.mark.parametrize("stop_date", ["2015-06-30", "2018-06-21"])  # 均持仓，随后有分红
+def test_resume_from_checkpoint_matches_uninterrupted_run(dividend_table, tmp_path, stop_date):
+    expected = Paperengine(Papertest(initcash=1000000, t=1), duo_kong_strategy, dividend=dividend_table) \
+        .run(UNADJUSTED_CSV)
+
+    stop = pd.Timestamp(stop_date)
+    first = Paperengine(Papertest(initcash=1000000, t=1), duo_kong_strategy, dividend=dividend_table,
+                        stop=lambda account: account.current_time >= stop).run(UNADJUSTED_CSV)
+    assert first.current_time == stop and first.get_current_position
+    path = str(tmp_path / "account.pkl")
+    first.save_checkpoint(path)
+
+    # 快照含除权除息日历与进度，恢复后不再传入 dividend
+    account = Papertest.load_checkpoint(path)
+    Paperengine(account, duo_kong_strategy).run(UNADJUSTED_CSV, after=account.current_time)
+    _assert_same_account(account, expected)
+
+    # 同一快照再次加载为独立的账户
+    again = Papertest.load_checkpoint(path)
+    assert again.current_time == first.current_time
+    assert len(again.settle_history) == len(first.settle_history) < len(account.settle_history)
@@ -0,0 +1,67 @@
+# -*- coding:utf-8 -*-
+"""
+Paperengine 按日期分组驱动
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from PaperTrader import Papertest, Paperengine
+from conftest import UNADJUSTED_CSV, duo_kong_strategy, run_sample
+
+
+@pytest.fixture(scope="module")
+def two_symbols() -> pd.DataFrame:
+    """样本行情加一个价格减半的第二个代码，按代码排序"""
+    first = pd.read_csv(UNADJUSTED_CSV)
+    second = first.assign(code=600000, open=first["open"] / 2, close=first["close"] / 2,
+                          high=first["high"] / 2, low=first["low"] / 2)
+    return pd.concat([first, second], ignore_index=True)
+
+
+class _Counter(Paperengine):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dates = []
+
+    def on_bar(self, date, bar):
+        self.dates.append(date)
+        super().on_bar(date, bar)
+
+
+def test_multi_symbol_one_bar_per_date(two_symbols):
+    data = two_symbols.sort_values("date", kind="stable")
+    engine = _Counter(Papertest(initcash=1000000), duo_kong_strategy)
+    account = engine.run(data)
+
+    dates = np.array(engine.dates)
+    assert dates.shape[0] == data["date"].nunique()
+    assert (dates[1:] > dates[:-1]).all()
+    assert {600000, 601888} <= set(account.position)
+    assert len(account.settle_history) == dates.shape[0]
+
+
+def test_multi_symbol_chunked_csv_matches_frame(two_symbols, tmp_path):
+    data = two_symbols.sort_values("date", kind="stable")
+    path = tmp_path / "bars.csv"
+    data.to_csv(path, index=False)
+    expected = Paperengine(Papertest(), duo_kong_strategy).run(data).settle_history.to_frame()
+    result = Paperengine(Papertest(), duo_kong_strategy, chunksize=7).run(str(path)).settle_history.to_frame()
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_dates_out_of_order_raise(two_symbols, tmp_path):
+    with pytest.raises(ValueError, match="升序"):
+        Paperengine(Papertest(), duo_kong_strategy).run(two_symbols)
+
+    # 倒退恰好发生在分块边界
+    path = tmp_path / "bars.csv"
+    two_symbols.to_csv(path, index=False)
+    first_rows = int((two_symbols["code"] == 601888).sum())
+    engine = Paperengine(Papertest(), duo_kong_strategy, chunksize=first_rows)
+    with pytest.raises(ValueError, match="升序"):
+        engine.run(str(path))
+
+
+def test_single_symbol_unchanged():
+    account = run_sample(UNADJUSTED_CSV)
+    assert len(account.settle_history) == pd.read_csv(UNADJUSTED_CSV)["date"].nunique()
@@ -0,0 +1,46 @@
+# -*- coding:utf-8 -*-
+"""
+Paperexport 导出与 read_history 读取的一致性
+"""
+import numpy as np
+import pytest
+from PaperTrader import Papertest, Paperengine, Paperexport, read_history
+from conftest import UNADJUSTED_CSV, duo_kong_strategy, run_sample
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.mark.parametrize("file_format, trim", [("parquet", False), ("arrow", True)])
+def test_export_matches_account(tmp_path, dividend_table, file_format, trim):
+    expected = run_sample(UNADJUSTED_CSV)
+
+    account = Papertest()
+    with Paperexport(str(tmp_path), file_format=file_format, flush_rows=500, trim=trim) as exporter:
+        exporter.attach(account)
+        Paperengine(account, duo_kong_strategy, dividend=dividend_table).run(UNADJUSTED_CSV)
+
+    fills = read_history(str(tmp_path), "fills", file_format=file_format)
+    orders = expected.order_hisotry_dataframe
+    assert len(fills) == len(orders)
+    assert (fills["datetime"].values == orders["datetime"].values).all()
+    np.testing.assert_allclose(fills["money"].values, orders["money"].values.astype(float))
+
+    settle = read_history(str(tmp_path), "settle", file_format=file_format)
+    np.testing.assert_allclose(settle["all_money"].values, expected.settle_history.to_frame()["all_money"].values)
+    positions = read_history(str(tmp_path), "positions", file_format=file_format)
+    np.testing.assert_allclose(positions["gpye"].values, expected.settle_history.position_frame()["gpye"].values)
+
+
+def test_read_history_filters(tmp_path, dividend_table):
+    account = Papertest()
+    with Paperexport(str(tmp_path)) as exporter:
+        exporter.attach(account)
+        Paperengine(account, duo_kong_strategy, dividend=dividend_table).run(UNADJUSTED_CSV)
+
+    fills = read_history(str(tmp_path), "fills")
+    result = read_history(str(tmp_path), "fills", codes=["601888"], start="2015-01-01", end="2016-12-31")
+    expected = fills[(fills["datetime"] >= "2015-01-01") & (fills["datetime"] <= "2016-12-31")]
+    assert len(result) == len(expected) > 0
+    assert read_history(str(tmp_path), "fills", codes=["000001"]).empty
+    batches = read_history(str(tmp_path), "settle", start="2015-01-01", batches=True)
+    assert sum(len(batch) for batch in batches) == (account.settle_history.to_frame().index >= "2015-01-01").sum()
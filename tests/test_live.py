@@ -0,0 +1,132 @@
+# -*- coding:utf-8 -*-
+"""
+Paperlive：文件回放与 Paperengine 一致，同批tick合并、交易日切换时结算、执行器模式
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import pytest
+from PaperTrader import Papertest, Paperengine, Paperlive, Paperxdxr, ORDER_DIRECTION, queue_source, replay_source
+from conftest import UNADJUSTED_CSV
+
+
+def price_strategy(account, date, bar):
+    """只用收盘价的策略(回放行情包没有信号列)：空仓时全仓买入，较成本涨跌10%时卖出全部可用余额"""
+    for code, close in zip(bar["code"], bar["close"]):
+        position = account.position.get(code)
+        if position is None or position.gpye == 0:
+            volume = int(account.cash_available / close / (1 + account.commisson) / 100) * 100
+            if volume > 0:
+                account.make_deal(account.send_order(code, date, close, volume, ORDER_DIRECTION.BUY))
+        elif position.kyye > 0 and abs(close * position.gpye / position.cost_money - 1) >= 0.1:
+            account.make_deal(account.send_order(code, date, close, position.kyye, ORDER_DIRECTION.SELL))
+
+
+def _with_str_code(frame: pd.DataFrame) -> pd.DataFrame:
+    """Paperengine 读取csv的代码为整数，回放为字符串"""
+    return frame.assign(code=frame["code"].astype(str))
+
+
+@pytest.fixture(scope="module")
+def engine_account(dividend_table) -> Papertest:
+    return Paperengine(Papertest(initcash=1000000, t=1), price_strategy, dividend=dividend_table).run(UNADJUSTED_CSV)
+
+
+@pytest.mark.parametrize("use_executor", [False, True])
+def test_replay_matches_engine(engine_account, dividend_table, use_executor):
+    account = Papertest(initcash=1000000, t=1)
+    # 回放的代码为字符串，除权除息表的代码与之一致
+    account.xdxr = Paperxdxr(dividend_table.assign(code=dividend_table["code"].astype(str)))
+    executor = ThreadPoolExecutor(max_workers=1) if use_executor else None
+    live = Paperlive(account, price_strategy, session_timer=False, executor=executor)
+    try:
+        asyncio.run(live.run(replay_source(UNADJUSTED_CSV, time_column="date", volume_column="volume",
+                                           packet_size=97, chunksize=500)))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    expected = engine_account
+    assert live.stats["sessions"] == len(expected.settle_history)
+    pd.testing.assert_frame_equal(account.settle_history.to_frame(), expected.settle_history.to_frame(),
+                                  check_exact=True)
+    pd.testing.assert_frame_equal(_with_str_code(account.settle_history.position_frame()),
+                                  _with_str_code(expected.settle_history.position_frame()), check_exact=True)
+    fills = account.order_hisotry_dataframe
+    pd.testing.assert_frame_equal(fills, expected.order_hisotry_dataframe, check_exact=True)
+    assert (fills["order_type"] == ORDER_DIRECTION.BUY).sum() > 5
+    assert (fills["order_type"] == ORDER_DIRECTION.XDXR).any()
+    assert account.all_money == expected.all_money
+
+
+class _Recorder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, account, time, bar):
+        self.calls.append((time, {name: np.asarray(values).tolist() if values is not None else None
+                                  for name, values in bar.items()}, len(account.settle_history)))
+
+
+def _run(packets, strategy, **params) -> Paperlive:
+    async def main():
+        queue = asyncio.Queue()
+        for packet in packets + [None]:
+            queue.put_nowait(packet)
+        return await live.run(queue_source(queue))
+
+    live = Paperlive(Papertest(initcash=1000000, t=1), strategy, session_timer=False, **params)
+    asyncio.run(main())
+    return live
+
+
+def test_ticks_of_one_code_in_a_batch_are_coalesced():
+    time = pd.Timestamp("2020-01-02 10:00")
+    ticks = [("600000", 10.0, 100, time), ("000001", 20.0, None, time),
+             ("600000", 10.4, 300, time + pd.Timedelta(seconds=1)), ("600000", 9.9, 200, time),
+             ("600000", 10.1, None, time + pd.Timedelta(seconds=2))]
+    recorder = _Recorder()
+    live = _run([ticks], recorder)
+    assert live.stats["ticks"] == 5 and live.stats["updates"] == 2
+    assert len(recorder.calls) == 1
+    call_time, bar, _ = recorder.calls[0]
+    assert call_time == time + pd.Timedelta(seconds=2)  # 批内最新的tick时间
+    assert bar == {"code": ["600000", "000001"], "open": [10.0, 20.0], "high": [10.4, 20.0],
+                   "low": [9.9, 20.0], "close": [10.1, 20.0], "volume": [600.0, 0.0]}
+    assert live.account.code_current_price["600000"] == 10.1
+
+
+def test_without_volume_matching_is_unlimited():
+    recorder = _Recorder()
+    _run([[("600000", 10.0), ("600000", 10.2)]], recorder, clock=lambda: pd.Timestamp("2020-01-02 10:00"))
+    assert recorder.calls[0][1]["volume"] is None
+    assert recorder.calls[0][0] == pd.Timestamp("2020-01-02 10:00")
+
+
+def test_settle_once_per_day_on_rollover():
+    day1, day2 = pd.Timestamp("2020-01-02 09:31"), pd.Timestamp("2020-01-03 09:31")
+    bought = []
+
+    def strategy(account, time, bar):
+        if not bought:
+            bought.append(account.send_order("600000", time, 10.0, 1000, ORDER_DIRECTION.BUY))
+            account.make_deal(bought[0])
+        strategy.states.append((time, len(account.settle_history), account.position["600000"].kyye))
+
+    strategy.states = []
+    packets = [[("600000", 10.0, None, day1)],
+               {"code": ["600000"], "price": [10.5], "time": [day1 + pd.Timedelta(hours=5)]},
+               # 一个行情包跨两个交易日时按日切分
+               [("600000", 10.6, None, day1 + pd.Timedelta(hours=5, minutes=1)), ("600000", 11.0, None, day2)],
+               [("600000", 11.2, None, day2 + pd.Timedelta(minutes=1))]]
+    live = _run(packets, strategy)
+    # 第一日内不结算、t+1冻结；第二日第一批行情前结算第一日并解冻(行情包可能合并为一批，按日比较)
+    day_states = dict()
+    for time, settled, kyye in strategy.states:
+        day_states.setdefault(time.normalize(), set()).add((settled, kyye))
+    assert day_states == {day1.normalize(): {(0, 0)}, day2.normalize(): {(1, 1000)}}
+    history = live.account.settle_history.to_frame()
+    assert history.index.tolist() == [day1 + pd.Timedelta(hours=5, minutes=1), day2 + pd.Timedelta(minutes=1)]
+    assert history["all_money"].iloc[-1] == pytest.approx(live.account.all_money)
+    assert live.stats["sessions"] == 2
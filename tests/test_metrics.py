@@ -0,0 +1,27 @@
+# -*- coding:utf-8 -*-
+"""
+Papermetrics 在线指标与 show_perf_stats 的一致性
+"""
+import numpy as np
+import pytest
+from PaperTrader import show_perf_stats
+from conftest import UNADJUSTED_CSV, ADJUSTED_CSV, run_sample
+
+
+@pytest.mark.parametrize("csv_path, dividend", [pytest.param(UNADJUSTED_CSV, True, id="unadjusted"),
+                                                pytest.param(ADJUSTED_CSV, False, id="adjusted")])
+def test_online_metrics_match_perf_stats(csv_path, dividend):
+    account = run_sample(csv_path, dividend=dividend, metrics=True)
+    stats = account.metrics.stats()
+    expected = show_perf_stats(account.settle_history.returns())["Backtest"]
+
+    shared = [name for name in stats if name in expected.index]
+    assert len(shared) == 7
+    for name in shared:
+        np.testing.assert_allclose(stats[name], expected[name], rtol=1e-9, err_msg=name)
+
+    all_money = account.settle_history.to_frame()["all_money"]
+    drawdown = all_money / all_money.cummax() - 1
+    valley = drawdown.idxmin()
+    assert stats["Max drawdown valley"] == valley
+    assert stats["Max drawdown peak"] == all_money[:valley].idxmax()
@@ -0,0 +1,89 @@
+# -*- coding:utf-8 -*-
+"""
+Papertest.match_orders 按bar撮合限价委托：可成交量、整手取整、部分成交与撤单
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from PaperTrader import Papertest, ORDER_DIRECTION, ORDER_STATUS
+
+
+def _bar(volume, open_price=10.0, high=10.5, low=9.5):
+    return (np.array(["600000"], dtype=object), np.array([open_price]), np.array([high]), np.array([low]),
+            np.array([volume], dtype=float))
+
+
+@pytest.fixture
+def account() -> Papertest:
+    account = Papertest(initcash=1000000, commisson=0.001, t=1)
+    account.on_current_time(pd.Timestamp("2020-01-02"))
+    return account
+
+
+def _assert_cash(account, spent):
+    assert account.cash_available + account.frozen_money == pytest.approx(1000000 - spent)
+
+
+def test_partial_buy_fills_whole_lots(account):
+    order_id = account.send_order("600000", account.current_time, 10.0, 1000, ORDER_DIRECTION.BUY)
+    frozen = 10.0 * 1000 * 1.001
+    assert account.frozen_money == pytest.approx(frozen)
+
+    # 可成交量 257 股，买入取整到 200 股，成交价 min(开盘价, 委托价)
+    fills = account.match_orders(*_bar(257, open_price=9.8))
+    assert fills == [(order_id, 200, 9.8)]
+    order = account.order[order_id]
+    assert order.order_status == ORDER_STATUS.WAIT and order.filled_volume == 200
+    assert account.position["600000"].gpye == 200
+    assert account.frozen_money == pytest.approx(frozen * 0.8)
+    _assert_cash(account, 200 * 9.8 * 1.001)
+
+    # 不足一手的可成交量不成交
+    assert account.match_orders(*_bar(90)) == []
+    assert account.order[order_id].filled_volume == 200
+
+    # 剩余委托量足够时全部成交，冻结资金归零
+    account.match_orders(*_bar(100000))
+    assert account.order[order_id].order_status == ORDER_STATUS.DONE
+    assert account.position["600000"].gpye == 1000
+    assert account.frozen_money == 0
+    _assert_cash(account, 200 * 9.8 * 1.001 + 800 * 10.0 * 1.001)
+
+
+def test_volume_multiplier_and_ratio():
+    account = Papertest(initcash=1000000, commisson=0.001, volume_ratio=0.25, volume_multiplier=100)
+    account.on_current_time(pd.Timestamp("2020-01-02"))
+    first = account.send_order("600000", account.current_time, 10.0, 500, ORDER_DIRECTION.BUY)
+    second = account.send_order("600000", account.current_time, 10.0, 500, ORDER_DIRECTION.BUY)
+    # 成交量按手计：floor(13 手 × 100 × 0.25) = 325 股，先到的委托先成交
+    fills = account.match_orders(*_bar(13))
+    assert fills == [(first, 300, 10.0)]
+    # 325 股可成交量由两笔委托共享：第一笔剩余 200 股全部成交，第二笔取整到 100 股
+    fills = account.match_orders(*_bar(13))
+    assert fills == [(first, 200, 10.0), (second, 100, 10.0)]
+    assert account.position["600000"].gpye == 600
+
+
+def test_sell_fills_odd_lots_up_to_sellable(account):
+    account.make_deal(account.send_order("600000", account.current_time, 10.0, 350, ORDER_DIRECTION.BUY))
+    account.on_current_time(pd.Timestamp("2020-01-03"))
+    order_id = account.send_order("600000", account.current_time, 10.2, 350, ORDER_DIRECTION.SELL)
+    # 卖出不取整，按可成交量与可卖数量成交零股
+    fills = account.match_orders(*_bar(250))
+    assert fills == [(order_id, 250, 10.2)]
+    fills = account.match_orders(*_bar(250))
+    assert fills == [(order_id, 100, 10.2)]
+    assert account.position["600000"].gpye == 0
+
+
+def test_cancel_releases_unfilled_frozen_cash(account):
+    order_id = account.send_order("600000", account.current_time, 10.0, 1000, ORDER_DIRECTION.BUY)
+    account.match_orders(*_bar(350))
+    assert account.order[order_id].filled_volume == 300
+    account.cancel_deal(order_id)
+    assert account.order[order_id].order_status == ORDER_STATUS.CANCEL
+    assert account.frozen_money == 0
+    _assert_cash(account, 300 * 10.0 * 1.001)
+    # 撤销后不再撮合
+    assert account.match_orders(*_bar(100000)) == []
+    assert account.position["600000"].gpye == 300
@@ -0,0 +1,180 @@
+# -*- coding:utf-8 -*-
+"""
+paper_pyfolio 的原生指标与回撤表：与 pyfolio 对照，缺失值、全零收益率，自助法(bootstrap)与滚动窗口指标
+"""
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+from PaperTrader.paper_pyfolio import perf_stats, gen_drawdown_table, perf_stats_bootstrap, show_perf_stats, \
+    rolling_perf_stats, ROLLING_STATS
+
+
+@pytest.fixture(scope="module")
+def returns() -> pd.Series:
+    index = pd.bdate_range("2018-01-01", periods=750)
+    return pd.Series(np.random.default_rng(7).normal(0.002, 0.012, 750), index=index)
+
+
+@pytest.fixture(scope="module")
+def factor_returns(returns) -> pd.Series:
+    return pd.Series(np.random.default_rng(8).normal(0.0005, 0.01, returns.shape[0]), index=returns.index)
+
+
+@pytest.fixture
+def pyfolio_timeseries(monkeypatch):
+    pytest.importorskip("pyfolio")
+    from pyfolio import timeseries
+    if isinstance(np.argmin(pd.Series([1.0, 0.0])), np.integer):
+        # pyfolio 0.9.2 依赖旧版 pandas 中 np.argmin 返回标签，新版返回位置
+        def get_max_drawdown_underwater(underwater):
+            valley = underwater.idxmin()
+            peak = underwater[:valley][underwater[:valley] == 0].index[-1]
+            recovered = underwater[valley:][underwater[valley:] == 0]
+            return peak, valley, recovered.index[0] if recovered.shape[0] else np.nan
+
+        monkeypatch.setattr(timeseries, "get_max_drawdown_underwater", get_max_drawdown_underwater)
+    return timeseries
+
+
+@pytest.mark.parametrize("with_factor", [False, True])
+def test_perf_stats_match_pyfolio(pyfolio_timeseries, returns, factor_returns, with_factor):
+    factor = factor_returns if with_factor else None
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        expected = pyfolio_timeseries.perf_stats(returns, factor)
+    stats = perf_stats(returns, factor)
+    assert stats.index.tolist() == expected.index.tolist()
+    pd.testing.assert_series_equal(stats, expected.astype(float), rtol=1e-9, check_names=False)
+
+
+@pytest.mark.parametrize("top", [5, 10])
+def test_drawdown_table_matches_pyfolio(pyfolio_timeseries, returns, top):
+    expected = pyfolio_timeseries.gen_drawdown_table(returns, top=top)
+    table = gen_drawdown_table(returns, top=top)
+    assert table["Recovery date"].isna().sum() == 1  # 含一段未恢复的回撤
+    pd.testing.assert_frame_equal(table, expected, check_dtype=False)
+
+
+def test_perf_stats_with_missing_returns(returns):
+    r = returns.copy()
+    r.iloc[[0, 10, 11, 400]] = np.nan
+    stats = perf_stats(r)
+    dropped = perf_stats(r.dropna())
+    # 缺失日按持平计入净值与年化，收益率分布类指标只用有效值
+    flat = perf_stats(r.fillna(0))
+    for name in ["Annual return", "Cumulative returns", "Max drawdown", "Calmar ratio"]:
+        assert stats[name] == pytest.approx(flat[name])
+    for name in ["Annual volatility", "Sharpe ratio", "Stability", "Omega ratio", "Sortino ratio",
+                 "Tail ratio", "Daily value at risk"]:
+        assert stats[name] == pytest.approx(dropped[name])
+    assert np.isnan(stats["Skew"]) and np.isnan(stats["Kurtosis"])
+
+
+def test_perf_stats_single_valid_return():
+    r = pd.Series([np.nan, 0.01, np.nan], index=pd.bdate_range("2020-01-01", periods=3))
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        stats = perf_stats(r)
+    assert stats["Cumulative returns"] == pytest.approx(0.01)
+    for name in ["Annual volatility", "Sharpe ratio", "Stability", "Omega ratio", "Sortino ratio",
+                 "Daily value at risk"]:
+        assert np.isnan(stats[name]), name
+
+
+def test_perf_stats_all_zero_returns():
+    r = pd.Series(np.zeros(20), index=pd.bdate_range("2020-01-01", periods=20))
+    stats = perf_stats(r)
+    for name in ["Annual return", "Cumulative returns", "Annual volatility", "Max drawdown", "Daily value at risk"]:
+        assert stats[name] == 0, name
+    for name in ["Sharpe ratio", "Calmar ratio", "Stability", "Omega ratio", "Sortino ratio",
+                 "Skew", "Kurtosis", "Tail ratio"]:
+        assert np.isnan(stats[name]), name
+    table = gen_drawdown_table(r, top=3)
+    assert table.shape == (3, 5) and table["Peak date"].isna().all()
+
+
+def test_bootstrap_samples_are_perf_stats_of_resamples(returns, factor_returns):
+    samples = perf_stats_bootstrap(returns, factor_returns, return_stats=False, n_samples=20, seed=5)
+    assert samples.shape == (20, len(perf_stats(returns, factor_returns)))
+    assert samples.columns.tolist() == perf_stats(returns, factor_returns).index.tolist()
+    # 单块时抽样矩阵由 SeedSequence(seed) 的第一个子序列生成，每行按 perf_stats 计算
+    seed = np.random.SeedSequence(5).spawn(1)[0]
+    index = np.random.default_rng(seed).integers(0, returns.shape[0], size=(20, returns.shape[0]))
+    for row in [0, 7, 19]:
+        expected = perf_stats(returns.values[index[row]], factor_returns.values[index[row]])
+        np.testing.assert_allclose(samples.iloc[row].values, expected.values, rtol=1e-9)
+
+
+def test_bootstrap_is_reproducible_with_seed(returns):
+    first = perf_stats_bootstrap(returns, n_samples=300, seed=11, chunk_size=64, processes=1)
+    pd.testing.assert_frame_equal(first, perf_stats_bootstrap(returns, n_samples=300, seed=11, chunk_size=64,
+                                                              processes=1))
+    # 结果只取决于 seed、n_samples 与 chunk_size，与进程数无关
+    pd.testing.assert_frame_equal(first, perf_stats_bootstrap(returns, n_samples=300, seed=11, chunk_size=64,
+                                                              processes=2))
+    assert not first.equals(perf_stats_bootstrap(returns, n_samples=300, seed=12, chunk_size=64, processes=1))
+
+
+def test_bootstrap_stats_table(returns):
+    stats = perf_stats_bootstrap(returns, n_samples=200, seed=3)
+    assert stats.columns.tolist() == ["mean", "median", "5%", "95%"]
+    assert stats.index.tolist() == perf_stats(returns).index.tolist()
+    assert (stats["5%"] <= stats["median"]).all() and (stats["median"] <= stats["95%"]).all()
+    samples = perf_stats_bootstrap(returns, return_stats=False, n_samples=200, seed=3)
+    pd.testing.assert_series_equal(stats["mean"], samples.mean(), check_names=False)
+    pd.testing.assert_series_equal(stats["95%"], samples.quantile(0.95), check_names=False)
+
+
+def test_show_perf_stats_bootstrap_with_live_start_date(returns):
+    live_start_date = returns.index[500]
+    table = show_perf_stats(returns, bootstrap=True, live_start_date=live_start_date, n_samples=100, seed=3)
+    assert table.columns.tolist() == [(period, stat) for period in ["In-sample", "Out-of-sample", "All"]
+                                      for stat in ["mean", "median", "5%", "95%"]]
+    assert table.index.tolist() == perf_stats(returns).index.tolist()
+    pd.testing.assert_frame_equal(table["In-sample"],
+                                  perf_stats_bootstrap(returns[:500], n_samples=100, seed=3))
+    pd.testing.assert_frame_equal(table["Out-of-sample"],
+                                  perf_stats_bootstrap(returns[500:], n_samples=100, seed=3))
+    pd.testing.assert_frame_equal(table["All"], perf_stats_bootstrap(returns, n_samples=100, seed=3))
+
+    # 样本外区间为空时该列为nan
+    table = show_perf_stats(returns, bootstrap=True, live_start_date="2030-01-01", n_samples=50, seed=3)
+    assert table["Out-of-sample"].isna().all().all()
+    assert table["In-sample"].notna().all().all()
+
+
+@pytest.mark.parametrize("window, step", [(60, None), (60, 1), (250, 20)])
+def test_rolling_windows_match_perf_stats(returns, window, step):
+    table = rolling_perf_stats(returns, window, step=step, chunk_size=7)
+    step = window if step is None else step
+    starts = np.arange(0, returns.shape[0] - window + 1, step)
+    assert table.columns.tolist() == ["window", "start", "end"] + ROLLING_STATS
+    assert table["window"].tolist() == list(range(starts.shape[0]))
+    # 第一个完整窗口为 [0, window)
+    assert table["start"].iloc[0] == returns.index[0] and table["end"].iloc[0] == returns.index[window - 1]
+    for row in sorted({0, 1, starts.shape[0] // 2, starts.shape[0] - 1}):
+        start = starts[row]
+        window_returns = returns.iloc[start:start + window]
+        assert table["start"].iloc[row] == window_returns.index[0]
+        assert table["end"].iloc[row] == window_returns.index[-1]
+        expected = perf_stats(window_returns)[ROLLING_STATS]
+        np.testing.assert_allclose(table.loc[row, ROLLING_STATS].values.astype(float), expected.values, rtol=1e-9)
+
+
+def test_rolling_windows_with_missing_returns(returns, factor_returns):
+    frame = pd.DataFrame({"a": returns, "b": factor_returns})
+    frame.iloc[[5, 6, 130, 131, 132], 0] = np.nan
+    table = rolling_perf_stats(frame, 120, step=60)
+    assert table["strategy"].tolist()[:4] == ["a", "b", "a", "b"]
+    assert table[ROLLING_STATS].notna().all().all()
+    for (row, name), window in table.groupby(["window", "strategy"]):
+        start = row * 60
+        # 缺失收益率按持平日计入窗口
+        expected = perf_stats(frame[name].iloc[start:start + 120].fillna(0))[ROLLING_STATS]
+        np.testing.assert_allclose(window[ROLLING_STATS].values[0].astype(float), expected.values, rtol=1e-9)
+
+
+def test_rolling_windows_shorter_series(returns):
+    table = rolling_perf_stats(returns[:30], 60)
+    assert table.empty and table.columns.tolist() == ["window", "start", "end"] + ROLLING_STATS
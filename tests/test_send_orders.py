@@ -0,0 +1,86 @@
+# -*- coding:utf-8 -*-
+"""
+Papertest.send_orders 批量委托与 rebalance 调仓
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from PaperTrader import Papertest, ORDER_DIRECTION
+
+BUY, SELL = ORDER_DIRECTION.BUY, ORDER_DIRECTION.SELL
+
+
+@pytest.fixture
+def account() -> Papertest:
+    """前一交易日买入 600000 1000股、000001 300股，当日已解冻"""
+    account = Papertest(initcash=1000000, commisson=0.001, tax_percent=0.001, t=1)
+    account.on_current_time(pd.Timestamp("2020-01-02"))
+    account.send_orders({"code": ["600000", "000001"], "order_price": [10.0, 20.0], "order_volume": [1000, 300]})
+    account.on_current_time(pd.Timestamp("2020-01-03"))
+    account.on_price_change_all(np.array(["600000", "000001", "601888"], dtype=object), np.array([10.0, 20.0, 50.0]))
+    return account
+
+
+def test_sell_of_unheld_code_is_skipped(account, capsys):
+    cash = account.cash_available
+    order_ids = account.send_orders({"code": ["601888", "600000"], "order_price": [50.0, 10.0],
+                                     "order_volume": [100, 0], "order_type": [SELL, SELL]})
+    assert order_ids == [None, None]
+    assert account.cash_available == cash and account.frozen_money == 0
+    assert "601888" not in account.position
+    assert account.order.wait_count == 0
+    assert capsys.readouterr().out == ""
+
+
+def test_same_day_sell_is_capped_by_kyye(account):
+    account.send_orders({"code": ["600000", "601888"], "order_price": [10.0, 50.0], "order_volume": [500, 200]})
+    assert account.position["600000"].gpye == 1500 and account.position["600000"].kyye == 1000
+    cash = account.cash_available
+    # 两笔卖单按行序占用kyye：1000股中第一笔800、第二笔截为200；当日买入的601888不可卖
+    order_ids = account.send_orders({"code": ["600000", "601888", "600000"], "order_price": [10.5, 50.0, 10.5],
+                                     "order_volume": [800, 200, 800], "order_type": [SELL, SELL, SELL]})
+    assert order_ids[0] is not None and order_ids[1] is None and order_ids[2] is not None
+    assert account.order[order_ids[0]].order_volume == 800
+    assert account.order[order_ids[2]].order_volume == 200
+    assert account.position["600000"].gpye == 500 and account.position["600000"].kyye == 0
+    assert account.position["601888"].gpye == 200
+    assert account.cash_available == pytest.approx(cash + 1000 * 10.5 * (1 - 0.001 - 0.001))
+
+
+def test_sells_run_before_buys(account):
+    order_ids = account.send_orders({"code": ["601888", "600000", "000001"], "order_price": [50.0, 10.0, 20.0],
+                                     "order_volume": [100, 1000, 300], "order_type": [BUY, SELL, SELL]})
+    buy_id, sell_ids = order_ids[0], order_ids[1:]
+    assert max(sell_ids) < buy_id
+    log = account.order.to_frame().set_index("order_id")
+    assert log.loc[sell_ids, "order_type"].tolist() == [SELL, SELL]
+    assert (log.loc[buy_id, "order_type"] == BUY) and len(account.get_current_position) == 1
+
+
+def test_rebalance_rounds_to_lots_and_keeps_cash(account):
+    all_money = account.all_money
+    order_ids = account.rebalance({"600000": 0.3, "601888": 0.7})
+    assert order_ids
+    position = account.position
+    # 000001 不在目标中，清仓
+    assert position["000001"].gpye == 0
+    assert position["600000"].gpye == np.floor(all_money * 0.3 / (10.0 * 1.001) / 100) * 100
+    assert position["601888"].gpye % 100 == 0 and position["601888"].gpye > 0
+    assert account.cash_available >= 0 and account.frozen_money == 0
+    # 权重合计为1时，资金不足的买单按比例缩减，剩余现金不足一手
+    assert account.cash_available < 100 * 50.0 * 1.001 + 100 * 10.0 * 1.001
+
+    # 可用余额不足时(当日买入部分冻结)卖出不超过kyye，结果仍为整手
+    account.rebalance({"600000": 0.1, "601888": 0.9}, lot_size=200)
+    assert position["601888"].gpye % 100 == 0
+    assert position["600000"].gpye % 100 == 0 and position["600000"].kyye == 0
+    assert account.cash_available >= 0
+
+
+def test_rebalance_with_overweight_targets_scales_buys():
+    account = Papertest(initcash=100000, commisson=0.001, t=1)
+    account.on_current_time(pd.Timestamp("2020-01-02"))
+    account.rebalance({"600000": 0.8, "601888": 0.8}, prices={"600000": 10.0, "601888": 50.0})
+    assert account.cash_available >= 0 and account.frozen_money == 0
+    assert all(posii.gpye % 100 == 0 and posii.gpye > 0 for posii in account.position.values())
+    assert account.positon_money <= 100000
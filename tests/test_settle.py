@@ -0,0 +1,24 @@
+# -*- coding:utf-8 -*-
+"""
+Papersettle 结算记录
+"""
+import warnings
+import pytest
+from conftest import UNADJUSTED_CSV, run_sample
+
+
+def test_returns_daily_without_warning():
+    account = run_sample(UNADJUSTED_CSV)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        returns = account.settle_history.returns()
+    assert len(returns) == len(account.settle_history) - 1
+
+
+@pytest.mark.parametrize("params", [{"settle_every": 5}, {"settle_only_changed": True}])
+def test_returns_warns_when_not_daily(params):
+    account = run_sample(UNADJUSTED_CSV, **params)
+    assert len(account.settle_history) < account.settle_history.settle_count
+    with pytest.warns(RuntimeWarning, match="不是逐日"):
+        account.settle_history.returns()
+    assert account.metrics.count == account.settle_history.settle_count - 1  # metrics 仍逐次结算更新
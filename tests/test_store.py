@@ -0,0 +1,93 @@
+# -*- coding:utf-8 -*-
+"""
+write_barstore / Paperstore 读写与区间取数
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from PaperTrader import write_barstore
+from conftest import UNADJUSTED_CSV
+
+
+@pytest.fixture(scope="module")
+def bars() -> pd.DataFrame:
+    """样本行情加一个字符串代码与数字样式的字符串列，按代码排序"""
+    first = pd.read_csv(UNADJUSTED_CSV)
+    first["code"] = first["code"].astype(str)
+    second = first.assign(code="000300", close=first["close"] / 2)
+    frame = pd.concat([first, second], ignore_index=True)
+    frame["board"] = np.where(frame["code"] == "000300", "000300", "1e3")
+    frame["halted"] = pd.array(np.arange(frame.shape[0]) % 5 == 0, dtype="boolean")
+    frame.loc[3, "halted"] = pd.NA
+    return frame
+
+
+@pytest.fixture(scope="module")
+def store(bars, tmp_path_factory):
+    return write_barstore(bars, str(tmp_path_factory.mktemp("store")))
+
+
+def _sorted(bars: pd.DataFrame) -> pd.DataFrame:
+    return bars.assign(date=pd.to_datetime(bars["date"])) \
+        .sort_values(["date", "code"], kind="stable").reset_index(drop=True)
+
+
+def test_round_trip(bars, store):
+    expected = _sorted(bars)
+    frame = store.to_frame()
+    assert len(store) == expected.shape[0]
+    assert frame.columns.tolist() == ["date", "code"] + [name for name in bars.columns if name not in ("date", "code")]
+    assert (frame["date"].values == expected["date"].values).all()
+    assert frame["code"].tolist() == expected["code"].tolist()
+    for name in ("open", "high", "low", "close", "volume"):
+        np.testing.assert_array_equal(frame[name].values, expected[name].values)
+    # 数字样式的字符串保持原样，不转为 300.0 / 1000.0
+    assert frame["board"].tolist() == expected["board"].tolist()
+    # 含缺失值的信号列存为float，缺失为nan
+    for name in ("duo", "kong", "halted"):
+        np.testing.assert_array_equal(frame[name].values, expected[name].astype(float).values)
+    assert np.isnan(frame["halted"].values).sum() == 1
+
+
+def test_select_ranges(bars, store):
+    expected = _sorted(bars)
+    dates = store.dates
+    start, end = str(dates[10]), str(dates[20])
+    bar = store.select(start, end)
+    mask = (expected["date"] >= start) & (expected["date"] <= end)
+    assert bar["date"].shape[0] == mask.sum() == 22
+    np.testing.assert_array_equal(bar["close"], expected.loc[mask, "close"].values)
+    assert isinstance(bar["close"], np.memmap)
+
+    bar = store.select(start, end, codes=["000300", "missing"])
+    assert bar["code"].tolist() == ["000300"] * 11
+    np.testing.assert_array_equal(bar["close"], expected.loc[mask & (expected["code"] == "000300"), "close"].values)
+
+    encoded = store.select(start, end, decode_codes=False)
+    assert encoded["code"].dtype == np.int32
+    assert store.codes[encoded["code"]].tolist() == expected.loc[mask, "code"].tolist()
+
+
+def test_select_range_without_rows(store):
+    dates = store.dates
+    for start, end in [("1990-01-01", "1990-12-31"),
+                       (str(dates[-1] + 1), None),
+                       (None, str(dates[0] - 1)),
+                       (str(dates[5]), str(dates[4]))]:
+        bar = store.select(start, end)
+        assert all(values.shape[0] == 0 for values in bar.values())
+        assert store.select(start, end, codes=["000300"])["date"].shape[0] == 0
+        assert list(store.chunks(start, end)) == []
+        assert store.to_frame(start, end).empty
+
+
+def test_chunks_cover_range_by_dates(bars, store):
+    dates = store.dates
+    start, end = str(dates[3]), str(dates[-4])
+    chunks = list(store.chunks(start, end, dates_per_chunk=7))
+    days = dates.shape[0] - 6
+    assert len(chunks) == -(-days // 7)
+    assert [np.unique(chunk["date"]).shape[0] for chunk in chunks] == [7] * (days // 7) + [days % 7] * (days % 7 > 0)
+    whole = store.select(start, end)
+    for name in whole:
+        np.testing.assert_array_equal(np.concatenate([chunk[name] for chunk in chunks]), whole[name])
@@ -0,0 +1,79 @@
+# -*- coding:utf-8 -*-
+"""
+Papersweep 与直接运行 Paperengine 的一致性
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from PaperTrader import Papersweep, Paperengine, Papertest, show_perf_stats
+from PaperTrader import paper_sweep
+from conftest import UNADJUSTED_CSV, DIVIDEND_CSV, duo_kong_factory, duo_kong_strategy, run_sample
+
+
+def _string_code_sample(dtype=object) -> tuple:
+    """样本数据与除权除息表的代码改为数字形式的字符串 "000001"(转为数值会变成1.0)"""
+    data = pd.read_csv(UNADJUSTED_CSV)
+    data["code"] = pd.Series("000001", index=data.index, dtype=dtype)
+    dividend = pd.read_csv(DIVIDEND_CSV).assign(code="000001")
+    return data, dividend
+
+
+def test_single_config_matches_engine(dividend_table):
+    account = run_sample(UNADJUSTED_CSV, t=1)
+    expected = account.settle_history.to_frame()["all_money"]
+
+    result = Papersweep(pd.read_csv(UNADJUSTED_CSV), duo_kong_factory, dividend=dividend_table,
+                        processes=1).run([{"t": 1}])
+    assert result["orders"].iloc[0] == account.order.order_count
+    assert result["bars"].iloc[0] == len(expected)
+    np.testing.assert_allclose(result["final_money"].iloc[0], expected.iloc[-1], rtol=1e-12)
+    np.testing.assert_allclose(result["max_money"].iloc[0], expected.max(), rtol=1e-12)
+    stats = show_perf_stats(account.settle_history.returns())["Backtest"]
+    for name in ["Annual return", "Sharpe ratio", "Max drawdown"]:
+        np.testing.assert_allclose(result[name].iloc[0], stats[name], rtol=1e-9, err_msg=name)
+
+
+@pytest.mark.parametrize("dtype", [object, "string"])
+def test_string_codes_match_engine(dtype):
+    data, dividend = _string_code_sample(dtype)
+    account = Paperengine(Papertest(), duo_kong_strategy, dividend=dividend).run(data)
+
+    result = Papersweep(data, duo_kong_factory, dividend=dividend, processes=1, perf_stats=False).run([{}])
+    assert result["orders"].iloc[0] == account.order.order_count
+    assert result["final_money"].iloc[0] == pytest.approx(account.settle_history.to_frame()["all_money"].iloc[-1],
+                                                          rel=1e-12)
+
+
+def test_multiple_processes_match_engine(dividend_table):
+    configs = [{"t": 0}, {"t": 1}, {"t": 3, "commisson": 0.0003}]
+    expected = [run_sample(UNADJUSTED_CSV, **config).settle_history.to_frame()["all_money"].iloc[-1]
+                for config in configs]
+
+    result = Papersweep(pd.read_csv(UNADJUSTED_CSV), duo_kong_factory, dividend=dividend_table,
+                        processes=2, perf_stats=False).run(configs)
+    assert result["t"].tolist() == [0, 1, 3]
+    np.testing.assert_allclose(result["final_money"].values, expected, rtol=1e-12)
+
+
+def test_blocks_released_when_sharing_fails(monkeypatch):
+    created = []
+    original = paper_sweep._column_values
+
+    def failing(series):
+        if series.name == "close":
+            raise RuntimeError("boom")
+        return original(series)
+
+    class Recording(paper_sweep.shared_memory.SharedMemory):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            created.append(self.name)
+
+    monkeypatch.setattr(paper_sweep, "_column_values", failing)
+    monkeypatch.setattr(paper_sweep.shared_memory, "SharedMemory", Recording)
+    with pytest.raises(RuntimeError, match="boom"):
+        Papersweep(pd.read_csv(UNADJUSTED_CSV), duo_kong_factory, processes=1).run([{}])
+    assert created
+    for name in created:
+        with pytest.raises(FileNotFoundError):
+            paper_sweep.shared_memory.SharedMemory(name=name)
@@ -0,0 +1,54 @@
+# -*- coding:utf-8 -*-
+"""
+Papervector 与 Papertest 逐笔模拟在样本数据上的一致性
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from PaperTrader import Papervector, ORDER_DIRECTION
+from conftest import UNADJUSTED_CSV, ADJUSTED_CSV, DIVIDEND_CSV, run_sample
+
+fill_columns = ["datetime", "order_type", "price", "volume", "commission", "tax", "money"]
+
+samples = [pytest.param(UNADJUSTED_CSV, True, id="unadjusted"),
+           pytest.param(ADJUSTED_CSV, False, id="adjusted")]
+
+
+def _run_vector(csv_path: str, t: int, dividend: bool) -> Papervector:
+    data = pd.read_csv(csv_path)
+    return Papervector(t=t).run_frame(data, pd.read_csv(DIVIDEND_CSV) if dividend else None)
+
+
+@pytest.mark.parametrize("t", [0, 1, 3])
+@pytest.mark.parametrize("csv_path, dividend", samples)
+def test_settle_frame_matches_papertest(csv_path, dividend, t):
+    account = run_sample(csv_path, t=t, dividend=dividend)
+    expected = account.settle_history.to_frame()
+    result = _run_vector(csv_path, t, dividend).to_frame()
+
+    assert (result.index.values == expected.index.values).all()
+    for name in ["all_money", "positon_money", "cash_available", "all_float_profit"]:
+        np.testing.assert_allclose(result[name].values, expected[name].values, rtol=0, atol=0.005, err_msg=name)
+
+
+@pytest.mark.parametrize("t", [0, 1, 3])
+@pytest.mark.parametrize("csv_path, dividend", samples)
+def test_fills_match_papertest(csv_path, dividend, t):
+    account = run_sample(csv_path, t=t, dividend=dividend)
+    orders = account.order_hisotry_dataframe
+    expected = orders[orders["order_type"] != ORDER_DIRECTION.XDXR][fill_columns].reset_index(drop=True)
+    result = _run_vector(csv_path, t, dividend).trades[fill_columns]
+
+    assert len(result) == len(expected) > 0
+    assert (result["datetime"].values == expected["datetime"].values).all()
+    assert (result["order_type"].values == expected["order_type"].values).all()
+    for name in ["price", "volume", "commission", "tax", "money"]:
+        np.testing.assert_allclose(result[name].values.astype(float), expected[name].values.astype(float),
+                                   rtol=0, atol=0.005, err_msg=name)
+
+
+def test_run_frame_rejects_multiple_codes():
+    data = pd.read_csv(UNADJUSTED_CSV)
+    data = pd.concat([data, data.assign(code=600000)], ignore_index=True)
+    with pytest.raises(ValueError, match="单个标的"):
+        Papervector().run_frame(data, pd.read_csv(DIVIDEND_CSV))